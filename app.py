@@ -1,35 +1,56 @@
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, session, current_app
+from flask import Flask, Response, render_template, request, jsonify, send_file, redirect, url_for, session, current_app
 from flask_cors import CORS
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.exceptions import RequestEntityTooLarge
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import json
+import csv
+import itertools
+from contextlib import contextmanager
 import firebase_admin
 from firebase_admin import credentials, firestore
 import traceback
 import openpyxl
 from openpyxl import Workbook, load_workbook
-from io import BytesIO
+from io import TextIOWrapper
 import os
+import tempfile
 import requests
-from bs4 import BeautifulSoup
+import re
+import gzip
+import hashlib
+import html as html_lib
+from lxml import etree, html as lxml_html
+from lxml.cssselect import CSSSelector
+from bs4 import BeautifulSoup, Comment
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 import threading
+import atexit
+import asyncio
+import random
+import aiohttp
+import redis
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
 import schedule
 import logging
 from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
+from product_extraction import (
+    PAGE_QUIET_JS, PRODUCT_CANDIDATES_SCRIPT, PRODUCT_ERROR_MESSAGES, PRODUCT_ERROR_SELECTORS,
+    PRODUCT_NAME_SELECTORS, PRODUCT_MRP_SELECTORS, PRODUCT_PRICE_SELECTORS, PRODUCT_BRAND_SELECTORS, PRICE_PATTERNS,
+    product_candidates_config, empty_product, extract_product, barcode_cache_fields, catalog_product_fields
+)
 from config import config
 
 # Load environment variables
@@ -283,6 +304,7 @@ def register_routes(app, limiter):
             
             print(f"DEBUG: Testing database write with data: {test_data}")
             db.collection('barcode_cache').document('TEST123456789').set(test_data)
+            invalidate_barcode_cache('TEST123456789')
             print(f"DEBUG: ✅ Successfully wrote test data to barcode_cache")
             
             # Verify it was written
@@ -451,6 +473,18 @@ processing_status = {
 
 # Processed barcodes history (in-memory storage)
 processed_barcodes_history = []
+processing_lock = threading.Lock()  # guards counters and history updated by concurrent workers
+
+def increment_processing_count(key):
+    with processing_lock:
+        processing_status[key] += 1
+        return processing_status[key]
+
+def record_processed_barcode(entry):
+    """Append to the processed history, keeping only the last 100 entries"""
+    with processing_lock:
+        processed_barcodes_history.append(entry)
+        del processed_barcodes_history[:-100]
 
 # Mock data for testing when Firebase is not available
 MOCK_PRODUCTS = [
@@ -585,10 +619,501 @@ except Exception as e:
     firebase_status = "initialization_failed"
     db = None
 
+# Shared state across gunicorn workers (Redis at REDIS_URL; None when it is unset or unreachable)
+def create_shared_redis():
+    url = app.config['REDIS_URL']
+    if not url or url.startswith('memory://'):
+        return None
+    try:
+        client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        client.ping()
+        print(f"Shared Redis connected: {url}")
+        return client
+    except redis.RedisError as e:
+        print(f"Shared Redis unavailable ({e}); cross-worker coordination disabled")
+        return None
+
+shared_redis = create_shared_redis()
+
+# In-process cache for barcode_cache reads
+CACHE_MISS = object()
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL"""
+    
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+# Each worker has its own cache. Invalidations are broadcast over Redis pub/sub; without Redis
+# other workers cannot be told about a write, so entries only live for BARCODE_CACHE_UNSHARED_TTL
+CACHE_INVALIDATION_CHANNEL = 'barcode_cache:invalidate'
+barcode_cache_ttl = (app.config['BARCODE_CACHE_TTL'] if shared_redis
+                     else min(app.config['BARCODE_CACHE_TTL'], app.config['BARCODE_CACHE_UNSHARED_TTL']))
+
+# Documents keyed by barcode (None is cached for barcodes that don't exist)
+barcode_doc_cache = TTLCache(app.config['BARCODE_CACHE_MAX_SIZE'], barcode_cache_ttl)
+# GET /api/products results keyed by query parameters
+product_list_cache = TTLCache(app.config['PRODUCT_LIST_CACHE_MAX_SIZE'], barcode_cache_ttl)
+
+def get_barcode_cache_doc(barcode):
+    """Read a barcode_cache document through the in-process cache.
+
+    Returns a copy of the document data, or None if the barcode doesn't exist.
+    """
+    replica = get_ready_replica('barcode_cache')
+    if replica:
+        return replica.get(barcode)
+    
+    data = barcode_doc_cache.get(barcode, CACHE_MISS)
+    if data is CACHE_MISS:
+        doc = db.collection('barcode_cache').document(barcode).get()
+        data = doc.to_dict() if doc.exists else None
+        barcode_doc_cache.set(barcode, data)
+    return dict(data) if data is not None else None
+
+def drop_local_barcode_cache(barcode=None):
+    if barcode is None:
+        barcode_doc_cache.clear()
+    else:
+        barcode_doc_cache.delete(barcode)
+    product_list_cache.clear()
+
+def invalidate_barcode_cache(barcode=None):
+    """Drop cached barcode_cache data after a write (all documents if no barcode given), in every worker"""
+    drop_local_barcode_cache(barcode)
+    if shared_redis:
+        try:
+            shared_redis.publish(CACHE_INVALIDATION_CHANNEL, barcode if barcode is not None else '*')
+        except redis.RedisError as e:
+            print(f"DEBUG: Cache invalidation broadcast failed: {e}")
+
+def invalidate_barcode_caches(barcodes):
+    """Invalidate many barcodes after a bulk write with a single broadcast (newline-separated)"""
+    barcodes = list(barcodes)
+    if not barcodes:
+        return
+    for barcode in barcodes:
+        barcode_doc_cache.delete(barcode)
+    product_list_cache.clear()
+    if shared_redis:
+        try:
+            shared_redis.publish(CACHE_INVALIDATION_CHANNEL, '\n'.join(barcodes))
+        except redis.RedisError as e:
+            print(f"DEBUG: Cache invalidation broadcast failed: {e}")
+
+def listen_for_cache_invalidations():
+    """Apply invalidations published by other workers; the whole cache is dropped after any disconnect"""
+    while True:
+        try:
+            pubsub = redis.Redis.from_url(app.config['REDIS_URL'], health_check_interval=30).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            # Messages published while we were not subscribed are lost
+            drop_local_barcode_cache()
+            for message in pubsub.listen():
+                payload = message['data'].decode('utf-8')
+                if payload == '*':
+                    drop_local_barcode_cache()
+                    continue
+                for barcode in payload.split('\n'):
+                    barcode_doc_cache.delete(barcode)
+                product_list_cache.clear()
+        except redis.RedisError as e:
+            print(f"DEBUG: Cache invalidation listener disconnected: {e}")
+            drop_local_barcode_cache()
+            time.sleep(1)
+
+if shared_redis:
+    threading.Thread(target=listen_for_cache_invalidations, daemon=True).start()
+
+def get_barcode_cache_docs(barcodes):
+    """Bulk version of get_barcode_cache_doc: cache misses are fetched with chunked get_all()
+
+    Returns a dict mapping each barcode to a copy of its data, or None if it doesn't exist.
+    """
+    replica = get_ready_replica('barcode_cache')
+    if replica:
+        return {barcode: replica.get(barcode) for barcode in barcodes}
+    
+    results = {}
+    missing = []
+    for barcode in barcodes:
+        data = barcode_doc_cache.get(barcode, CACHE_MISS)
+        if data is CACHE_MISS:
+            missing.append(barcode)
+        else:
+            results[barcode] = dict(data) if data is not None else None
+    
+    collection_ref = db.collection('barcode_cache')
+    for start in range(0, len(missing), FIRESTORE_BATCH_SIZE):
+        chunk = missing[start:start + FIRESTORE_BATCH_SIZE]
+        for doc in db.get_all([collection_ref.document(barcode) for barcode in chunk]):
+            data = doc.to_dict() if doc.exists else None
+            barcode_doc_cache.set(doc.id, data)
+            results[doc.id] = dict(data) if data is not None else None
+    
+    return results
+
+# Batched Firestore writes
+FIRESTORE_BATCH_SIZE = 500  # Maximum number of operations in one WriteBatch commit
+
+def batch_delete_documents(collection_names, doc_ids):
+    """Delete documents with chunked WriteBatch commits.
+
+    Each ID is deleted from every collection in collection_names, so the chunk
+    size shrinks to keep each commit within FIRESTORE_BATCH_SIZE operations.
+    Returns (deleted_ids, failed) where failed is a list of {'id', 'error'}.
+    """
+    deleted_ids = []
+    failed = []
+    
+    valid_ids = []
+    seen = set()
+    for doc_id in doc_ids:
+        if not isinstance(doc_id, str) or not doc_id.strip() or '/' in doc_id:
+            failed.append({'id': doc_id, 'error': 'Invalid document ID'})
+        elif doc_id not in seen:
+            seen.add(doc_id)
+            valid_ids.append(doc_id)
+    
+    chunk_size = max(1, FIRESTORE_BATCH_SIZE // len(collection_names))
+    for start in range(0, len(valid_ids), chunk_size):
+        chunk = valid_ids[start:start + chunk_size]
+        batch = db.batch()
+        for doc_id in chunk:
+            for collection_name in collection_names:
+                batch.delete(db.collection(collection_name).document(doc_id))
+        try:
+            batch.commit()
+            deleted_ids.extend(chunk)
+        except Exception as e:
+            print(f"Error committing delete batch for {collection_names}: {e}")
+            failed.extend({'id': doc_id, 'error': str(e)} for doc_id in chunk)
+    
+    return deleted_ids, failed
+
+def batch_write_documents(writes):
+    """Apply writes with chunked WriteBatch commits.
+
+    writes is a list of (key, operation, doc_ref, data) where operation is
+    'set', 'merge' or 'update'. Returns (written_keys, failed) where failed is
+    a list of {'id', 'error'} using the caller-supplied keys.
+    """
+    written_keys = []
+    failed = []
+    
+    for start in range(0, len(writes), FIRESTORE_BATCH_SIZE):
+        chunk = writes[start:start + FIRESTORE_BATCH_SIZE]
+        batch = db.batch()
+        for key, operation, doc_ref, data in chunk:
+            if operation == 'update':
+                batch.update(doc_ref, data)
+            else:
+                batch.set(doc_ref, data, merge=operation == 'merge')
+        try:
+            batch.commit()
+            written_keys.extend(key for key, _, _, _ in chunk)
+        except Exception as e:
+            print(f"Error committing write batch: {e}")
+            failed.extend({'id': key, 'error': str(e)} for key, _, _, _ in chunk)
+    
+    return written_keys, failed
+
+# Live replicas of Firestore collections (optional, see REPLICA_ENABLED)
+# Firestore's cross-type order: null, booleans, numbers, timestamps, strings, bytes, then everything else.
+# Checked in order with isinstance, so bool is matched before int and DatetimeWithNanoseconds as a datetime
+FIRESTORE_TYPE_RANK = ((bool, 1), ((int, float), 2), (datetime, 3), (str, 4), (bytes, 5))
+
+def firestore_sort_key(value):
+    """Approximate Firestore's cross-type ordering so mixed-type fields can be sorted"""
+    if value is None:
+        return (0, 0)
+    for types, rank in FIRESTORE_TYPE_RANK:
+        if isinstance(value, types):
+            # Timestamps compare as epoch seconds so naive and timezone-aware values can be mixed
+            return (rank, value.timestamp() if rank == 3 else value)
+    return (6, str(value))
+
+class CollectionReplica:
+    """In-memory copy of a Firestore collection kept up to date by an on_snapshot listener"""
+    
+    def __init__(self, collection_name, index_fields=()):
+        self.collection_name = collection_name
+        self.index_fields = tuple(index_fields)
+        self._docs = {}
+        self._indexes = {field: {} for field in self.index_fields}
+        self._lock = threading.RLock()
+        self._watch = None
+        self.ready = threading.Event()
+        self.change_count = 0
+        self.last_update = None
+    
+    def start(self):
+        if self._watch is None:
+            print(f"Starting replica listener for {self.collection_name}")
+            self._watch = db.collection(self.collection_name).on_snapshot(self._on_snapshot)
+    
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self.ready.clear()
+        with self._lock:
+            self._docs.clear()
+            self._indexes = {field: {} for field in self.index_fields}
+    
+    def _on_snapshot(self, col_snapshot, changes, read_time):
+        with self._lock:
+            for change in changes:
+                doc_id = change.document.id
+                self._unindex(doc_id)
+                if change.type.name == 'REMOVED':
+                    self._docs.pop(doc_id, None)
+                else:
+                    data = change.document.to_dict()
+                    self._docs[doc_id] = data
+                    self._index(doc_id, data)
+            self.change_count += len(changes)
+            self.last_update = datetime.now().isoformat()
+        if not self.ready.is_set():
+            print(f"Replica for {self.collection_name} ready with {len(self._docs)} documents")
+            self.ready.set()
+    
+    def _index(self, doc_id, data):
+        for field in self.index_fields:
+            value = data.get(field)
+            try:
+                self._indexes[field].setdefault(value, set()).add(doc_id)
+            except TypeError:
+                pass  # Unhashable values can't be indexed
+    
+    def _unindex(self, doc_id):
+        data = self._docs.get(doc_id)
+        if data is None:
+            return
+        for field in self.index_fields:
+            try:
+                self._indexes[field].get(data.get(field), set()).discard(doc_id)
+            except TypeError:
+                pass
+    
+    def get(self, doc_id):
+        with self._lock:
+            data = self._docs.get(doc_id)
+            return dict(data) if data is not None else None
+    
+    def items(self):
+        with self._lock:
+            return [(doc_id, dict(data)) for doc_id, data in self._docs.items()]
+    
+    def lookup(self, field, value):
+        """IDs of documents whose indexed field equals value"""
+        with self._lock:
+            return sorted(self._indexes[field].get(value, set()))
+    
+    def query(self, filters=None, order_by=None, descending=False, start_after=None, limit=None):
+        """Evaluate an equality-filter/order/cursor query in memory.
+
+        Returns (items, has_more). Raises KeyError if start_after is not in the result set.
+        """
+        with self._lock:
+            doc_ids = None
+            for field, value in (filters or {}).items():
+                if field in self._indexes:
+                    matched = self._indexes[field].get(value, set())
+                else:
+                    matched = {doc_id for doc_id, data in self._docs.items() if data.get(field) == value}
+                doc_ids = set(matched) if doc_ids is None else doc_ids & matched
+            if doc_ids is None:
+                doc_ids = set(self._docs)
+            
+            if order_by:
+                # Like Firestore, documents without the order_by field are excluded
+                doc_ids = [doc_id for doc_id in doc_ids if order_by in self._docs[doc_id]]
+                doc_ids.sort(key=lambda doc_id: (firestore_sort_key(self._docs[doc_id][order_by]), doc_id), reverse=descending)
+            else:
+                doc_ids = sorted(doc_ids)
+            
+            if start_after:
+                doc_ids = doc_ids[doc_ids.index(start_after) + 1:] if start_after in doc_ids else None
+                if doc_ids is None:
+                    raise KeyError(start_after)
+            
+            has_more = bool(limit) and len(doc_ids) > limit
+            if limit:
+                doc_ids = doc_ids[:limit]
+            return [(doc_id, dict(self._docs[doc_id])) for doc_id in doc_ids], has_more
+    
+    def status(self):
+        with self._lock:
+            return {
+                'collection': self.collection_name,
+                'ready': self.ready.is_set(),
+                'listening': self._watch is not None,
+                'document_count': len(self._docs),
+                'change_count': self.change_count,
+                'last_update': self.last_update
+            }
+
+collection_replicas = {
+    'barcode_cache': CollectionReplica('barcode_cache', ('category', 'brand', 'verified', 'isActive', 'syncStatus')),
+    'categories': CollectionReplica('categories'),
+    'unfound_barcodes': CollectionReplica('unfound_barcodes', ('barcode',)),
+    'recently_added_products': CollectionReplica('recently_added_products')
+}
+
+def get_ready_replica(collection_name):
+    """Return the replica for a collection if replica mode is on and it has synced, else None"""
+    replica = collection_replicas.get(collection_name)
+    if replica is not None and replica.ready.is_set():
+        return replica
+    return None
+
+def start_collection_replicas():
+    """Subscribe all replicas to their collections"""
+    if not db:
+        print("Database not available, replica mode not started")
+        return False
+    for replica in collection_replicas.values():
+        try:
+            replica.start()
+        except Exception as e:
+            print(f"Failed to start replica for {replica.collection_name}: {e}")
+    return True
+
+def stop_collection_replicas():
+    """Unsubscribe all replicas and drop their data"""
+    for replica in collection_replicas.values():
+        replica.stop()
+
+if app.config['REPLICA_ENABLED']:
+    start_collection_replicas()
+
+# Product listing options for GET /api/products
+PRODUCT_FILTER_FIELDS = {
+    'category': str,
+    'brand': str,
+    'verified': bool,
+    'isActive': bool,
+    'syncStatus': str
+}
+PRODUCT_ORDER_FIELDS = ['name', 'category', 'brand', 'mrp', 'salePrice', 'createdAt', 'updatedAt', 'sortOrder', 'scanCount']
+DEFAULT_PRODUCTS_PAGE_SIZE = 50
+MAX_PRODUCTS_PAGE_SIZE = 500
+
+# Dashboard product field -> (barcode_cache field, default)
+PRODUCT_FIELD_MAP = {
+    'name': ('name', 'Unnamed Product'),
+    'brand': ('brand', ''),
+    'category': ('category', ''),
+    'mrp': ('mrp', 0),
+    'salePrice': ('salePrice', 0),
+    'stock': ('stockQuantity', 0),
+    'isActive': ('isActive', True),
+    'useInFirstStart': ('useInFirstStart', False),
+    'imageUrl': ('photoPath', ''),  # barcode_cache uses photoPath
+    'description': ('description', ''),
+    'createdAt': ('createdAt', ''),
+    'updatedAt': ('updatedAt', ''),
+    # Additional fields from barcode_cache
+    'size': ('size', ''),
+    'unit': ('unit', ''),
+    'scanCount': ('scanCount', 0),
+    'syncStatus': ('syncStatus', ''),
+    'sortOrder': ('sortOrder', 0)
+}
+
+# Dashboard category field -> (categories field, default)
+CATEGORY_FIELD_MAP = {
+    'name': ('name', 'Unnamed Category'),
+    'description': ('description', ''),
+    'isActive': ('isActive', True),
+    'productCount': ('productCount', 0),
+    'createdAt': ('createdAt', ''),
+    'updatedAt': ('updatedAt', '')
+}
+
+def projection_for_fields(field_map, fields):
+    """Firestore field paths to select() for the requested dashboard fields (None = all)"""
+    if fields is None:
+        return None
+    # An empty select() returns every field, so id-only requests project the document name instead
+    return [field_map[field][0] for field in fields if field in field_map] or ['__name__']
+
+def map_document_fields(field_map, doc_id, data, fields=None, include_original=False):
+    """Map a document to dashboard fields, keeping only the requested ones.
+
+    originalData (the raw document) is only included when include_original is set.
+    """
+    mapped = {'id': doc_id}
+    for field, (source_field, default) in field_map.items():
+        if fields is None or field in fields:
+            mapped[field] = data.get(source_field, default)
+    if include_original:
+        data['id'] = doc_id
+        mapped['originalData'] = data
+    return mapped
+
+def map_barcode_cache_product(doc_id, product_data, fields=None, include_original=False):
+    """Map a barcode_cache document to the fields the dashboard expects"""
+    mapped_product = map_document_fields(PRODUCT_FIELD_MAP, doc_id, product_data, fields, include_original)
+    mapped_product['barcode'] = doc_id  # In barcode_cache, the document ID is the barcode
+    return mapped_product
+
 # Product Service
 class ProductService:
     @staticmethod
-    def get_products():
+    def get_products(limit=None, start_after=None, filters=None, order_by=None, descending=False,
+                     fields=None, include_original=False):
+        """Get products from barcode_cache.
+
+        Without a limit every document is returned as a list (legacy behaviour).
+        With a limit a single page is read and returned together with a
+        next_cursor (the last document ID) to pass back as start_after.
+        fields limits both the Firestore read (select()) and the mapped output.
+        """
         print(f"ProductService.get_products() called - Firebase status: {firebase_status}")
         print(f"Database object: {db}")
         
@@ -596,49 +1121,83 @@ class ProductService:
             print("Database not available, returning error")
             return {"error": "Database not available", "status": firebase_status}
         
+        replica = get_ready_replica('barcode_cache')
+        if replica:
+            try:
+                items, has_more = replica.query(filters, order_by, descending, start_after, limit)
+            except KeyError:
+                return {"error": f"Invalid cursor: {start_after}", "status": "error"}
+            products = [map_barcode_cache_product(doc_id, product_data, fields, include_original)
+                        for doc_id, product_data in items]
+            if limit:
+                return {
+                    'products': products,
+                    'count': len(products),
+                    'limit': limit,
+                    'next_cursor': items[-1][0] if has_more else None
+                }
+            return products
+        
+        cache_key = (limit, start_after, tuple(sorted((filters or {}).items())), order_by, descending,
+                     tuple(fields) if fields is not None else None, include_original)
+        cached = product_list_cache.get(cache_key)
+        if cached is not None:
+            print("Returning products from in-process cache")
+            return cached
+        
         try:
             print("Getting products from Firebase barcode_cache collection...")
             products_ref = db.collection('barcode_cache')
-            docs = products_ref.stream()
+            query = products_ref
+            
+            # Server-side filters map directly to Firestore equality queries
+            for field, value in (filters or {}).items():
+                query = query.where(field, '==', value)
+            
+            if order_by:
+                direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+                query = query.order_by(order_by, direction=direction)
+            
+            if start_after:
+                cursor_doc = products_ref.document(start_after).get()
+                if not cursor_doc.exists:
+                    return {"error": f"Invalid cursor: {start_after}", "status": "error"}
+                query = query.start_after(cursor_doc)
+            
+            projection = projection_for_fields(PRODUCT_FIELD_MAP, fields)
+            if projection is not None:
+                query = query.select(projection)
+            
+            if limit:
+                # Read one extra document to know whether another page exists
+                query = query.limit(limit + 1)
+            
+            docs = list(query.stream())
+            has_more = bool(limit) and len(docs) > limit
+            if has_more:
+                docs = docs[:limit]
             
             products = []
-            doc_count = 0
             for doc in docs:
-                doc_count += 1
                 product_data = doc.to_dict()
-                product_data['id'] = doc.id
-                
-                print(f"Processing document {doc_count}: {doc.id}")
-                
-                # Map Firebase fields to expected dashboard fields
-                mapped_product = {
-                    'id': product_data.get('id', doc.id),
-                    'name': product_data.get('name', 'Unnamed Product'),
-                    'brand': product_data.get('brand', ''),
-                    'category': product_data.get('category', ''),
-                    'barcode': doc.id,  # In barcode_cache, the document ID is the barcode
-                    'mrp': product_data.get('mrp', 0),
-                    'salePrice': product_data.get('salePrice', 0),
-                    'stock': product_data.get('stockQuantity', 0),
-                    'isActive': product_data.get('isActive', True),
-                    'useInFirstStart': product_data.get('useInFirstStart', False),
-                    'imageUrl': product_data.get('photoPath', ''),  # barcode_cache uses photoPath
-                    'description': product_data.get('description', ''),
-                    'createdAt': product_data.get('createdAt', ''),
-                    'updatedAt': product_data.get('updatedAt', ''),
-                    # Additional fields from barcode_cache
-                    'size': product_data.get('size', ''),
-                    'unit': product_data.get('unit', ''),
-                    'scanCount': product_data.get('scanCount', 0),
-                    'syncStatus': product_data.get('syncStatus', ''),
-                    'sortOrder': product_data.get('sortOrder', 0),
-                    # Keep original fields for reference
-                    'originalData': product_data
-                }
-                products.append(mapped_product)
+                if projection is None:
+                    # Only complete documents can be reused for barcode lookups
+                    barcode_doc_cache.set(doc.id, dict(product_data))
+                products.append(map_barcode_cache_product(doc.id, product_data, fields, include_original))
             
             print(f"Retrieved {len(products)} products from Firebase barcode_cache collection")
-            if len(products) == 0:
+            
+            if limit:
+                page = {
+                    'products': products,
+                    'count': len(products),
+                    'limit': limit,
+                    'next_cursor': docs[-1].id if has_more else None
+                }
+                product_list_cache.set(cache_key, page)
+                return page
+            
+            if len(products) == 0 and not filters:
                 print("No products found in barcode_cache collection")
                 # Try to check if the collection exists by attempting to get collection info
                 try:
@@ -647,6 +1206,7 @@ class ProductService:
                 except Exception as e:
                     print(f"Error getting collections: {e}")
             
+            product_list_cache.set(cache_key, products)
             return products
         except Exception as e:
             print(f"Error getting products: {e}")
@@ -684,6 +1244,7 @@ class ProductService:
             # Use barcode as document ID if available, otherwise generate random ID
             if 'barcode' in product_data and product_data['barcode']:
                 doc_ref = db.collection('products').document(product_data['barcode']).set(product_data)
+                invalidate_barcode_cache(product_data['barcode'])
                 return {"id": product_data['barcode'], "message": "Product created successfully"}
             else:
                 doc_ref = db.collection('products').add(product_data)
@@ -701,6 +1262,7 @@ class ProductService:
             
             doc_ref = db.collection('products').document(product_id)
             doc_ref.update(product_data)
+            invalidate_barcode_cache(product_id)
             return {"message": "Product updated successfully"}
         except Exception as e:
             return {"error": str(e)}
@@ -713,6 +1275,7 @@ class ProductService:
         try:
             # Delete from barcode_cache collection (where main app reads from)
             db.collection('barcode_cache').document(product_id).delete()
+            invalidate_barcode_cache(product_id)
             
             # Also try to delete from products collection if it exists there
             try:
@@ -727,33 +1290,26 @@ class ProductService:
 # Category Service
 class CategoryService:
     @staticmethod
-    def get_categories():
+    def get_categories(fields=None, include_original=False):
         if not db:
             return {"error": "Database not available", "status": firebase_status}
         
         try:
             print("Getting categories from Firebase...")
-            categories_ref = db.collection('categories')
-            docs = categories_ref.stream()
+            replica = get_ready_replica('categories')
+            if replica:
+                docs = replica.items()
+            else:
+                categories_ref = db.collection('categories')
+                projection = projection_for_fields(CATEGORY_FIELD_MAP, fields)
+                if projection is not None:
+                    categories_ref = categories_ref.select(projection)
+                docs = ((doc.id, doc.to_dict()) for doc in categories_ref.stream())
             
             categories = []
-            for doc in docs:
-                category_data = doc.to_dict()
-                category_data['id'] = doc.id
-                
+            for doc_id, category_data in docs:
                 # Map Firebase fields to expected dashboard fields
-                mapped_category = {
-                    'id': category_data.get('id', doc.id),
-                    'name': category_data.get('name', 'Unnamed Category'),
-                    'description': category_data.get('description', ''),
-                    'isActive': category_data.get('isActive', True),
-                    'productCount': category_data.get('productCount', 0),
-                    'createdAt': category_data.get('createdAt', ''),
-                    'updatedAt': category_data.get('updatedAt', ''),
-                    # Keep original fields for reference
-                    'originalData': category_data
-                }
-                categories.append(mapped_category)
+                categories.append(map_document_fields(CATEGORY_FIELD_MAP, doc_id, category_data, fields, include_original))
             
             print(f"Retrieved {len(categories)} categories from Firebase")
             return categories
@@ -800,13 +1356,188 @@ class CategoryService:
         except Exception as e:
             return {"error": str(e)}
 
+def classify_unfound_source(barcode_data):
+    """Determine the display source ('Excel Import', 'Firebase DB', ...) of an unfound barcode"""
+    source = barcode_data.get('source', 'Unknown')
+    if source == 'Unknown':
+        # Check if it has Excel-specific fields
+        if 'deviceId' in barcode_data and barcode_data.get('deviceId') != 'Unknown':
+            source = 'Firebase DB'
+        elif 'location' in barcode_data and barcode_data.get('location') != 'Unknown':
+            source = 'Firebase DB'
+        else:
+            source = 'Excel Import'
+    elif source == 'excel':
+        source = 'Excel Import'
+    elif source == 'firebase_db' or source == 'firebase':
+        source = 'Firebase DB'
+    return source
+
+# Stats Service
+class StatsService:
+    @staticmethod
+    def count(query):
+        """Run a server-side count() aggregation and return the result"""
+        return query.count().get()[0][0].value
+    
+    @staticmethod
+    def count_many(queries):
+        """Run several count() aggregations concurrently, keyed like the input dict"""
+        with ThreadPoolExecutor(max_workers=min(8, len(queries))) as executor:
+            futures = {name: executor.submit(StatsService.count, query) for name, query in queries.items()}
+            return {name: future.result() for name, future in futures.items()}
+    
+    @staticmethod
+    def get_unfound_source_counts():
+        """Count unfound barcodes by source without reading every document.
+
+        Barcodes explicitly labelled 'Unknown' are few and are classified from
+        their fields. A null source is counted as 'unknown' (not-in never
+        matches null). Legacy barcodes with no source field at all cannot be
+        queried and are counted as Excel imports, the classifier's default.
+        """
+        unfound_ref = db.collection('unfound_barcodes')
+        counts = StatsService.count_many({
+            'total': unfound_ref,
+            'excel': unfound_ref.where('source', '==', 'excel'),
+            'firebase_db': unfound_ref.where('source', 'in', ['firebase_db', 'firebase']),
+            'other': unfound_ref.where('source', 'not-in', ['excel', 'firebase_db', 'firebase', 'Unknown']),
+            'unknown': unfound_ref.where('source', '==', None)
+        })
+        
+        classified = counts['excel'] + counts['firebase_db'] + counts['other'] + counts['unknown']
+        for doc in unfound_ref.where('source', '==', 'Unknown').select(['deviceId', 'location']).stream():
+            barcode_data = doc.to_dict()
+            key = 'excel' if classify_unfound_source(barcode_data) == 'Excel Import' else 'firebase_db'
+            counts[key] += 1
+            classified += 1
+        
+        counts['excel'] += max(0, counts['total'] - classified)
+        return counts
+    
+    @staticmethod
+    def get_dashboard_stats():
+        """Totals for the dashboard, computed with count() aggregations"""
+        products_ref = db.collection('barcode_cache')
+        low_stock_threshold = app.config['LOW_STOCK_THRESHOLD']
+        queries = {
+            'products_total': products_ref,
+            'products_verified': products_ref.where('verified', '==', True),
+            'products_unverified': products_ref.where('verified', '==', False),
+            'products_low_stock': products_ref.where('stockQuantity', '<=', low_stock_threshold),
+            'categories_total': db.collection('categories'),
+            'recently_added_total': db.collection('recently_added_products')
+        }
+        
+        category_names = set()
+        for doc in db.collection('categories').select(['name']).stream():
+            name = doc.to_dict().get('name')
+            if name:
+                category_names.add(name)
+        for name in category_names:
+            queries[('category', name)] = products_ref.where('category', '==', name)
+        
+        counts = StatsService.count_many(queries)
+        unfound_counts = StatsService.get_unfound_source_counts()
+        
+        return {
+            'products': {
+                'total': counts['products_total'],
+                'verified': counts['products_verified'],
+                'unverified': counts['products_unverified'],
+                'lowStock': counts['products_low_stock'],
+                'lowStockThreshold': low_stock_threshold,
+                'byCategory': {name: counts[('category', name)] for name in sorted(category_names)}
+            },
+            'categories': {
+                'total': counts['categories_total']
+            },
+            'unfoundBarcodes': {
+                'total': unfound_counts['total'],
+                'bySource': {
+                    'excel': unfound_counts['excel'],
+                    'firebase_db': unfound_counts['firebase_db'],
+                    'other': unfound_counts['other'],
+                    'unknown': unfound_counts['unknown']
+                }
+            },
+            'recentlyAdded': {
+                'total': counts['recently_added_total']
+            },
+            'generatedAt': datetime.now().isoformat()
+        }
+
 # Routes are now defined in the register_routes function
 
 # Product Routes
+def parse_fields_arg(value, field_map):
+    """Parse a comma-separated fields= query string value against a field map"""
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in field_map and field not in ('id', 'barcode')]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def parse_bool_arg(value):
+    """Parse a boolean query string value ('true'/'false', '1'/'0', 'yes'/'no')"""
+    value = str(value).strip().lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"Invalid boolean value: {value}")
+
 @app.route('/api/products', methods=['GET'])
 @login_required
 def get_products():
-    products = ProductService.get_products()
+    """List products, optionally filtered, ordered and cursor-paginated.
+
+    Query parameters: limit, start_after, category, brand, verified, isActive,
+    syncStatus, order_by, direction (asc/desc), fields and include_original.
+    """
+    args = request.args
+    
+    limit = None
+    if 'limit' in args or 'start_after' in args:
+        try:
+            limit = int(args.get('limit', DEFAULT_PRODUCTS_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        if limit < 1 or limit > MAX_PRODUCTS_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {MAX_PRODUCTS_PAGE_SIZE}'}), 400
+    
+    filters = {}
+    for field, field_type in PRODUCT_FILTER_FIELDS.items():
+        if field not in args:
+            continue
+        try:
+            filters[field] = parse_bool_arg(args[field]) if field_type is bool else args[field]
+        except ValueError as e:
+            return jsonify({'error': f'{field}: {str(e)}'}), 400
+    
+    order_by = args.get('order_by')
+    if order_by and order_by not in PRODUCT_ORDER_FIELDS:
+        return jsonify({'error': f'order_by must be one of: {", ".join(PRODUCT_ORDER_FIELDS)}'}), 400
+    
+    direction = args.get('direction', 'asc').lower()
+    if direction not in ('asc', 'desc'):
+        return jsonify({'error': 'direction must be "asc" or "desc"'}), 400
+    
+    try:
+        fields = parse_fields_arg(args['fields'], PRODUCT_FIELD_MAP) if 'fields' in args else None
+        include_original = parse_bool_arg(args.get('include_original', 'false'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    products = ProductService.get_products(
+        limit=limit,
+        start_after=args.get('start_after'),
+        filters=filters,
+        order_by=order_by,
+        descending=direction == 'desc',
+        fields=fields,
+        include_original=include_original
+    )
     return jsonify(products)
 
 @app.route('/api/products/<product_id>', methods=['GET'])
@@ -839,27 +1570,16 @@ def bulk_delete_products():
         
         if db:
             # Delete products from Firebase (both barcode_cache and products collections)
-            deleted_count = 0
-            for product_id in product_ids:
-                try:
-                    # Delete from barcode_cache collection (where main app reads from)
-                    db.collection('barcode_cache').document(product_id).delete()
-                    
-                    # Also try to delete from products collection if it exists there
-                    try:
-                        db.collection('products').document(product_id).delete()
-                    except:
-                        pass  # Ignore if not found in products collection
-                    
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"Error deleting product {product_id}: {e}")
-                    continue
+            deleted_ids, failed = batch_delete_documents(['barcode_cache', 'products'], product_ids)
+            invalidate_barcode_caches(deleted_ids)
+            deleted_count = len(deleted_ids)
         
             return jsonify({
                 'message': f'Successfully deleted {deleted_count} out of {len(product_ids)} products',
                 'deleted_count': deleted_count,
-                'total_requested': len(product_ids)
+                'total_requested': len(product_ids),
+                'deleted_ids': deleted_ids,
+                'failed': failed
             })
         else:
             return jsonify({'error': 'Database not available'}), 500
@@ -879,19 +1599,15 @@ def bulk_delete_categories():
         
         if db:
             # Delete categories from Firebase
-            deleted_count = 0
-            for category_id in category_ids:
-                try:
-                    db.collection('categories').document(category_id).delete()
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"Error deleting category {category_id}: {e}")
-                    continue
+            deleted_ids, failed = batch_delete_documents(['categories'], category_ids)
+            deleted_count = len(deleted_ids)
         
             return jsonify({
                 'message': f'Successfully deleted {deleted_count} out of {len(category_ids)} categories',
                 'deleted_count': deleted_count,
-                'total_requested': len(category_ids)
+                'total_requested': len(category_ids),
+                'deleted_ids': deleted_ids,
+                'failed': failed
             })
         else:
             return jsonify({'error': 'Database not available'}), 500
@@ -899,105 +1615,229 @@ def bulk_delete_categories():
         return jsonify({'error': str(e)}), 500
 
 # Excel Export Endpoints
-@app.route('/api/products/export', methods=['GET'])
-def export_products():
-    try:
-        if db:
-            # Get products from Firebase
-            products_ref = db.collection('products')
-            products = []
-            for doc in products_ref.stream():
-                product_data = doc.to_dict()
-                product_data['id'] = doc.id
-                products.append(product_data)
-        else:
-            # Use mock data if Firebase not available
-            products = MOCK_PRODUCTS
-        
-        # Create Excel file in memory using openpyxl
-        output = BytesIO()
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Products"
-        
-        # Define column order
-        column_order = ['id', 'name', 'category', 'mrp', 'price', 'useInFirstStart', 'imageUrl', 'stockQuantity']
-        
-        # Add headers
-        for col, header in enumerate(column_order, 1):
-            ws.cell(row=1, column=col, value=header)
-        
-        # Add data
-        for row, product in enumerate(products, 2):
-            for col, header in enumerate(column_order, 1):
-                ws.cell(row=row, column=col, value=product.get(header, ''))
-        
-        wb.save(output)
-        output.seek(0)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"products_export_{timestamp}.xlsx"
-        
+PRODUCT_EXPORT_COLUMNS = ['id', 'name', 'category', 'mrp', 'price', 'useInFirstStart', 'imageUrl', 'stockQuantity']
+CATEGORY_EXPORT_COLUMNS = ['id', 'name', 'description', 'isActive']
+UNFOUND_BARCODE_EXPORT_COLUMNS = ['id', 'barcode', 'timestamp', 'deviceId', 'location']
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+def iter_collection_documents(collection_name, page_size=FIRESTORE_BATCH_SIZE, field_paths=None):
+    """Yield (doc_id, data) for a whole collection, reading it page by page in document ID order"""
+    collection_ref = db.collection(collection_name)
+    last_doc = None
+    while True:
+        query = collection_ref.order_by('__name__').limit(page_size)
+        if field_paths is not None:
+            query = query.select(field_paths)
+        if last_doc is not None:
+            query = query.start_after(last_doc)
+        docs = list(query.stream())
+        for doc in docs:
+            yield doc.id, doc.to_dict()
+        if len(docs) < page_size:
+            break
+        last_doc = docs[-1]
+
+def iter_export_rows(collection_name, column_order, mock_rows):
+    """Yield export rows (dicts with 'id') from Firebase, or from mock data if Firebase is not available"""
+    if not db:
+        for row in mock_rows:
+            yield row
+        return
+    # Only the exported fields are read from Firestore
+    field_paths = [column for column in column_order if column != 'id']
+    for doc_id, data in iter_collection_documents(collection_name, field_paths=field_paths):
+        data['id'] = doc_id
+        yield data
+
+def export_cell_value(value):
+    """Convert a Firestore value into something spreadsheet/CSV writers accept"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.isoformat()
+    return value
+
+def build_excel_export(rows, column_order, sheet_title):
+    """Write rows into a write-only workbook and return it as a temporary file.
+
+    Write-only worksheets flush rows to disk as they are appended, so memory
+    doesn't grow with the number of rows.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    ws.append(column_order)
+    for row in rows:
+        ws.append([export_cell_value(row.get(header, '')) for header in column_order])
+    
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+EXPORT_FORMATS = ('xlsx', 'csv', 'ndjson')
+
+class EchoBuffer:
+    """File-like object whose write() returns the data, so csv.writer rows can be yielded"""
+    def write(self, value):
+        return value
+
+def stream_csv_export(rows, column_order):
+    """Yield a CSV export line by line"""
+    writer = csv.writer(EchoBuffer())
+    yield writer.writerow(column_order)
+    for row in rows:
+        yield writer.writerow([export_cell_value(row.get(header, '')) for header in column_order])
+
+def stream_ndjson_export(rows, column_order):
+    """Yield an NDJSON export, one JSON object per line"""
+    for row in rows:
+        yield json.dumps({header: row.get(header, '') for header in column_order}, default=str) + '\n'
+
+def export_response(rows, column_order, sheet_title, filename_prefix, export_format):
+    """Build the export response in the requested format (xlsx, csv or ndjson).
+
+    CSV and NDJSON are generated lazily while the Firestore pages are read and
+    sent as a chunked response, so the first rows reach the client immediately.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{filename_prefix}_{timestamp}.{export_format}"
+    
+    if export_format == 'xlsx':
+        output = build_excel_export(rows, column_order, sheet_title)
         return send_file(
             output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            mimetype=XLSX_MIMETYPE,
             as_attachment=True,
             download_name=filename
         )
+    
+    # Read the first row up front so connection/permission errors still return a JSON error
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is not None:
+        rows = itertools.chain([first_row], rows)
+    
+    if export_format == 'csv':
+        body, mimetype = stream_csv_export(rows, column_order), 'text/csv'
+    else:
+        body, mimetype = stream_ndjson_export(rows, column_order), 'application/x-ndjson'
+    
+    return Response(
+        body,
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+def get_export_format():
+    export_format = request.args.get('format', 'xlsx').lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'format must be one of: {", ".join(EXPORT_FORMATS)}')
+    return export_format
+
+@app.route('/api/products/export', methods=['GET'])
+def export_products():
+    try:
+        try:
+            export_format = get_export_format()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        rows = iter_export_rows('products', PRODUCT_EXPORT_COLUMNS, MOCK_PRODUCTS)
+        return export_response(rows, PRODUCT_EXPORT_COLUMNS, "Products", "products_export", export_format)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/categories/export', methods=['GET'])
 def export_categories():
     try:
-        if db:
-            # Get categories from Firebase
-            categories_ref = db.collection('categories')
-            categories = []
-            for doc in categories_ref.stream():
-                category_data = doc.to_dict()
-                category_data['id'] = doc.id
-                categories.append(category_data)
-        else:
-            # Use mock data if Firebase not available
-            categories = MOCK_CATEGORIES
-        
-        # Create Excel file in memory using openpyxl
-        output = BytesIO()
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Categories"
-        
-        # Define column order
-        column_order = ['id', 'name', 'description', 'isActive']
-        
-        # Add headers
-        for col, header in enumerate(column_order, 1):
-            ws.cell(row=1, column=col, value=header)
-        
-        # Add data
-        for row, category in enumerate(categories, 2):
-            for col, header in enumerate(column_order, 1):
-                ws.cell(row=row, column=col, value=category.get(header, ''))
-        
-        wb.save(output)
-        output.seek(0)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"categories_export_{timestamp}.xlsx"
+        try:
+            export_format = get_export_format()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
+        rows = iter_export_rows('categories', CATEGORY_EXPORT_COLUMNS, MOCK_CATEGORIES)
+        return export_response(rows, CATEGORY_EXPORT_COLUMNS, "Categories", "categories_export", export_format)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # Excel Import Endpoints
+def is_not_empty(value):
+    """Check if a cell value is not None/empty"""
+    return value is not None and str(value).strip() != ''
+
+def read_excel_rows(file, header_transform=None):
+    """Stream data rows from the active sheet of an uploaded workbook.
+
+    The workbook is opened read-only and rows are read with
+    iter_rows(values_only=True), so memory stays flat regardless of sheet
+    size. Returns (headers, rows, close) where rows yields (row_num, row_dict)
+    with the cell values as typed by openpyxl and close releases the file.
+    Fully empty rows are skipped.
+    """
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        values = wb.active.iter_rows(values_only=True)
+        header_row = next(values, None) or ()
+    except Exception:
+        wb.close()
+        raise
+    headers = [header_transform(header) if header_transform else header for header in header_row]
+    
+    def rows():
+        for row_num, row_values in enumerate(values, 2):
+            if not any(is_not_empty(value) for value in row_values):
+                continue
+            yield row_num, dict(zip(headers, row_values))
+    
+    return headers, rows(), wb.close
+
+IMPORT_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+
+def read_csv_rows(file, header_transform=None):
+    """Stream data rows from an uploaded CSV file.
+
+    Same contract as read_excel_rows: returns (headers, rows, close) where
+    rows yields (row_num, row_dict). Values are stripped strings and blank cells
+    become None; numeric and boolean columns are coerced by the importers, so
+    barcodes keep their leading zeros.
+    """
+    text = TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    
+    header_row = next(reader, None) or []
+    headers = [header_transform(header) if header_transform else header.strip() for header in header_row]
+    
+    def rows():
+        for row_num, row_values in enumerate(reader, 2):
+            values = [value.strip() or None for value in row_values]
+            if not any(values):
+                continue
+            yield row_num, dict(zip(headers, values))
+    
+    return headers, rows(), text.detach
+
+@contextmanager
+def open_import_rows(file, header_transform=None):
+    """Stream (headers, rows) from an uploaded .csv or Excel file for the duration of a with block.
+
+    The file is released on exit even when rows was never iterated, e.g.
+    after failed header validation.
+    """
+    reader = read_csv_rows if file.filename.lower().endswith('.csv') else read_excel_rows
+    headers, rows, close = reader(file, header_transform)
+    try:
+        yield headers, rows
+    finally:
+        close()
+
+def parse_bool_value(value, default=False):
+    """Coerce an imported cell (bool, number or text such as 'true'/'no') to a bool"""
+    if not is_not_empty(value):
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes', 'y')
+    return bool(value)
+
 @app.route('/api/products/import', methods=['POST'])
 def import_products():
     try:
@@ -1008,63 +1848,63 @@ def import_products():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            return jsonify({'error': 'File must be an Excel file (.xlsx or .xls)'}), 400
+        if not file.filename.lower().endswith(IMPORT_EXTENSIONS):
+            return jsonify({'error': 'File must be an Excel (.xlsx or .xls) or CSV (.csv) file'}), 400
         
-        # Read Excel file using openpyxl
-        wb = load_workbook(file)
-        ws = wb.active
-        
-        # Get headers from first row
-        headers = [cell.value for cell in ws[1]]
-        
-        # Validate required columns
-        required_columns = ['name', 'category', 'mrp', 'price']
-        missing_columns = [col for col in required_columns if col not in headers]
-        if missing_columns:
-            return jsonify({'error': f'Missing required columns: {", ".join(missing_columns)}'}), 400
-        
-        # Process and import products
-        imported_count = 0
-        errors = []
-        
-        for row_num in range(2, ws.max_row + 1):
-            try:
-                row_data = {}
-                for col_num, header in enumerate(headers, 1):
-                    cell_value = ws.cell(row=row_num, column=col_num).value
-                    row_data[header] = cell_value
-                
-                # Helper function to check if value is not None/empty
-                def is_not_empty(value):
-                    return value is not None and str(value).strip() != ''
-                
-                product_data = {
-                    'name': str(row_data['name']),
-                    'category': str(row_data['category']),
-                    'mrp': float(row_data['mrp']) if is_not_empty(row_data['mrp']) else 0.0,
-                    'price': float(row_data['price']) if is_not_empty(row_data['price']) else 0.0,
-                    'useInFirstStart': bool(row_data.get('useInFirstStart', False)) if is_not_empty(row_data.get('useInFirstStart')) else False,
-                    'imageUrl': str(row_data.get('imageUrl', '')) if is_not_empty(row_data.get('imageUrl')) else '',
-                    'stockQuantity': int(row_data.get('stockQuantity', 0)) if is_not_empty(row_data.get('stockQuantity')) else 0
-                }
-                
-                if db:
-                    # Add to Firebase
-                    db.collection('products').add(product_data)
-                else:
-                    # Add to mock data (for testing)
-                    product_data['id'] = f"mock_{len(MOCK_PRODUCTS) + 1}"
-                    MOCK_PRODUCTS.append(product_data)
+        # Stream rows from the CSV or read-only Excel file
+        with open_import_rows(file) as (headers, rows):
             
-                imported_count += 1
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
+            # Validate required columns
+            required_columns = ['name', 'category', 'mrp', 'price']
+            missing_columns = [col for col in required_columns if col not in headers]
+            if missing_columns:
+                return jsonify({'error': f'Missing required columns: {", ".join(missing_columns)}'}), 400
+            
+            # Process and import products
+            imported_count = 0
+            total_rows = 0
+            errors = []
+            writes = []
+            
+            def flush_writes():
+                written_rows, failed = batch_write_documents(writes)
+                errors.extend(f"Row {failure['id']}: {failure['error']}" for failure in failed)
+                writes.clear()
+                return len(written_rows)
+            
+            for row_num, row_data in rows:
+                total_rows += 1
+                try:
+                    product_data = {
+                        'name': str(row_data['name']),
+                        'category': str(row_data['category']),
+                        'mrp': float(row_data['mrp']) if is_not_empty(row_data['mrp']) else 0.0,
+                        'price': float(row_data['price']) if is_not_empty(row_data['price']) else 0.0,
+                        'useInFirstStart': parse_bool_value(row_data.get('useInFirstStart'), False),
+                        'imageUrl': str(row_data.get('imageUrl', '')) if is_not_empty(row_data.get('imageUrl')) else '',
+                        'stockQuantity': int(float(row_data['stockQuantity'])) if is_not_empty(row_data.get('stockQuantity')) else 0
+                    }
+                    
+                    if db:
+                        # Queue for a batched Firebase write
+                        writes.append((row_num, 'set', db.collection('products').document(), product_data))
+                        if len(writes) >= FIRESTORE_BATCH_SIZE:
+                            imported_count += flush_writes()
+                    else:
+                        # Add to mock data (for testing)
+                        product_data['id'] = f"mock_{len(MOCK_PRODUCTS) + 1}"
+                        MOCK_PRODUCTS.append(product_data)
+                        imported_count += 1
+                except Exception as e:
+                    errors.append(f"Row {row_num}: {str(e)}")
+            
+            if writes:
+                imported_count += flush_writes()
         
         response = {
             'message': f'Successfully imported {imported_count} products',
             'imported_count': imported_count,
-            'total_rows': ws.max_row - 1
+            'total_rows': total_rows
         }
         
         if errors:
@@ -1086,59 +1926,59 @@ def import_categories():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            return jsonify({'error': 'File must be an Excel file (.xlsx or .xls)'}), 400
-        
-        # Read Excel file using openpyxl
-        wb = load_workbook(file)
-        ws = wb.active
-        
-        # Get headers from first row
-        headers = [cell.value for cell in ws[1]]
-        
-        # Validate required columns
-        required_columns = ['name']
-        missing_columns = [col for col in required_columns if col not in headers]
-        if missing_columns:
-            return jsonify({'error': f'Missing required columns: {", ".join(missing_columns)}'}), 400
-        
-        # Process and import categories
-        imported_count = 0
-        errors = []
+        if not file.filename.lower().endswith(IMPORT_EXTENSIONS):
+            return jsonify({'error': 'File must be an Excel (.xlsx or .xls) or CSV (.csv) file'}), 400
         
-        for row_num in range(2, ws.max_row + 1):
-            try:
-                row_data = {}
-                for col_num, header in enumerate(headers, 1):
-                    cell_value = ws.cell(row=row_num, column=col_num).value
-                    row_data[header] = cell_value
-                
-                # Helper function to check if value is not None/empty
-                def is_not_empty(value):
-                    return value is not None and str(value).strip() != ''
-                
-                category_data = {
-                    'name': str(row_data['name']),
-                    'description': str(row_data.get('description', '')) if is_not_empty(row_data.get('description')) else '',
-                    'isActive': bool(row_data.get('isActive', True)) if is_not_empty(row_data.get('isActive')) else True
-                }
-                
-                if db:
-                    # Add to Firebase
-                    db.collection('categories').add(category_data)
-                else:
-                    # Add to mock data (for testing)
-                    category_data['id'] = f"mock_cat_{len(MOCK_CATEGORIES) + 1}"
-                    MOCK_CATEGORIES.append(category_data)
-                
-                imported_count += 1
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
+        # Stream rows from the CSV or read-only Excel file
+        with open_import_rows(file) as (headers, rows):
+            
+            # Validate required columns
+            required_columns = ['name']
+            missing_columns = [col for col in required_columns if col not in headers]
+            if missing_columns:
+                return jsonify({'error': f'Missing required columns: {", ".join(missing_columns)}'}), 400
+            
+            # Process and import categories
+            imported_count = 0
+            total_rows = 0
+            errors = []
+            writes = []
+            
+            def flush_writes():
+                written_rows, failed = batch_write_documents(writes)
+                errors.extend(f"Row {failure['id']}: {failure['error']}" for failure in failed)
+                writes.clear()
+                return len(written_rows)
+            
+            for row_num, row_data in rows:
+                total_rows += 1
+                try:
+                    category_data = {
+                        'name': str(row_data['name']),
+                        'description': str(row_data.get('description', '')) if is_not_empty(row_data.get('description')) else '',
+                        'isActive': parse_bool_value(row_data.get('isActive'), True)
+                    }
+                    
+                    if db:
+                        # Queue for a batched Firebase write
+                        writes.append((row_num, 'set', db.collection('categories').document(), category_data))
+                        if len(writes) >= FIRESTORE_BATCH_SIZE:
+                            imported_count += flush_writes()
+                    else:
+                        # Add to mock data (for testing)
+                        category_data['id'] = f"mock_cat_{len(MOCK_CATEGORIES) + 1}"
+                        MOCK_CATEGORIES.append(category_data)
+                        imported_count += 1
+                except Exception as e:
+                    errors.append(f"Row {row_num}: {str(e)}")
+            
+            if writes:
+                imported_count += flush_writes()
         
         response = {
             'message': f'Successfully imported {imported_count} categories',
             'imported_count': imported_count,
-            'total_rows': ws.max_row - 1
+            'total_rows': total_rows
         }
         
         if errors:
@@ -1155,30 +1995,18 @@ def import_categories():
 def get_unfound_barcodes():
     try:
         if db:
-            # Get unfound barcodes from Firebase
-            unfound_barcodes_ref = db.collection('unfound_barcodes')
+            # Get unfound barcodes from the live replica or Firebase
+            replica = get_ready_replica('unfound_barcodes')
+            if replica:
+                docs = replica.items()
+            else:
+                unfound_barcodes_ref = db.collection('unfound_barcodes')
+                docs = ((doc.id, doc.to_dict()) for doc in unfound_barcodes_ref.stream())
             unfound_barcodes = []
             
-            for doc in unfound_barcodes_ref.stream():
-                barcode_data = doc.to_dict()
-                barcode_data['id'] = doc.id
-                
-                # Determine source based on available fields
-                source = barcode_data.get('source', 'Unknown')
-                if source == 'Unknown':
-                    # Check if it has Excel-specific fields
-                    if 'deviceId' in barcode_data and barcode_data.get('deviceId') != 'Unknown':
-                        source = 'Firebase DB'
-                    elif 'location' in barcode_data and barcode_data.get('location') != 'Unknown':
-                        source = 'Firebase DB'
-                    else:
-                        source = 'Excel Import'
-                elif source == 'excel':
-                    source = 'Excel Import'
-                elif source == 'firebase_db' or source == 'firebase':
-                    source = 'Firebase DB'
-                
-                barcode_data['source'] = source
+            for doc_id, barcode_data in docs:
+                barcode_data['id'] = doc_id
+                barcode_data['source'] = classify_unfound_source(barcode_data)
                 unfound_barcodes.append(barcode_data)
             
             # Sort by source and then by creation date
@@ -1214,59 +2042,58 @@ def get_unfound_barcodes():
 
 @app.route('/api/unfound-barcodes/sources', methods=['GET'])
 def get_unfound_barcodes_sources():
-    """Get unfound barcodes grouped by source with counts"""
+    """Get unfound barcode counts by source (include_barcodes=true also lists them)"""
     try:
         if db:
-            # Get unfound barcodes from Firebase
-            unfound_barcodes_ref = db.collection('unfound_barcodes')
-            unfound_barcodes = []
-            
-            for doc in unfound_barcodes_ref.stream():
-                barcode_data = doc.to_dict()
-                barcode_data['id'] = doc.id
-                
-                # Determine source based on available fields
-                source = barcode_data.get('source', 'Unknown')
-                if source == 'Unknown':
-                    # Check if it has Excel-specific fields
-                    if 'deviceId' in barcode_data and barcode_data.get('deviceId') != 'Unknown':
-                        source = 'Firebase DB'
-                    elif 'location' in barcode_data and barcode_data.get('location') != 'Unknown':
-                        source = 'Firebase DB'
-                    else:
-                        source = 'Excel Import'
-                elif source == 'excel':
-                    source = 'Excel Import'
-                elif source == 'firebase_db' or source == 'firebase':
-                    source = 'Firebase DB'
-                
-                barcode_data['source'] = source
-                unfound_barcodes.append(barcode_data)
-            
-            # Group by source
-            excel_barcodes = [b for b in unfound_barcodes if b['source'] == 'Excel Import']
-            firebase_barcodes = [b for b in unfound_barcodes if b['source'] == 'Firebase DB']
+            groups = None
+            if parse_bool_arg(request.args.get('include_barcodes', 'false')):
+                # The documents are read anyway, so count the lists instead of running the aggregations too
+                groups = {'excel': [], 'firebase_db': [], 'unknown': []}
+                total = 0
+                for doc in db.collection('unfound_barcodes').stream():
+                    barcode_data = doc.to_dict()
+                    barcode_data['id'] = doc.id
+                    barcode_data['source'] = classify_unfound_source(barcode_data)
+                    total += 1
+                    if barcode_data['source'] == 'Excel Import':
+                        groups['excel'].append(barcode_data)
+                    elif barcode_data['source'] == 'Firebase DB':
+                        groups['firebase_db'].append(barcode_data)
+                    elif barcode_data['source'] is None:
+                        groups['unknown'].append(barcode_data)
+                counts = {key: len(barcodes) for key, barcodes in groups.items()}
+                counts['total'] = total
+            else:
+                counts = StatsService.get_unfound_source_counts()
             
-            return jsonify({
+            response = {
                 'sources': {
                     'excel': {
                         'name': 'Excel Import',
-                        'count': len(excel_barcodes),
-                        'barcodes': excel_barcodes
+                        'count': counts['excel']
                     },
                     'firebase_db': {
                         'name': 'Firebase DB',
-                        'count': len(firebase_barcodes),
-                        'barcodes': firebase_barcodes
+                        'count': counts['firebase_db']
+                    },
+                    'unknown': {
+                        'name': 'Unknown',
+                        'count': counts['unknown']
                     }
                 },
-                'total_count': len(unfound_barcodes),
+                'total_count': counts['total'],
                 'summary': {
-                    'excel_count': len(excel_barcodes),
-                    'firebase_db_count': len(firebase_barcodes),
-                    'total': len(unfound_barcodes)
+                    'excel_count': counts['excel'],
+                    'firebase_db_count': counts['firebase_db'],
+                    'unknown_count': counts['unknown'],
+                    'total': counts['total']
                 }
-            })
+            }
+            if groups is not None:
+                for key, barcodes in groups.items():
+                    response['sources'][key]['barcodes'] = barcodes
+            
+            return jsonify(response)
         else:
             return jsonify({'error': 'Database not available'}), 500
     except Exception as e:
@@ -1283,6 +2110,15 @@ def create_unfound_barcode():
         if 'barcode' not in data:
             return jsonify({'error': 'Barcode is required'}), 400
         
+        # Known-missing barcodes are not queued for scraping again until their TTL expires
+        negative_entry = get_negative_cache_entries([data['barcode']]).get(data['barcode'])
+        if negative_entry:
+            return jsonify({
+                'message': f"Barcode {data['barcode']} was recently confirmed missing; it will be checked again after {negative_entry['retryAfter']}",
+                'skipped': True,
+                'negative_cache': negative_entry
+            }), 200
+        
         barcode_data = {
             'barcode': data['barcode'],
             'source': data.get('source', 'firebase_db'),  # Default to 'firebase_db' for manual additions
@@ -1339,19 +2175,15 @@ def bulk_delete_unfound_barcodes():
         
         if db:
             # Delete from Firebase
-            deleted_count = 0
-            for barcode_id in barcode_ids:
-                try:
-                    db.collection('unfound_barcodes').document(barcode_id).delete()
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"Error deleting unfound barcode {barcode_id}: {e}")
-                    continue
+            deleted_ids, failed = batch_delete_documents(['unfound_barcodes'], barcode_ids)
+            deleted_count = len(deleted_ids)
         
             return jsonify({
                 'message': f'Successfully deleted {deleted_count} out of {len(barcode_ids)} unfound barcodes',
                 'deleted_count': deleted_count,
-                'total_requested': len(barcode_ids)
+                'total_requested': len(barcode_ids),
+                'deleted_ids': deleted_ids,
+                'failed': failed
             })
         else:
             # Remove from mock data
@@ -1371,49 +2203,13 @@ def bulk_delete_unfound_barcodes():
 @app.route('/api/unfound-barcodes/export', methods=['GET'])
 def export_unfound_barcodes():
     try:
-        if db:
-            # Get unfound barcodes from Firebase
-            unfound_barcodes_ref = db.collection('unfound_barcodes')
-            unfound_barcodes = []
-            for doc in unfound_barcodes_ref.stream():
-                barcode_data = doc.to_dict()
-                barcode_data['id'] = doc.id
-                unfound_barcodes.append(barcode_data)
-        else:
-            # Use mock data if Firebase not available
-            unfound_barcodes = MOCK_UNFOUND_BARCODES
-        
-        # Create Excel file in memory using openpyxl
-        output = BytesIO()
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Unfound Barcodes"
-        
-        # Define column order
-        column_order = ['id', 'barcode', 'timestamp', 'deviceId', 'location']
-        
-        # Add headers
-        for col, header in enumerate(column_order, 1):
-            ws.cell(row=1, column=col, value=header)
-        
-        # Add data
-        for row, barcode_data in enumerate(unfound_barcodes, 2):
-            for col, header in enumerate(column_order, 1):
-                ws.cell(row=row, column=col, value=barcode_data.get(header, ''))
-        
-        wb.save(output)
-        output.seek(0)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"unfound_barcodes_export_{timestamp}.xlsx"
+        try:
+            export_format = get_export_format()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
+        rows = iter_export_rows('unfound_barcodes', UNFOUND_BARCODE_EXPORT_COLUMNS, MOCK_UNFOUND_BARCODES)
+        return export_response(rows, UNFOUND_BARCODE_EXPORT_COLUMNS, "Unfound Barcodes", "unfound_barcodes_export", export_format)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1445,7 +2241,13 @@ def delete_product(product_id):
 # Category Routes
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
-    categories = CategoryService.get_categories()
+    try:
+        fields = parse_fields_arg(request.args['fields'], CATEGORY_FIELD_MAP) if 'fields' in request.args else None
+        include_original = parse_bool_arg(request.args.get('include_original', 'false'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    categories = CategoryService.get_categories(fields=fields, include_original=include_original)
     return jsonify(categories)
 
 @app.route('/api/categories', methods=['POST'])
@@ -1465,6 +2267,24 @@ def delete_category(category_id):
     result = CategoryService.delete_category(category_id)
     return jsonify(result)
 
+# Dashboard Routes
+@app.route('/api/dashboard/stats', methods=['GET'])
+@login_required
+def get_dashboard_stats():
+    """Get dashboard totals without scanning the collections"""
+    try:
+        if not db:
+            return jsonify({'status': 'error', 'message': 'Database not available'}), 500
+        return jsonify({
+            'status': 'success',
+            'data': StatsService.get_dashboard_stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to get dashboard stats: {str(e)}'
+        }), 500
+
 # Debug Routes
 @app.route('/api/debug/firebase', methods=['GET'])
 def debug_firebase():
@@ -1475,13 +2295,105 @@ def debug_firebase():
         "message": f"Firebase status: {firebase_status}"
     })
 
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Get hit/miss statistics for this worker's barcode_cache cache"""
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'barcode_docs': barcode_doc_cache.stats(),
+            'product_lists': product_list_cache.stats(),
+            'shared_invalidation': shared_redis is not None
+        }
+    })
+
+@app.route('/api/replica/status', methods=['GET'])
+def get_replica_status():
+    """Get sync status of the live collection replicas"""
+    return jsonify({
+        'status': 'success',
+        'enabled': any(replica.status()['listening'] for replica in collection_replicas.values()),
+        'data': [replica.status() for replica in collection_replicas.values()]
+    })
+
+@app.route('/api/replica/start', methods=['POST'])
+def start_replica_api():
+    """Start the live collection replicas"""
+    if start_collection_replicas():
+        return jsonify({'status': 'success', 'message': 'Replica listeners started'})
+    return jsonify({'status': 'error', 'message': 'Database not available'}), 500
+
+@app.route('/api/replica/stop', methods=['POST'])
+def stop_replica_api():
+    """Stop the live collection replicas and fall back to Firestore reads"""
+    stop_collection_replicas()
+    return jsonify({'status': 'success', 'message': 'Replica listeners stopped'})
+
+@app.route('/api/browser-pool/status', methods=['GET'])
+def get_browser_pool_status():
+    """Get usage of the shared headless browser pool"""
+    return jsonify({'status': 'success', 'data': browser_pool.stats()})
+
+@app.route('/api/scraper/tier-stats', methods=['GET'])
+def get_scraper_tier_stats():
+    """Get per-tier hit rates of the tiered product fetch (plain HTTP vs browser)"""
+    return jsonify({'status': 'success', 'data': get_tier_stats()})
+
+@app.route('/api/page-store/reextract', methods=['POST'])
+@login_required
+def start_page_reextract():
+    """Re-run the extractors over stored pages in the background"""
+    try:
+        if reextract_status['running']:
+            return jsonify({'status': 'error', 'message': 'Re-extract is already running'}), 409
+        
+        data = request.get_json(silent=True) or {}
+        barcodes = data.get('barcodes')
+        if barcodes is not None and not isinstance(barcodes, list):
+            return jsonify({'status': 'error', 'message': 'barcodes must be a list'}), 400
+        
+        reextract_status['running'] = True
+        threading.Thread(
+            target=run_page_reextract,
+            args=(barcodes, bool(data.get('update_cache', False))),
+            daemon=True
+        ).start()
+        return jsonify({'status': 'success', 'message': 'Re-extract from page store started'}), 202
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Failed to start re-extract: {str(e)}'}), 500
+
+@app.route('/api/page-store/reextract', methods=['GET'])
+def get_page_reextract_status():
+    """Get progress of the current or last re-extract run"""
+    return jsonify({'status': 'success', 'data': reextract_status})
+
+@app.route('/api/browser-pool/prewarm', methods=['POST'])
+def prewarm_browser_pool():
+    """Start pooled browsers in the background so the next scrapes skip startup"""
+    threading.Thread(target=browser_pool.prewarm, daemon=True).start()
+    return jsonify({'status': 'success', 'message': 'Browser pool prewarm started'})
+
+@app.route('/api/cache/clear', methods=['POST'])
+def clear_cache():
+    """Drop everything held in the barcode_cache cache of every worker"""
+    invalidate_barcode_cache()
+    return jsonify({
+        'status': 'success',
+        'message': 'Cache cleared in all workers' if shared_redis else 'Cache cleared in this worker only (no shared Redis)'
+    })
+
 # Background Processor API Endpoints
 @app.route('/api/background-processor/status', methods=['GET'])
 def get_background_processor_status():
     """Get current status of background processor"""
+    with host_rate_limiters_lock:
+        rate_limits = {host: limiter.stats() for host, limiter in host_rate_limiters.items()}
+    with host_health_lock:
+        health = {host: tracker.stats() for host, tracker in host_health.items()}
     return jsonify({
         'status': 'success',
-        'data': processing_status
+        'data': dict(processing_status, workers=app.config['SCRAPER_WORKERS'], rate_limits=rate_limits,
+                     host_health=health)
     })
 
 @app.route('/api/background-processor/start', methods=['POST'])
@@ -1591,8 +2503,8 @@ def get_processed_barcodes():
 def clear_processed_history():
     """Clear processed barcodes history"""
     try:
-        global processed_barcodes_history
-        processed_barcodes_history = []
+        with processing_lock:
+            processed_barcodes_history.clear()
         return jsonify({
             'status': 'success',
             'message': 'Processed barcodes history cleared successfully'
@@ -1645,13 +2557,17 @@ def get_recently_added_products():
                 'message': 'Database not available'
             }), 500
         
-        # Get recently added products
-        recently_added_ref = db.collection('recently_added_products')
+        # Get recently added products from the live replica or Firebase
+        replica = get_ready_replica('recently_added_products')
+        if replica:
+            docs = replica.items()
+        else:
+            recently_added_ref = db.collection('recently_added_products')
+            docs = ((doc.id, doc.to_dict()) for doc in recently_added_ref.stream())
         recently_added_products = []
         
-        for doc in recently_added_ref.stream():
-            product_data = doc.to_dict()
-            product_data['id'] = doc.id
+        for doc_id, product_data in docs:
+            product_data['id'] = doc_id
             recently_added_products.append(product_data)
         
         # Sort by addedAt (newest first)
@@ -1686,9 +2602,9 @@ def migrate_products_to_barcode_cache():
             
             if barcode:
                 # Check if product already exists in barcode_cache
-                existing_product = db.collection('barcode_cache').document(barcode).get()
+                existing_product = get_barcode_cache_doc(barcode)
                 
-                if not existing_product.exists:
+                if existing_product is None:
                     # Create barcode_cache data
                     barcode_cache_data = {
                         'barcode': barcode,
@@ -1710,6 +2626,7 @@ def migrate_products_to_barcode_cache():
                     
                     # Add to barcode_cache collection
                     db.collection('barcode_cache').document(barcode).set(barcode_cache_data)
+                    invalidate_barcode_cache(barcode)
                     migrated_count += 1
                     print(f"Migrated product {barcode} to barcode_cache")
         
@@ -1769,6 +2686,7 @@ def debug_verify():
                     
                     print(f"DEBUG: Attempting to add test product to barcode_cache: {test_product_data}", flush=True)
                     db.collection('barcode_cache').document(barcode).set(test_product_data)
+                    invalidate_barcode_cache(barcode)
                     print(f"DEBUG: Test product added to barcode_cache successfully", flush=True)
                     
                     # Verify it was added
@@ -1801,6 +2719,7 @@ def verify_recently_added_products():
         
         verified_count = 0
         moved_to_products_count = 0
+        moved_barcodes = []
         
         for product_id in product_ids:
             try:
@@ -1824,11 +2743,11 @@ def verify_recently_added_products():
                     continue
                 
                 # Check if product already exists in barcode_cache collection (where main app looks for products)
-                existing_product = db.collection('barcode_cache').document(barcode).get()
+                existing_product = get_barcode_cache_doc(barcode)
                 
-                print(f"DEBUG: Checking if product {barcode} exists in barcode_cache collection: {existing_product.exists}")
+                print(f"DEBUG: Checking if product {barcode} exists in barcode_cache collection: {existing_product is not None}")
                 
-                if existing_product.exists:
+                if existing_product is not None:
                     print(f"DEBUG: Product with barcode {barcode} already exists in barcode_cache collection")
                     # Remove from recently_added_products since it's already verified and in barcode_cache
                     db.collection('recently_added_products').document(product_id).delete()
@@ -1861,6 +2780,7 @@ def verify_recently_added_products():
                 # Add to barcode_cache collection (where main app looks for products)
                 print(f"DEBUG: Adding product to barcode_cache collection: {barcode_cache_data}")
                 db.collection('barcode_cache').document(barcode).set(barcode_cache_data)
+                moved_barcodes.append(barcode)
                 moved_to_products_count += 1
                 print(f"DEBUG: Successfully added product {barcode} to barcode_cache collection")
                 
@@ -1874,6 +2794,8 @@ def verify_recently_added_products():
                 print(f"Error verifying product {product_id}: {e}")
                 continue
         
+        invalidate_barcode_caches(moved_barcodes)
+        
         return jsonify({
             'status': 'success',
             'message': f'Successfully verified {verified_count} products, moved {moved_to_products_count} to barcode_cache collection, and removed from recently added tab',
@@ -1942,7 +2864,7 @@ def bulk_verify_products():
                 'message': 'Product IDs required'
             }), 400
         
-        verified_count = 0
+        verified_ids = []
         current_time = datetime.now().isoformat()
         
         for product_id in product_ids:
@@ -1952,13 +2874,16 @@ def bulk_verify_products():
                     'verified': True,
                     'verifiedAt': current_time
                 })
-                verified_count += 1
+                verified_ids.append(product_id)
                 print(f"✅ Verified product {product_id}")
                 
             except Exception as e:
                 print(f"Error verifying product {product_id}: {e}")
                 continue
         
+        invalidate_barcode_caches(verified_ids)
+        verified_count = len(verified_ids)
+        
         return jsonify({
             'status': 'success',
             'message': f'Successfully verified {verified_count} out of {len(product_ids)} products',
@@ -1978,35 +2903,39 @@ def update_missing_images():
         if not db:
             return jsonify({'status': 'error', 'message': 'Database not available'}), 500
         
-        updated_count = 0
+        updated_ids = []
         placeholder_image = "https://via.placeholder.com/300x300/cccccc/666666?text=Add+Image"
         
         # Get all products from barcode_cache collection
         barcode_cache_ref = db.collection('barcode_cache')
         docs = barcode_cache_ref.stream()
         
-        for doc in docs:
-            try:
-                product_data = doc.to_dict()
-                
-                # Check if image is null, empty, or None
-                if not product_data.get('image') or product_data.get('image') == 'null' or product_data.get('image') == '':
-                    # Update with placeholder image
-                    db.collection('barcode_cache').document(doc.id).update({
-                        'image': placeholder_image,
-                        'imageUpdatedAt': datetime.now().isoformat()
-                    })
-                    updated_count += 1
-                    print(f"Updated product {doc.id} with placeholder image")
+        try:
+            for doc in docs:
+                try:
+                    product_data = doc.to_dict()
                     
-            except Exception as e:
-                print(f"Error updating product {doc.id}: {e}")
-                continue
+                    # Check if image is null, empty, or None
+                    if not product_data.get('image') or product_data.get('image') == 'null' or product_data.get('image') == '':
+                        # Update with placeholder image
+                        db.collection('barcode_cache').document(doc.id).update({
+                            'image': placeholder_image,
+                            'imageUpdatedAt': datetime.now().isoformat()
+                        })
+                        updated_ids.append(doc.id)
+                        print(f"Updated product {doc.id} with placeholder image")
+                        
+                except Exception as e:
+                    print(f"Error updating product {doc.id}: {e}")
+                    continue
+        finally:
+            # Also drop what was updated before a failed stream
+            invalidate_barcode_caches(updated_ids)
         
         return jsonify({
             'status': 'success',
-            'message': f'Successfully updated {updated_count} products with placeholder images',
-            'updatedCount': updated_count
+            'message': f'Successfully updated {len(updated_ids)} products with placeholder images',
+            'updatedCount': len(updated_ids)
         })
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -2086,19 +3015,15 @@ def clear_recently_added_products():
                 'message': 'No product IDs provided'
             }), 400
         
-        cleared_count = 0
-        for product_id in product_ids:
-            try:
-                db.collection('recently_added_products').document(product_id).delete()
-                cleared_count += 1
-            except Exception as e:
-                print(f"Error clearing product {product_id}: {e}")
-                continue
+        cleared_ids, failed = batch_delete_documents(['recently_added_products'], product_ids)
+        cleared_count = len(cleared_ids)
         
         return jsonify({
             'status': 'success',
             'message': f'Successfully cleared {cleared_count} products',
-            'clearedCount': cleared_count
+            'clearedCount': cleared_count,
+            'clearedIds': cleared_ids,
+            'failed': failed
         })
     except Exception as e:
         return jsonify({
@@ -2108,7 +3033,6 @@ def clear_recently_added_products():
 
 def process_unfound_barcodes_background():
     """Background job to process unfound barcodes"""
-    global processing_status, processed_barcodes_history
     
     if not db:
         print("DEBUG: Background processor - Database not available")
@@ -2131,59 +3055,57 @@ def process_unfound_barcodes_background():
             barcode_data = doc.to_dict()
             barcode_data['id'] = doc.id
             
-            # Process all unfound barcodes - no retry logic needed since we delete failed ones
+            # Skip barcodes still backing off after a transient failure
+            if not is_due_for_attempt(barcode_data):
+                continue
             unfound_barcodes.append(barcode_data)
             print(f"DEBUG: Adding barcode for processing: {barcode_data['barcode']}")
         
+        unfound_barcodes = filter_negatively_cached(unfound_barcodes)
         print(f"DEBUG: Found {len(unfound_barcodes)} barcodes to process")
         
-        for barcode_data in unfound_barcodes:
+        def process_barcode(barcode_data):
             try:
                 processing_status['current_barcode'] = barcode_data['barcode']
-                processing_status['processed_count'] += 1
+                processed_count = increment_processing_count('processed_count')
                 
-                print(f"DEBUG: Processing barcode {barcode_data['barcode']} ({processing_status['processed_count']}/{len(unfound_barcodes)})")
+                print(f"DEBUG: Processing barcode {barcode_data['barcode']} ({processed_count}/{len(unfound_barcodes)})")
                 
                 # Try to fetch product data
                 url = f"https://smartconsumer-beta.org/01/{barcode_data['barcode']}"
-                result = fetch_product_data_internal(barcode_data['barcode'], url)
+                try:
+                    result = fetch_product_data_internal(barcode_data['barcode'], url)
+                except TransientFetchError as e:
+                    result, transient_error = None, e
+                else:
+                    transient_error = TransientFetchError(f"Lookup failed for {barcode_data['barcode']}")
                 
                 # Record processing result in history
                 processed_at = datetime.now().isoformat()
                 
-                if result and result.get('success'):
-                    # Product found! Add to products collection
-                    product_data = result['product']
-                    product_data['source'] = 'background_retry'
-                    product_data['originalUnfoundId'] = barcode_data['id']
-                    product_data['createdAt'] = processed_at
-                    
-                    # Add directly to barcode_cache collection (main database) with verified: false
-                    barcode_cache_data = {
+                if result is None:
+                    # The site or browser failed rather than answering; try again later instead of deleting
+                    requeue_unfound_barcode(barcode_data, transient_error)
+                    increment_processing_count('error_count')
+                    record_processed_barcode({
                         'barcode': barcode_data['barcode'],
-                        'name': product_data.get('name', 'Unknown'),
-                        'price': product_data.get('price', 'N/A'),
-                        'mrp': product_data.get('mrp', product_data.get('price', 'N/A')),
-                        'image': product_data.get('image'),
-                        'brand': product_data.get('brand', ''),
-                        'category': product_data.get('category', ''),
-                        'description': product_data.get('description', ''),
-                        'verified': False,  # Ready for admin verification
-                        'source': 'background_processor',
-                        'createdAt': processed_at,
-                        'originalUnfoundId': barcode_data['id'],
-                        'scrapedAt': processed_at
-                    }
-                    db.collection('barcode_cache').document(barcode_data['barcode']).set(barcode_cache_data)
-                    
-                    # Remove from unfound barcodes
-                    db.collection('unfound_barcodes').document(barcode_data['id']).delete()
+                        'productName': None,
+                        'success': False,
+                        'processedAt': processed_at,
+                        'result': 'Requeued - Transient Failure',
+                        'error': str(transient_error)
+                    })
+                
+                elif result.get('success'):
+                    # Product found! Move it into barcode_cache (unverified)
+                    product_data = result['product']
+                    save_scraped_product(barcode_data, product_data)
                     
-                    processing_status['success_count'] += 1
+                    increment_processing_count('success_count')
                     print(f"DEBUG: ✅ Successfully found and added product: {product_data['name']}")
                     
                     # Add to processed history
-                    processed_barcodes_history.append({
+                    record_processed_barcode({
                         'barcode': barcode_data['barcode'],
                         'productName': product_data.get('name', 'Unknown'),
                         'success': True,
@@ -2192,14 +3114,15 @@ def process_unfound_barcodes_background():
                     })
                     
                 else:
-                    # Still not found, delete the barcode instead of retrying
+                    # Still not found, delete the barcode and remember the miss in the negative cache
                     db.collection('unfound_barcodes').document(barcode_data['id']).delete()
+                    record_negative_result(barcode_data['barcode'])
                     
-                    processing_status['error_count'] += 1
+                    increment_processing_count('error_count')
                     print(f"DEBUG: ❌ Not found, deleting barcode: {barcode_data['barcode']}")
                     
                     # Add to processed history
-                    processed_barcodes_history.append({
+                    record_processed_barcode({
                         'barcode': barcode_data['barcode'],
                         'productName': None,
                         'success': False,
@@ -2208,22 +3131,12 @@ def process_unfound_barcodes_background():
                         'error': 'Product not found on Smart Consumer - deleted from unfound list'
                     })
                 
-                # Keep only last 100 processed barcodes to prevent memory issues
-                if len(processed_barcodes_history) > 100:
-                    processed_barcodes_history = processed_barcodes_history[-100:]
-                
-                # Add human-like delay between requests to avoid being blocked
-                import random
-                delay = random.uniform(3, 6)  # Reduced delay between 3-6 seconds
-                print(f"DEBUG: Waiting {delay:.1f} seconds before next barcode (human-like delay)...")
-                time.sleep(delay)
-                
             except Exception as e:
-                processing_status['error_count'] += 1
+                increment_processing_count('error_count')
                 print(f"DEBUG: Error processing barcode {barcode_data['barcode']}: {e}")
                 
                 # Add error to processed history
-                processed_barcodes_history.append({
+                record_processed_barcode({
                     'barcode': barcode_data['barcode'],
                     'productName': None,
                     'success': False,
@@ -2231,7 +3144,9 @@ def process_unfound_barcodes_background():
                     'result': 'Error',
                     'error': str(e)
                 })
-                continue
+        
+        # Scrape concurrently on the worker pool; pacing is enforced by the per-host rate limiter
+        wait([scrape_executor.submit(process_barcode, barcode_data) for barcode_data in unfound_barcodes])
         
         print(f"DEBUG: Background processing completed. Processed: {processing_status['processed_count']}, Success: {processing_status['success_count']}, Errors: {processing_status['error_count']}")
         
@@ -2241,141 +3156,1339 @@ def process_unfound_barcodes_background():
         processing_status['running'] = False
         processing_status['current_barcode'] = None
 
-def fetch_product_data_internal(barcode, url):
-    """Internal function to fetch product data (used by background processor)"""
-    driver = None
-    try:
-        # Setup Chrome options for headless browsing
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # Initialize Chrome driver
-        try:
-            driver = webdriver.Chrome(options=chrome_options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        except Exception as e:
-            print(f"DEBUG: Background processor - Chrome driver failed: {e}")
-            return None
-        
-        # Navigate to URL
-        driver.get(url)
-        
-        # Human-like delay after page load
-        import random
-        delay = random.uniform(1.5, 3)  # Random delay between 1.5-3 seconds
-        print(f"DEBUG: Background processor - Waiting {delay:.1f} seconds (human-like delay)...")
-        time.sleep(delay)
-        
-        # Simulate human-like behavior
-        try:
-            # Random scroll to simulate human reading
-            scroll_amount = random.randint(50, 200)
-            driver.execute_script(f"window.scrollBy(0, {scroll_amount});")
-            time.sleep(random.uniform(0.3, 0.8))
-        except Exception as e:
-            print(f"DEBUG: Background processor - Error in human-like simulation: {e}")
-        
-        # Wait for page to load
-        wait = WebDriverWait(driver, 10)
-        try:
-            wait.until(EC.any_of(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "h1")),
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".error"))
-            ))
-        except TimeoutException:
-            pass
-        
-        # Extract product data
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        product_data = extract_product_data_selenium(driver, soup, barcode)
-        
-        if product_data and (product_data.get('name') != 'N/A' or product_data.get('price') != 'N/A'):
-            return {'success': True, 'product': product_data}
-        else:
-            return {'success': False, 'product': create_empty_product_data(barcode)}
-            
-    except Exception as e:
-        print(f"DEBUG: Background processor - Error fetching {barcode}: {e}")
-        return None
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+# Per-host politeness for scraping, enforced centrally instead of sleeps in each worker
+# Refill and take from a token bucket stored in a Redis hash; returns the seconds to wait ('0' if a token was taken)
+SHARED_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local delay = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    delay = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(delay)
+"""
 
-def start_background_processor():
-    """Start the background processor in continuous real-time mode"""
-    global background_processor
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per second with bursts up to `capacity`.
+
+    With shared_key, the bucket lives in the shared Redis so every worker
+    process draws from it. If Redis fails, the bucket falls back to a local
+    one at local_rate.
+    """
     
-    if background_processor and background_processor.is_alive():
-        print("DEBUG: Background processor already running")
-        return False
+    def __init__(self, rate, capacity=1, shared_key=None, local_rate=None):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.shared_key = shared_key
+        self.local_rate = local_rate if local_rate is not None else rate
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired_count = 0
+        self.waited_seconds = 0.0
     
-    def continuous_processor():
-        """Continuously process unfound barcodes in real-time"""
-        processing_status['running'] = True
-        print("DEBUG: 🚀 Background processor started in CONTINUOUS REAL-TIME mode")
-        
-        while processing_status['running']:
-            try:
-                # Check for unfound barcodes to process
-                unfound_barcodes = get_unfound_barcodes_for_processing()
-                
-                if unfound_barcodes:
-                    print(f"DEBUG: 🔄 Found {len(unfound_barcodes)} barcodes to process")
-                    
-                    # Process each barcode
-                    for i, barcode_data in enumerate(unfound_barcodes):
-                        if not processing_status['running']:
-                            print("DEBUG: Background processor stopped by user")
-                            break
-                            
-                        print(f"DEBUG: Processing barcode {barcode_data['barcode']} ({i+1}/{len(unfound_barcodes)})")
-                        processing_status['current_barcode'] = barcode_data['barcode']
-                        
-                        # Process the barcode
-                        result = process_single_barcode(barcode_data)
-                        
-                        if result:
-                            print(f"DEBUG: ✅ Successfully processed {barcode_data['barcode']}")
-                        else:
-                            print(f"DEBUG: ❌ Failed to process {barcode_data['barcode']}")
-                        
-                        # Human-like delay between barcodes (2-5 seconds)
-                        import random
-                        delay = random.uniform(2, 5)
-                        print(f"DEBUG: Waiting {delay:.1f} seconds before next barcode...")
-                        time.sleep(delay)
-                    
-                    processing_status['current_barcode'] = None
-                    print(f"DEBUG: ✅ Completed processing batch of {len(unfound_barcodes)} barcodes")
+    def _take_shared(self):
+        """Seconds until the next shared token (0 if one was taken), or None if Redis is unavailable"""
+        try:
+            return float(shared_redis.eval(SHARED_TOKEN_BUCKET_SCRIPT, 1, self.shared_key, self.rate, self.capacity))
+        except redis.RedisError as e:
+            print(f"DEBUG: Shared rate limiter unavailable, using the local bucket: {e}")
+            return None
+    
+    def _take(self, started):
+        """Take a token if one is available; otherwise return the seconds until the next one"""
+        delay = self._take_shared() if self.shared_key and shared_redis else None
+        with self._lock:
+            now = time.monotonic()
+            if delay is None:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.local_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    delay = 0
                 else:
-                    print("DEBUG: No unfound barcodes to process, waiting 30 seconds...")
-                    time.sleep(30)  # Wait 30 seconds before checking again
-                    
-            except Exception as e:
-                print(f"DEBUG: Error in continuous processor: {e}")
-                time.sleep(60)  # Wait 1 minute on error before retrying
+                    delay = (1 - self._tokens) / self.local_rate
+            if not delay:
+                self.acquired_count += 1
+                self.waited_seconds += now - started
+            return delay
+    
+    def acquire(self, timeout=None):
+        """Block until a token is available. Returns False if timeout expires first."""
+        if self.rate <= 0:
+            return True
         
-        print("DEBUG: Background processor stopped")
+        started = time.monotonic()
+        while True:
+            delay = self._take(started)
+            if not delay:
+                return True
+            if timeout is not None and time.monotonic() + delay - started > timeout:
+                return False
+            time.sleep(delay)
     
-    background_processor = threading.Thread(target=continuous_processor, daemon=True)
-    background_processor.start()
+    async def acquire_async(self):
+        """Asyncio counterpart of acquire() that yields to the event loop while waiting"""
+        if self.rate <= 0:
+            return
+        
+        started = time.monotonic()
+        while True:
+            delay = self._take(started)
+            if not delay:
+                return
+            await asyncio.sleep(delay)
     
-    print("DEBUG: 🚀 Background processor started in CONTINUOUS REAL-TIME mode")
-    return True
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.capacity,
+                'shared': bool(self.shared_key and shared_redis),
+                'acquired': self.acquired_count,
+                'waitedSeconds': round(self.waited_seconds, 2)
+            }
 
-def get_unfound_barcodes_for_processing():
+host_rate_limiters = {}
+host_rate_limiters_lock = threading.Lock()
+
+def get_host_limiter(url):
+    host = urlparse(url).hostname or url
+    with host_rate_limiters_lock:
+        limiter = host_rate_limiters.get(host)
+        if limiter is None:
+            # The rate is a budget for the whole deployment: shared through Redis when available,
+            # otherwise split evenly between the SCRAPER_HOST_RATE_PROCESSES workers
+            rate = app.config['SCRAPER_HOST_RATE']
+            local_rate = rate / max(1, app.config['SCRAPER_HOST_RATE_PROCESSES'])
+            if shared_redis:
+                limiter = TokenBucket(rate, app.config['SCRAPER_HOST_BURST'], f'scraper:host_rate:{host}', local_rate)
+            else:
+                limiter = TokenBucket(local_rate, app.config['SCRAPER_HOST_BURST'])
+            host_rate_limiters[host] = limiter
+    return limiter
+
+def wait_for_host_slot(url):
+    """Block until the target host's token bucket allows another request.
+
+    Raises TransientFetchError after HOST_HEALTH_ACQUIRE_TIMEOUT seconds.
+    """
+    host = urlparse(url).hostname or url
+    limiter = get_host_limiter(url)
+    
+    started = time.time()
+    if not limiter.acquire(app.config['HOST_HEALTH_ACQUIRE_TIMEOUT']):
+        raise TransientFetchError(f"Timed out waiting for the rate limiter on {host}")
+    waited = time.time() - started
+    if waited > 0.5:
+        print(f"DEBUG: Rate limiter - waited {waited:.1f}s for {host}")
+
+class TransientFetchError(Exception):
+    """A lookup failed in a way worth retrying later: timeout, 403/429/5xx or an open circuit"""
+    
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+HOST_FAILURE_STATUSES = (403, 429, 500, 502, 503, 504)
+
+class HostHealth:
+    """Health of one upstream host: latency/error EWMAs, a circuit breaker and an AIMD concurrency limit.
+
+    Each success raises the concurrency limit by 1/limit (about one extra slot
+    per round of requests); each failure, and a latency EWMA above
+    slow_seconds, halves it at most once per round trip. The circuit opens
+    after failure_threshold consecutive failures or when the error EWMA
+    passes error_rate. While open, requests are refused until the cooldown
+    ends. Then a single probe is allowed (half-open). A successful probe
+    closes the circuit; a failed probe reopens it with double the cooldown.
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+    
+    def __init__(self, host, max_concurrency, initial_concurrency, failure_threshold, error_rate,
+                 slow_seconds, cooldown, max_cooldown, alpha=0.2):
+        self.host = host
+        self.max_concurrency = max(1, max_concurrency)
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.alpha = alpha
+        self._condition = threading.Condition()
+        self.state = self.CLOSED
+        self.limit = float(min(self.max_concurrency, max(1, initial_concurrency)))
+        self.in_flight = 0
+        self.latency_ewma = None
+        self.error_ewma = 0.0
+        self.consecutive_failures = 0
+        self.cooldown = cooldown
+        self.open_until = 0
+        self._probing = False
+        self._last_decrease = 0
+        self.success_count = 0
+        self.failure_count = 0
+        self.rejected_count = 0
+        self.opened_count = 0
+    
+    def retry_after(self):
+        """Seconds until the circuit lets a probe through (0 when closed)"""
+        with self._condition:
+            if self.state == self.CLOSED:
+                return 0
+            return max(1.0, self.open_until - time.monotonic())
+    
+    def _admit(self):
+        """True if a slot was taken, None if the caller should wait; raises while the circuit is open"""
+        if self.state == self.OPEN and time.monotonic() >= self.open_until:
+            self.state = self.HALF_OPEN
+            print(f"DEBUG: Circuit half-open for {self.host}, sending a probe")
+        
+        if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._probing):
+            self.rejected_count += 1
+            raise TransientFetchError(f"Circuit open for {self.host}",
+                                      retry_after=max(1.0, self.open_until - time.monotonic()))
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+        elif self.in_flight >= int(self.limit):
+            return None
+        self.in_flight += 1
+        return True
+    
+    def acquire(self, timeout=None):
+        """Take a concurrency slot, blocking while the host is at its limit"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while not self._admit():
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TransientFetchError(f"Timed out waiting for a slot on {self.host}")
+                self._condition.wait(remaining)
+    
+    async def acquire_async(self):
+        """Asyncio counterpart of acquire() that yields to the event loop while waiting"""
+        while True:
+            with self._condition:
+                if self._admit():
+                    return
+            await asyncio.sleep(0.05)
+    
+    def _decrease(self, now):
+        round_trip = self.latency_ewma or 1.0
+        if now - self._last_decrease >= round_trip:
+            self.limit = max(1.0, self.limit / 2)
+            self._last_decrease = now
+    
+    def _open(self, now):
+        self.state = self.OPEN
+        self.open_until = now + self.cooldown
+        self.opened_count += 1
+        print(f"DEBUG: Circuit opened for {self.host} for {self.cooldown:.0f}s "
+              f"(error rate {self.error_ewma:.2f}, {self.consecutive_failures} consecutive failures)")
+    
+    def release(self, ok, latency=None):
+        """Return a slot and record the outcome: True, False (host failure) or None (not the host's fault)"""
+        now = time.monotonic()
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            was_probe = self.state == self.HALF_OPEN and self._probing
+            self._probing = False
+            
+            if ok is not None:
+                if latency is not None:
+                    self.latency_ewma = latency if self.latency_ewma is None else (
+                        self.alpha * latency + (1 - self.alpha) * self.latency_ewma)
+                self.error_ewma = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * self.error_ewma
+            
+            if ok:
+                self.success_count += 1
+                self.consecutive_failures = 0
+                if was_probe:
+                    self.state = self.CLOSED
+                    self.cooldown = self.base_cooldown
+                    self.error_ewma = 0.0
+                    print(f"DEBUG: Circuit closed for {self.host}")
+                if self.latency_ewma is not None and self.latency_ewma > self.slow_seconds:
+                    self._decrease(now)
+                else:
+                    self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            elif ok is False:
+                self.failure_count += 1
+                self.consecutive_failures += 1
+                self._decrease(now)
+                if was_probe:
+                    self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                    self._open(now)
+                elif self.state == self.CLOSED and (
+                        self.consecutive_failures >= self.failure_threshold or
+                        (self.success_count + self.failure_count >= self.failure_threshold and
+                         self.error_ewma >= self.error_rate)):
+                    self._open(now)
+            
+            self._condition.notify_all()
+    
+    def stats(self):
+        with self._condition:
+            return {
+                'state': self.state,
+                'concurrencyLimit': int(self.limit),
+                'inFlight': self.in_flight,
+                'latencyEwmaMs': round(self.latency_ewma * 1000) if self.latency_ewma is not None else None,
+                'errorRate': round(self.error_ewma, 3),
+                'consecutiveFailures': self.consecutive_failures,
+                'retryAfter': round(max(0, self.open_until - time.monotonic()), 1) if self.state != self.CLOSED else 0,
+                'successes': self.success_count,
+                'failures': self.failure_count,
+                'rejected': self.rejected_count,
+                'opened': self.opened_count
+            }
+
+SMART_CONSUMER_URL = "https://smartconsumer-beta.org"
+host_health = {}
+host_health_lock = threading.Lock()
+
+def get_host_health(url):
+    host = urlparse(url).hostname or url
+    with host_health_lock:
+        health = host_health.get(host)
+        if health is None:
+            health = HostHealth(
+                host,
+                app.config['HOST_HEALTH_MAX_CONCURRENCY'],
+                app.config['HOST_HEALTH_INITIAL_CONCURRENCY'],
+                app.config['HOST_HEALTH_FAILURE_THRESHOLD'],
+                app.config['HOST_HEALTH_ERROR_RATE'],
+                app.config['HOST_HEALTH_SLOW_SECONDS'],
+                app.config['HOST_HEALTH_COOLDOWN'],
+                app.config['HOST_HEALTH_MAX_COOLDOWN']
+            )
+            host_health[host] = health
+    return health
+
+def requeue_unfound_barcode(barcode_data, error):
+    """Keep a barcode in unfound_barcodes after a transient failure, with a backoff before the next attempt"""
+    failures = barcode_data.get('transientFailures', 0) + 1
+    delay = min(app.config['SCRAPER_REQUEUE_MAX_DELAY'], app.config['SCRAPER_REQUEUE_BASE_DELAY'] * 2 ** (failures - 1))
+    delay = max(delay, getattr(error, 'retry_after', None) or 0)
+    
+    db.collection('unfound_barcodes').document(barcode_data['id']).update({
+        'transientFailures': failures,
+        'nextAttemptAt': (datetime.now() + timedelta(seconds=delay)).isoformat(),
+        'lastError': str(error)
+    })
+    print(f"DEBUG: ⏳ Requeued {barcode_data['barcode']} in {delay:.0f}s after transient failure: {error}")
+
+def is_due_for_attempt(barcode_data):
+    """False while a requeued barcode is still backing off"""
+    next_attempt = barcode_data.get('nextAttemptAt')
+    return not next_attempt or next_attempt <= datetime.now().isoformat()
+
+# Worker threads used by the background processors to scrape barcodes concurrently
+scrape_executor = ThreadPoolExecutor(max_workers=app.config['SCRAPER_WORKERS'], thread_name_prefix='scraper')
+
+# Pooled HTTP session for plain-HTTP scraping (keep-alive connections shared across workers)
+SCRAPE_HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0',
+    'DNT': '1'
+}
+
+scrape_http_session = requests.Session()
+scrape_http_session.headers.update(SCRAPE_HTTP_HEADERS)
+scrape_http_adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(10, app.config['SCRAPER_WORKERS'] * 2))
+scrape_http_session.mount('https://', scrape_http_adapter)
+scrape_http_session.mount('http://', scrape_http_adapter)
+
+# Content-addressed page store: every fetched page is kept gzipped on disk so extractors can be re-run offline
+page_store_lock = threading.Lock()
+
+def page_store_index_path(barcode):
+    return os.path.join(app.config['PAGE_STORE_DIR'], 'index', re.sub(r'[^0-9A-Za-z_-]', '_', str(barcode)) + '.jsonl')
+
+def store_page(barcode, url, content, source):
+    """Save a fetched page under its SHA-256 and append a (barcode, fetch time) entry to the index.
+
+    source is 'http' or 'browser' and decides which extractor replays it.
+    Identical pages are stored once. Returns the index entry, or None when
+    the store is disabled or the write fails.
+    """
+    if not app.config['PAGE_STORE_ENABLED'] or not content:
+        return None
+    
+    try:
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = os.path.join(app.config['PAGE_STORE_DIR'], 'objects', digest[:2], f'{digest}.html.gz')
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            temp_path = f'{object_path}.{uuid.uuid4().hex}.tmp'
+            with gzip.open(temp_path, 'wb') as object_file:
+                object_file.write(content)
+            os.replace(temp_path, object_path)
+        
+        entry = {
+            'barcode': barcode,
+            'url': url,
+            'source': source,
+            'sha256': digest,
+            'size': len(content),
+            'fetchedAt': datetime.now().isoformat()
+        }
+        index_path = page_store_index_path(barcode)
+        with page_store_lock:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            with open(index_path, 'a', encoding='utf-8') as index_file:
+                index_file.write(json.dumps(entry) + '\n')
+        return entry
+    except OSError as e:
+        print(f"DEBUG: Page store - failed to store page for {barcode}: {e}")
+        return None
+
+def load_stored_page(entry):
+    """Read back the raw bytes of a stored page"""
+    object_path = os.path.join(app.config['PAGE_STORE_DIR'], 'objects', entry['sha256'][:2], f"{entry['sha256']}.html.gz")
+    with gzip.open(object_path, 'rb') as object_file:
+        return object_file.read()
+
+def iter_stored_pages(barcodes=None, latest_only=True):
+    """Yield index entries for the given barcodes (default: all), newest fetch only unless latest_only=False"""
+    index_dir = os.path.join(app.config['PAGE_STORE_DIR'], 'index')
+    if barcodes is not None:
+        index_paths = [page_store_index_path(barcode) for barcode in barcodes]
+    elif os.path.isdir(index_dir):
+        index_paths = [os.path.join(index_dir, name) for name in sorted(os.listdir(index_dir)) if name.endswith('.jsonl')]
+    else:
+        index_paths = []
+    
+    for index_path in index_paths:
+        try:
+            with open(index_path, encoding='utf-8') as index_file:
+                entries = [json.loads(line) for line in index_file if line.strip()]
+        except OSError:
+            continue
+        if latest_only:
+            entries = entries[-1:]
+        yield from entries
+
+def soup_product_candidates(soup, url=''):
+    """Offline equivalent of PRODUCT_CANDIDATES_SCRIPT over a parsed page"""
+    config = product_candidates_config()
+    
+    def first_texts(selectors):
+        texts = []
+        for selector in selectors:
+            try:
+                tag = soup.select_one(selector)
+            except Exception:
+                tag = None
+            texts.append([selector, tag.get_text(' ', strip=True) if tag else ''])
+        return texts
+    
+    def dimension(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 0
+    
+    # Only visible text counts: error strings and prices inside scripts or styles are not on the page
+    title = soup.find('title')
+    title_text = title.get_text().strip() if title else ''
+    page_text = ' '.join(
+        text for text in soup.find_all(string=True)
+        if text.parent.name not in HIDDEN_TEXT_TAGS and not isinstance(text, Comment)
+    )
+    lower = f"{title_text} {page_text}".lower()
+    price_match = None
+    for pattern in config['pricePatterns']:
+        match = re.search(pattern, page_text)
+        if match:
+            price_match = match.group()
+            break
+    
+    currency_texts = []
+    for tag in soup.find_all(True):
+        if len(currency_texts) >= 50:
+            break
+        if tag.name in HIDDEN_TEXT_TAGS:
+            continue
+        own_text = ''.join(tag.find_all(string=True, recursive=False))
+        if re.search(r'₹|Rs|\$', own_text):
+            currency_texts.append(tag.get_text(' ', strip=True))
+    
+    return {
+        'url': url,
+        'title': title_text,
+        'errorMessages': [message for message in config['errorMessages'] if message in lower],
+        'errorContexts': [context for context in config['errorContexts'] if context in lower],
+        'productNotFound': 'product not found' in lower,
+        'names': first_texts(config['nameSelectors']),
+        'mrps': first_texts(config['mrpSelectors']),
+        'prices': first_texts(config['priceSelectors']),
+        'brands': first_texts(config['brandSelectors']),
+        'priceMatch': price_match,
+        'currencyTexts': currency_texts,
+        'images': [
+            {
+                'src': img.get('src', ''),
+                'alt': img.get('alt'),
+                'className': ' '.join(img.get('class', [])),
+                'width': dimension(img.get('width')),
+                'height': dimension(img.get('height'))
+            }
+            for img in soup.find_all('img')
+        ]
+    }
+
+def reextract_stored_page(entry):
+    """Re-run the extraction pipeline over a stored page (rendered browser pages skip the needs-browser check)"""
+    content = load_stored_page(entry)
+    if entry.get('source') == 'browser':
+        return extract_product(html_parser_backend.candidates(content, entry.get('url', '')), entry['barcode'])
+    return html_parser_backend.classify(content, entry['barcode'], entry.get('url', ''))[1]
+
+reextract_status = {
+    'running': False,
+    'total': 0,
+    'completed': 0,
+    'found': 0,
+    'not_found': 0,
+    'errors': 0,
+    'updated': 0,
+    'started_at': None,
+    'finished_at': None
+}
+
+def reextract_cache_write(fields, existing):
+    """The barcode_cache write for a re-extracted product, or None if nothing should change.
+
+    Missing documents are created unverified and unverified ones are merged
+    over. Verified documents only get fields that are currently empty.
+    """
+    fields = dict(fields, reextractedAt=datetime.now().isoformat())
+    if existing is None:
+        return 'set', dict(
+            fields,
+            verified=False,
+            source='page_reextract',
+            createdAt=datetime.now().isoformat()
+        )
+    if not existing.get('verified'):
+        return 'merge', fields
+    
+    missing = {field: value for field, value in fields.items()
+               if field not in ('barcode', 'reextractedAt', 'pageSha256') and existing.get(field) in (None, '', 'N/A')}
+    if not missing:
+        return None
+    return 'merge', dict(missing, reextractedAt=fields['reextractedAt'], pageSha256=fields['pageSha256'])
+
+def run_page_reextract(barcodes=None, update_cache=False):
+    """Re-extract products from the latest stored page of each barcode.
+
+    With update_cache, extracted fields are written to barcode_cache in
+    batched writes (see reextract_cache_write for how existing documents
+    are treated).
+    """
+    entries = list(iter_stored_pages(barcodes))
+    reextract_status.update({
+        'running': True,
+        'total': len(entries),
+        'completed': 0,
+        'found': 0,
+        'not_found': 0,
+        'errors': 0,
+        'updated': 0,
+        'started_at': datetime.now().isoformat(),
+        'finished_at': None
+    })
+    
+    extracted = {}
+    try:
+        for entry in entries:
+            try:
+                product_data = reextract_stored_page(entry)
+                if has_key_product_fields(product_data):
+                    reextract_status['found'] += 1
+                    if update_cache and db:
+                        extracted[entry['barcode']] = dict(barcode_cache_fields(product_data), pageSha256=entry['sha256'])
+                else:
+                    reextract_status['not_found'] += 1
+            except Exception as e:
+                print(f"DEBUG: Page store - re-extract failed for {entry.get('barcode')}: {e}")
+                reextract_status['errors'] += 1
+            reextract_status['completed'] += 1
+        
+        writes = []
+        if extracted:
+            existing_docs = get_barcode_cache_docs(list(extracted))
+            for barcode, fields in extracted.items():
+                write = reextract_cache_write(fields, existing_docs.get(barcode))
+                if write:
+                    operation, data = write
+                    writes.append((barcode, operation, db.collection('barcode_cache').document(barcode), data))
+        
+        if writes:
+            written, failed = batch_write_documents(writes)
+            reextract_status['updated'] = len(written)
+            reextract_status['errors'] += len(failed)
+            invalidate_barcode_caches(written)
+    finally:
+        reextract_status['running'] = False
+        reextract_status['finished_at'] = datetime.now().isoformat()
+        print(f"DEBUG: Page store - re-extract finished: {reextract_status}")
+
+# Tiered fetch: plain HTTP + soup extractor first, headless browser only when needed
+scrape_tier_stats = {'http': {'attempts': 0, 'hits': 0}, 'browser': {'attempts': 0, 'hits': 0}}
+scrape_tier_stats_lock = threading.Lock()
+JS_APP_ROOT_IDS = ('root', 'app', '__next', '__nuxt')
+HIDDEN_TEXT_TAGS = ('script', 'style', 'noscript', 'template')
+
+def record_tier_result(tier, hit):
+    with scrape_tier_stats_lock:
+        scrape_tier_stats[tier]['attempts'] += 1
+        if hit:
+            scrape_tier_stats[tier]['hits'] += 1
+
+def get_tier_stats():
+    with scrape_tier_stats_lock:
+        return {
+            tier: dict(counts, hitRate=round(counts['hits'] / counts['attempts'], 3) if counts['attempts'] else None)
+            for tier, counts in scrape_tier_stats.items()
+        }
+
+def page_needs_browser(soup):
+    """Detect a client-rendered page: an empty app root or almost no server-rendered text"""
+    for root_id in JS_APP_ROOT_IDS:
+        root = soup.find(id=root_id)
+        if root is not None and not root.get_text(strip=True):
+            return True
+    
+    body = soup.body or soup
+    text_length = sum(
+        len(text.strip()) for text in body.find_all(string=True)
+        if text.parent.name not in HIDDEN_TEXT_TAGS
+    )
+    return text_length < 200
+
+def has_key_product_fields(product_data):
+    return bool(product_data) and product_data.get('name') not in (None, '', 'N/A') and product_data.get('price') not in (None, '', 'N/A')
+
+# Pluggable HTML parser backends: both turn a static page into extraction candidates for the shared pipeline
+class SoupParserBackend:
+    """BeautifulSoup with the stdlib html.parser: parses the whole page, then gathers candidates with soup selectors"""
+    name = 'html.parser'
+    
+    def candidates(self, content, url=''):
+        page_source = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+        return soup_product_candidates(BeautifulSoup(page_source, 'html.parser'), url)
+    
+    def classify(self, content, barcode, url=''):
+        page_source = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+        soup = BeautifulSoup(page_source, 'html.parser')
+        if page_needs_browser(soup):
+            return 'needs_browser', None
+        return 'extracted', extract_product(soup_product_candidates(soup, url), barcode)
+
+# Non-content blocks removed before parsing, and the page title read straight from the raw bytes
+PAGE_NOISE_PATTERN = re.compile(rb'<(script|style|svg|noscript|template)\b.*?</\1\s*>|<!--.*?-->', re.I | re.S)
+PAGE_TITLE_PATTERN = re.compile(rb'<title[^>]*>(.*?)</title\s*>', re.I | re.S)
+PAGE_BODY_PATTERN = re.compile(rb'<body\b', re.I)
+PAGE_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+CURRENCY_TEXT_PATTERN = re.compile(r'₹|Rs|\$')
+
+class LxmlParserBackend:
+    """lxml backend: parses only the <body> with scripts, styles and comments stripped, using precompiled selectors"""
+    name = 'lxml'
+    
+    APP_ROOTS = etree.XPath("//*[" + " or ".join(f"@id='{root_id}'" for root_id in JS_APP_ROOT_IDS) + "]")
+    TEXT_NODES = etree.XPath('//text()')
+    IMAGES = CSSSelector('img')
+    SELECTORS = {
+        selector: CSSSelector(selector)
+        for selector in PRODUCT_NAME_SELECTORS + PRODUCT_MRP_SELECTORS + PRODUCT_PRICE_SELECTORS + PRODUCT_BRAND_SELECTORS
+    }
+    
+    def product_region(self, content):
+        """Return (title, body_markup) with non-content blocks removed"""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        charset_match = PAGE_CHARSET_PATTERN.search(content, 0, 4096)
+        encoding = charset_match.group(1).decode('ascii') if charset_match else 'utf-8'
+        
+        title_match = PAGE_TITLE_PATTERN.search(content)
+        body_match = PAGE_BODY_PATTERN.search(content)
+        body = PAGE_NOISE_PATTERN.sub(b'', content[body_match.start():] if body_match else content)
+        try:
+            title = html_lib.unescape(title_match.group(1).decode(encoding, errors='replace')).strip() if title_match else None
+            return title, body.decode(encoding, errors='replace')
+        except LookupError:
+            title = html_lib.unescape(title_match.group(1).decode('utf-8', errors='replace')).strip() if title_match else None
+            return title, body.decode('utf-8', errors='replace')
+    
+    def parse(self, content):
+        """Return (title, body_markup, root) where root is None for an empty or unparseable body"""
+        title, body = self.product_region(content)
+        try:
+            root = lxml_html.fromstring(body) if body.strip() else None
+        except (etree.ParserError, ValueError):
+            root = None
+        return title, body, root
+    
+    def needs_browser(self, root):
+        """Same JavaScript-rendered heuristic as page_needs_browser"""
+        if root is None:
+            return True
+        for app_root in self.APP_ROOTS(root):
+            if not app_root.text_content().strip():
+                return True
+        return sum(len(text.strip()) for text in self.TEXT_NODES(root)) < 200
+    
+    def tree_candidates(self, title, body, root, url=''):
+        config = product_candidates_config()
+        
+        def first_texts(selectors):
+            texts = []
+            for selector in selectors:
+                matches = self.SELECTORS[selector](root) if root is not None else []
+                texts.append([selector, ' '.join(matches[0].text_content().split()) if matches else ''])
+            return texts
+        
+        def dimension(value):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return 0
+        
+        # Match text nodes only, like the soup gatherer: body is markup, and attributes are not on the page
+        page_text = ' '.join(self.TEXT_NODES(root)) if root is not None else ''
+        lower = f"{title or ''} {page_text}".lower()
+        price_match = None
+        for pattern in PRICE_PATTERNS:
+            match = re.search(pattern, page_text)
+            if match:
+                price_match = match.group()
+                break
+        
+        currency_texts = []
+        for element in (root.iter() if root is not None else []):
+            if len(currency_texts) >= 50:
+                break
+            if not isinstance(element.tag, str):
+                continue
+            own_text = (element.text or '') + ''.join(child.tail or '' for child in element)
+            if CURRENCY_TEXT_PATTERN.search(own_text):
+                currency_texts.append(' '.join(element.text_content().split()))
+        
+        return {
+            'url': url,
+            'title': title or '',
+            'errorMessages': [message for message in config['errorMessages'] if message in lower],
+            'errorContexts': [context for context in config['errorContexts'] if context in lower],
+            'productNotFound': 'product not found' in lower,
+            'names': first_texts(PRODUCT_NAME_SELECTORS),
+            'mrps': first_texts(PRODUCT_MRP_SELECTORS),
+            'prices': first_texts(PRODUCT_PRICE_SELECTORS),
+            'brands': first_texts(PRODUCT_BRAND_SELECTORS),
+            'priceMatch': price_match,
+            'currencyTexts': currency_texts,
+            'images': [
+                {'src': img.get('src', ''), 'width': dimension(img.get('width')), 'height': dimension(img.get('height'))}
+                for img in (self.IMAGES(root) if root is not None else [])
+            ]
+        }
+    
+    def candidates(self, content, url=''):
+        return self.tree_candidates(*self.parse(content), url=url)
+    
+    def classify(self, content, barcode, url=''):
+        title, body, root = self.parse(content)
+        if self.needs_browser(root):
+            return 'needs_browser', None
+        return 'extracted', extract_product(self.tree_candidates(title, body, root, url), barcode)
+
+HTML_PARSER_BACKENDS = {
+    SoupParserBackend.name: SoupParserBackend,
+    LxmlParserBackend.name: LxmlParserBackend
+}
+
+def create_html_parser_backend(name):
+    """Instantiate the configured parser backend, falling back to html.parser for an unknown name"""
+    backend_class = HTML_PARSER_BACKENDS.get(name)
+    if backend_class is None:
+        print(f"WARNING: Unknown HTML_PARSER_BACKEND '{name}' (allowed: {', '.join(HTML_PARSER_BACKENDS)}); "
+              f"using {SoupParserBackend.name}")
+        backend_class = SoupParserBackend
+    return backend_class()
+
+html_parser_backend = create_html_parser_backend(app.config['HTML_PARSER_BACKEND'])
+
+def extract_product_from_html(content, barcode, backend=None, url=''):
+    """Classify a server-rendered page as ('found', product), ('needs_browser', None) or ('not_found', product)"""
+    outcome, product_data = (backend or html_parser_backend).classify(content, barcode, url)
+    if outcome == 'needs_browser':
+        return outcome, None
+    if has_key_product_fields(product_data):
+        return 'found', product_data
+    return 'not_found', product_data
+
+def fetch_product_data_http(barcode, url):
+    """Tier 1: fetch with the pooled session and run the configured HTML parser backend.
+
+    Returns the product dict when the server-rendered page has a name and a
+    price, otherwise None so the caller can escalate to the browser.
+    """
+    health = get_host_health(url)
+    health.acquire(app.config['HOST_HEALTH_ACQUIRE_TIMEOUT'])
+    host_ok = None
+    try:
+        try:
+            wait_for_host_slot(url)
+            started = time.monotonic()
+            try:
+                response = scrape_http_session.get(url, timeout=15)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                host_ok = False
+                raise TransientFetchError(f"HTTP request failed for {barcode}: {e}")
+            
+            host_ok = response.status_code not in HOST_FAILURE_STATUSES
+            if not host_ok:
+                raise TransientFetchError(f"HTTP {response.status_code} for {barcode}")
+        finally:
+            # Any other error (redirect loops, bad encodings, rate limiter failures) is not the host's fault
+            health.release(host_ok, time.monotonic() - started if host_ok is not None else None)
+        
+        response.raise_for_status()
+        store_page(barcode, url, response.content, 'http')
+        
+        outcome, product_data = extract_product_from_html(response.content, barcode, url=response.url)
+        if outcome == 'found':
+            record_tier_result('http', True)
+            return product_data
+        
+        if outcome == 'needs_browser':
+            print(f"DEBUG: HTTP tier - {barcode} is JavaScript-rendered, escalating to browser")
+        else:
+            print(f"DEBUG: HTTP tier - key fields missing for {barcode}, escalating to browser")
+    except requests.exceptions.RequestException as e:
+        print(f"DEBUG: HTTP tier - request failed for {barcode}: {e}")
+    
+    record_tier_result('http', False)
+    return None
+
+# Shared pool of headless browsers for all Selenium scraping paths
+BROWSER_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+HIDE_WEBDRIVER_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+# Counts in-flight fetch/XHR requests and the last DOM or network activity, for the network-idle signal
+NETWORK_TRACKER_SCRIPT = r"""
+(() => {
+    if (window.__pageActivity) return;
+    const activity = window.__pageActivity = {pending: 0, last: performance.now()};
+    const touch = () => { activity.last = performance.now(); };
+    const begin = () => { activity.pending++; touch(); };
+    const end = () => { activity.pending = Math.max(0, activity.pending - 1); touch(); };
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function () {
+            begin();
+            return originalFetch.apply(this, arguments).finally(end);
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        begin();
+        this.addEventListener('loadend', end, {once: true});
+        return originalSend.apply(this, arguments);
+    };
+    new MutationObserver(touch).observe(document, {childList: true, subtree: true, characterData: true});
+})();
+"""
+chrome_driver_path = None  # resolved once by ChromeDriverManager when Selenium can't find a driver itself
+
+def browser_chrome_options():
+    """Chrome options shared by every pooled driver"""
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument(f'--user-agent={BROWSER_USER_AGENT}')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    if app.config['BROWSER_LEAN_PROFILE']:
+        apply_lean_profile(chrome_options)
+    return chrome_options
+
+def apply_lean_profile(browser_options):
+    """Return from get() at DOMContentLoaded and skip extensions and background work"""
+    browser_options.page_load_strategy = 'eager'
+    browser_options.add_argument('--disable-extensions')
+    browser_options.add_argument('--disable-component-extensions-with-background-pages')
+    browser_options.add_argument('--disable-background-networking')
+    browser_options.add_argument('--mute-audio')
+    return browser_options
+
+def block_heavy_resources(driver):
+    """Block images, media, fonts, stylesheets and trackers for every page this driver loads"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': app.config['BROWSER_BLOCKED_URL_PATTERNS']})
+    except Exception as e:
+        print(f"DEBUG: Could not enable resource blocking: {e}")
+
+def create_browser_driver():
+    """Launch a headless browser: Chrome via Selenium Manager, then ChromeDriverManager, then Edge"""
+    global chrome_driver_path
+    
+    try:
+        driver = webdriver.Chrome(options=browser_chrome_options())
+    except Exception as e1:
+        print(f"DEBUG: Direct Chrome initialization failed: {e1}")
+        try:
+            if chrome_driver_path is None:
+                chrome_driver_path = ChromeDriverManager().install()
+            driver = webdriver.Chrome(service=Service(chrome_driver_path), options=browser_chrome_options())
+        except Exception as e2:
+            print(f"DEBUG: ChromeDriverManager failed: {e2}")
+            from selenium.webdriver.edge.service import Service as EdgeService
+            from selenium.webdriver.edge.options import Options as EdgeOptions
+            from webdriver_manager.microsoft import EdgeChromiumDriverManager
+            
+            edge_options = EdgeOptions()
+            edge_options.add_argument('--headless')
+            edge_options.add_argument('--no-sandbox')
+            edge_options.add_argument('--disable-dev-shm-usage')
+            edge_options.add_argument('--disable-gpu')
+            edge_options.add_argument('--window-size=1920,1080')
+            edge_options.add_argument(f'--user-agent={BROWSER_USER_AGENT}')
+            if app.config['BROWSER_LEAN_PROFILE']:
+                apply_lean_profile(edge_options)
+            driver = webdriver.Edge(service=EdgeService(EdgeChromiumDriverManager().install()), options=edge_options)
+    
+    # Hide the webdriver flag on every page this driver will load, not just the current one
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': HIDE_WEBDRIVER_SCRIPT})
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_SCRIPT})
+    except Exception:
+        driver.execute_script(HIDE_WEBDRIVER_SCRIPT)
+    if app.config['BROWSER_LEAN_PROFILE']:
+        block_heavy_resources(driver)
+    return driver
+
+def browser_process_rss_mb(driver):
+    """Resident memory of a driver's process tree in MB, read from /proc (None where unavailable)"""
+    try:
+        pending = [driver.service.process.pid]
+    except AttributeError:
+        return None
+    
+    total_kb = 0
+    seen = set()
+    while pending:
+        pid = pending.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        try:
+            with open(f'/proc/{pid}/status') as status_file:
+                for line in status_file:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+            with open(f'/proc/{pid}/task/{pid}/children') as children_file:
+                pending.extend(int(child) for child in children_file.read().split())
+        except (OSError, ValueError):
+            if len(seen) == 1:
+                return None
+    return total_kb / 1024
+
+class BrowserPool:
+    """Pool of long-lived headless browsers.
+
+    Drivers are checked out for one page at a time and returned afterwards.
+    A driver is health-checked before reuse and replaced when it fails,
+    after max_pages page loads, or when its process tree grows past
+    max_rss_mb. Cookies and site storage are cleared on checkin so nothing
+    carries over between checkouts. At most size drivers exist at once;
+    checkout blocks until one is free.
+    """
+    
+    def __init__(self, size, max_pages, max_rss_mb, checkout_timeout):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.checkout_timeout = checkout_timeout
+        self._condition = threading.Condition()
+        self._idle = []
+        self._entries = {}
+        self._total = 0
+        self._closed = False
+        self.created_count = 0
+        self.recycled_count = 0
+        self.checkout_count = 0
+    
+    def _create_entry(self):
+        started = time.time()
+        driver = create_browser_driver()
+        entry = {'driver': driver, 'pages': 0, 'createdAt': datetime.now().isoformat()}
+        with self._condition:
+            self._entries[id(driver)] = entry
+            self.created_count += 1
+        print(f"DEBUG: Browser pool - started driver in {time.time() - started:.1f}s")
+        return entry
+    
+    def _quit_entry(self, entry, reason):
+        with self._condition:
+            self._entries.pop(id(entry['driver']), None)
+            self.recycled_count += 1
+        print(f"DEBUG: Browser pool - recycling driver after {entry['pages']} pages ({reason})")
+        try:
+            entry['driver'].quit()
+        except Exception:
+            pass
+    
+    def _is_healthy(self, entry):
+        try:
+            return entry['driver'].execute_script('return 1') == 1
+        except Exception:
+            return False
+    
+    def _reset_session(self, entry):
+        """Clear cookies and the current origin's storage; returns False if the driver could not be reset"""
+        driver = entry['driver']
+        try:
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            origin = driver.execute_script('return location.origin')
+            if origin and origin != 'null':
+                driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+            return True
+        except Exception as e:
+            print(f"DEBUG: Browser pool - session reset failed: {e}")
+            return False
+    
+    def _recycle_reason(self, entry):
+        if self.max_pages and entry['pages'] >= self.max_pages:
+            return f'page limit {self.max_pages}'
+        if self.max_rss_mb:
+            rss_mb = browser_process_rss_mb(entry['driver'])
+            if rss_mb is not None and rss_mb > self.max_rss_mb:
+                return f'RSS {rss_mb:.0f}MB'
+        return None
+    
+    def prewarm(self, count=None):
+        """Start drivers up to count (default: pool size) so the first scrapes skip browser startup"""
+        count = min(count or self.size, self.size)
+        while True:
+            with self._condition:
+                if self._closed or self._total >= count:
+                    return
+                self._total += 1
+            try:
+                entry = self._create_entry()
+            except Exception as e:
+                with self._condition:
+                    self._total -= 1
+                    self._condition.notify()
+                print(f"DEBUG: Browser pool - prewarm failed: {e}")
+                return
+            if not self._return_idle(entry):
+                self._quit_entry(entry, 'shutdown')
+    
+    def _return_idle(self, entry):
+        """Put an entry back in the idle list unless the pool is shut down (then the caller quits it)"""
+        with self._condition:
+            if self._closed:
+                self._total -= 1
+                self._condition.notify_all()
+                return False
+            self._idle.append(entry)
+            self._condition.notify()
+            return True
+    
+    def checkout(self, timeout=None):
+        """Take a healthy driver from the pool, starting one if the pool isn't full.
+
+        Raises TimeoutError if none frees up within timeout (default
+        checkout_timeout) and RuntimeError once the pool is shut down.
+        """
+        deadline = time.time() + (self.checkout_timeout if timeout is None else timeout)
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError('Browser pool is shut down')
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    entry = None
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError('No browser available in the pool')
+                self._condition.wait(remaining)
+            self.checkout_count += 1
+        
+        try:
+            if entry is not None and not self._is_healthy(entry):
+                self._quit_entry(entry, 'failed health check')
+                entry = None
+            if entry is None:
+                entry = self._create_entry()
+        except Exception:
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            raise
+        return entry['driver']
+    
+    def checkin(self, driver, healthy=True):
+        """Return a driver after one page; it is recycled if broken or past its limits, and quit after shutdown"""
+        with self._condition:
+            entry = self._entries.get(id(driver))
+            closed = self._closed
+        if entry is None:
+            return
+        
+        entry['pages'] += 1
+        if closed:
+            reason = 'shutdown'
+        elif not healthy:
+            reason = 'driver error'
+        else:
+            reason = self._recycle_reason(entry)
+            if not reason and not self._reset_session(entry):
+                reason = 'session reset failed'
+        if reason:
+            self._quit_entry(entry, reason)
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            return
+        
+        if not self._return_idle(entry):
+            self._quit_entry(entry, 'shutdown')
+    
+    @contextmanager
+    def browser(self, timeout=None):
+        """Check out a driver for the duration of a with block"""
+        driver = self.checkout(timeout)
+        healthy = True
+        try:
+            yield driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self.checkin(driver, healthy)
+    
+    def shutdown(self, quit_busy=False):
+        """Quit all idle drivers; busy ones are quit when checked back in, or now with quit_busy (process exit)"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            busy = [entry for entry in self._entries.values() if entry not in idle] if quit_busy else []
+            self._condition.notify_all()
+        for entry in idle + busy:
+            self._quit_entry(entry, 'shutdown')
+    
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self.size,
+                'closed': self._closed,
+                'total': self._total,
+                'idle': len(self._idle),
+                'busy': self._total - len(self._idle),
+                'created': self.created_count,
+                'recycled': self.recycled_count,
+                'checkouts': self.checkout_count,
+                'maxPages': self.max_pages,
+                'maxRssMb': self.max_rss_mb,
+                'leanProfile': app.config['BROWSER_LEAN_PROFILE'],
+                'drivers': [
+                    {'pages': entry['pages'], 'createdAt': entry['createdAt']}
+                    for entry in self._entries.values()
+                ]
+            }
+
+browser_pool = BrowserPool(
+    app.config['BROWSER_POOL_SIZE'],
+    app.config['BROWSER_POOL_MAX_PAGES'],
+    app.config['BROWSER_POOL_MAX_RSS_MB'],
+    app.config['BROWSER_POOL_CHECKOUT_TIMEOUT']
+)
+# Quit every pooled browser when the worker exits, including ones a daemon thread still holds
+atexit.register(browser_pool.shutdown, quit_busy=True)
+
+if app.config['BROWSER_POOL_PREWARM']:
+    threading.Thread(target=browser_pool.prewarm, daemon=True).start()
+
+def browser_get(driver, url):
+    """Load url in a pooled driver under the host's health tracker and wait for readiness.
+
+    Returns the readiness report; raises TransientFetchError when the circuit
+    is open or the page load times out.
+    """
+    health = get_host_health(url)
+    health.acquire(app.config['HOST_HEALTH_ACQUIRE_TIMEOUT'])
+    outcome = None
+    try:
+        wait_for_host_slot(url)
+        started = time.monotonic()
+        try:
+            driver.get(url)
+        except TimeoutException as e:
+            outcome = False
+            raise TransientFetchError(f"Page load timed out for {url}: {e}")
+        
+        readiness = wait_for_page_ready(driver)
+        outcome = True
+        return readiness
+    finally:
+        health.release(outcome, time.monotonic() - started if outcome is not None else None)
+
+def fetch_product_data_internal(barcode, url):
+    """Internal function to fetch product data (used by background processor)"""
+    product_data = fetch_product_data_http(barcode, url)
+    if product_data:
+        return {'success': True, 'product': product_data, 'tier': 'http'}
+    
+    result = fetch_product_data_browser(barcode, url)
+    record_tier_result('browser', bool(result and result.get('success')))
+    if result is not None:
+        result['tier'] = 'browser'
+    return result
+
+def fetch_product_data_browser(barcode, url):
+    """Fetch product data with a pooled headless browser"""
+    driver = None
+    driver_healthy = True
+    try:
+        # Check out a pooled browser
+        try:
+            driver = browser_pool.checkout()
+        except Exception as e:
+            print(f"DEBUG: Background processor - Chrome driver failed: {e}")
+            return None
+        
+        # Navigate and wait until the product or an error marker has rendered
+        # (pacing is left to the host rate limiter and health tracker)
+        browser_get(driver, url)
+        
+        # Extract product data
+        page_source = driver.page_source
+        store_page(barcode, url, page_source, 'browser')
+        product_data = extract_product_data_selenium(driver, barcode)
+        
+        if product_data and (product_data.get('name') != 'N/A' or product_data.get('price') != 'N/A'):
+            return {'success': True, 'product': product_data}
+        else:
+            return {'success': False, 'product': empty_product(barcode)}
+            
+    except TransientFetchError:
+        raise
+    except Exception as e:
+        print(f"DEBUG: Background processor - Error fetching {barcode}: {e}")
+        driver_healthy = not isinstance(e, WebDriverException)
+        return None
+    finally:
+        if driver:
+            browser_pool.checkin(driver, driver_healthy)
+
+def start_background_processor():
+    """Start the background processor in continuous real-time mode"""
+    global background_processor
+    
+    if background_processor and background_processor.is_alive():
+        print("DEBUG: Background processor already running")
+        return False
+    
+    def continuous_processor():
+        """Continuously process unfound barcodes in real-time"""
+        processing_status['running'] = True
+        print("DEBUG: 🚀 Background processor started in CONTINUOUS REAL-TIME mode")
+        
+        while processing_status['running']:
+            try:
+                # Check for unfound barcodes to process
+                unfound_barcodes = get_unfound_barcodes_for_processing()
+                
+                if unfound_barcodes:
+                    print(f"DEBUG: 🔄 Found {len(unfound_barcodes)} barcodes to process")
+                    
+                    def process_barcode(i, barcode_data):
+                        if not processing_status['running']:
+                            return
+                        
+                        print(f"DEBUG: Processing barcode {barcode_data['barcode']} ({i+1}/{len(unfound_barcodes)})")
+                        processing_status['current_barcode'] = barcode_data['barcode']
+                        
+                        # Process the barcode (pacing is enforced by the per-host rate limiter)
+                        result = process_single_barcode(barcode_data)
+                        
+                        if result:
+                            print(f"DEBUG: ✅ Successfully processed {barcode_data['barcode']}")
+                        else:
+                            print(f"DEBUG: ❌ Failed to process {barcode_data['barcode']}")
+                    
+                    # Process the batch on the scraper worker pool
+                    wait([
+                        scrape_executor.submit(process_barcode, i, barcode_data)
+                        for i, barcode_data in enumerate(unfound_barcodes)
+                    ])
+                    
+                    if not processing_status['running']:
+                        print("DEBUG: Background processor stopped by user")
+                        break
+                    
+                    processing_status['current_barcode'] = None
+                    print(f"DEBUG: ✅ Completed processing batch of {len(unfound_barcodes)} barcodes")
+                    
+                    # Pause while the site's circuit is open instead of requeueing the next batch straight away
+                    retry_after = get_host_health(SMART_CONSUMER_URL).retry_after()
+                    if retry_after:
+                        print(f"DEBUG: ⏸️ Smart Consumer circuit open, pausing {retry_after:.0f} seconds")
+                        time.sleep(retry_after)
+                else:
+                    print("DEBUG: No unfound barcodes to process, waiting 30 seconds...")
+                    time.sleep(30)  # Wait 30 seconds before checking again
+                    
+            except Exception as e:
+                print(f"DEBUG: Error in continuous processor: {e}")
+                time.sleep(60)  # Wait 1 minute on error before retrying
+        
+        print("DEBUG: Background processor stopped")
+    
+    background_processor = threading.Thread(target=continuous_processor, daemon=True)
+    background_processor.start()
+    
+    print("DEBUG: 🚀 Background processor started in CONTINUOUS REAL-TIME mode")
+    return True
+
+def get_unfound_barcodes_for_processing():
     """Get unfound barcodes that need processing"""
     try:
         if not db:
@@ -2390,10 +4503,13 @@ def get_unfound_barcodes_for_processing():
             barcode_data = doc.to_dict()
             barcode_data['id'] = doc.id
             
-            # Process all unfound barcodes - no retry logic needed since we delete failed ones
+            # Skip barcodes still backing off after a transient failure
+            if not is_due_for_attempt(barcode_data):
+                continue
             unfound_barcodes.append(barcode_data)
             print(f"DEBUG: Adding barcode for processing: {barcode_data['barcode']}")
         
+        unfound_barcodes = filter_negatively_cached(unfound_barcodes)
         print(f"DEBUG: Found {len(unfound_barcodes)} barcodes to process")
         return unfound_barcodes
         
@@ -2407,70 +4523,244 @@ def process_single_barcode(barcode_data):
         barcode = barcode_data['barcode']
         print(f"DEBUG: Processing barcode: {barcode}")
         
-        # Add human-like delay
-        import random
-        delay = random.uniform(2, 4)
-        print(f"DEBUG: Background processor - Waiting {delay:.1f} seconds (human-like delay)...")
-        time.sleep(delay)
-        
         # Try to fetch product data
         url = f"https://smartconsumer-beta.org/{barcode}"
-        result = fetch_product_data_internal(barcode, url)
+        try:
+            result = fetch_product_data_internal(barcode, url)
+        except TransientFetchError as e:
+            requeue_unfound_barcode(barcode_data, e)
+            return False
         
-        if result and result.get('status') == 'success':
-            product_data = result['product']
-            product_data['source'] = 'background_retry'
-            product_data['originalUnfoundId'] = barcode_data['id']
-            product_data['createdAt'] = datetime.now().isoformat()
-            
-            # Add directly to barcode_cache collection (main database) with verified: false
-            barcode_cache_data = {
-                'barcode': barcode,
-                'name': product_data.get('name', 'Unknown'),
-                'price': product_data.get('price', 'N/A'),
-                'mrp': product_data.get('mrp', product_data.get('price', 'N/A')),
-                'image': product_data.get('image'),
-                'brand': product_data.get('brand', ''),
-                'category': product_data.get('category', ''),
-                'description': product_data.get('description', ''),
-                'verified': False,  # Ready for admin verification
-                'source': 'background_processor',
-                'createdAt': datetime.now().isoformat(),
-                'originalUnfoundId': barcode_data['id'],
-                'scrapedAt': datetime.now().isoformat()
-            }
-            print(f"DEBUG: Adding to barcode_cache: {barcode_cache_data}")
-            db.collection('barcode_cache').document(barcode).set(barcode_cache_data)
-            print(f"DEBUG: ✅ Successfully added {barcode} to barcode_cache")
-            
-            # Remove from unfound barcodes
-            print(f"DEBUG: Removing {barcode} from unfound_barcodes")
-            db.collection('unfound_barcodes').document(barcode_data['id']).delete()
-            print(f"DEBUG: ✅ Successfully removed {barcode} from unfound_barcodes")
-            
-            print(f"DEBUG: ✅ Successfully processed and moved {barcode} to main database")
+        if result is None:
+            requeue_unfound_barcode(barcode_data, TransientFetchError(f"Lookup failed for {barcode}"))
+            return False
+        if result.get('success'):
+            save_scraped_product(barcode_data, result['product'])
             return True
         else:
-            # Update retry count and timestamp
-            retry_count = barcode_data.get('retryCount', 0) + 1
-            db.collection('unfound_barcodes').document(barcode_data['id']).update({
-                'retryCount': retry_count,
-                'lastRetry': datetime.now().isoformat()
-            })
-            
-            print(f"DEBUG: ❌ Still not found: {barcode} (retry #{retry_count})")
-            
-            # Human-like delay before next barcode
-            delay = random.uniform(8, 15)
-            print(f"DEBUG: Waiting {delay:.1f} seconds before next barcode (human-like delay)...")
-            time.sleep(delay)
-            
+            record_unfound_retry(barcode_data)
             return False
             
     except Exception as e:
         print(f"DEBUG: Error processing barcode {barcode_data['barcode']}: {e}")
         return False
 
+def save_scraped_product(barcode_data, product_data):
+    """Move a scraped product into barcode_cache (unverified) and drop it from unfound_barcodes"""
+    barcode = barcode_data['barcode']
+    product_data['source'] = 'background_retry'
+    product_data['originalUnfoundId'] = barcode_data['id']
+    product_data['createdAt'] = datetime.now().isoformat()
+    
+    # Add directly to barcode_cache collection (main database) with verified: false
+    barcode_cache_data = barcode_cache_fields(product_data)
+    barcode_cache_data.update({
+        'barcode': barcode,
+        'verified': False,  # Ready for admin verification
+        'source': 'background_processor',
+        'createdAt': datetime.now().isoformat(),
+        'originalUnfoundId': barcode_data['id'],
+        'scrapedAt': datetime.now().isoformat()
+    })
+    print(f"DEBUG: Adding to barcode_cache: {barcode_cache_data}")
+    db.collection('barcode_cache').document(barcode).set(barcode_cache_data)
+    invalidate_barcode_cache(barcode)
+    clear_negative_result(barcode)
+    print(f"DEBUG: ✅ Successfully added {barcode} to barcode_cache")
+    
+    # Remove from unfound barcodes
+    print(f"DEBUG: Removing {barcode} from unfound_barcodes")
+    db.collection('unfound_barcodes').document(barcode_data['id']).delete()
+    print(f"DEBUG: ✅ Successfully removed {barcode} from unfound_barcodes")
+    
+    print(f"DEBUG: ✅ Successfully processed and moved {barcode} to main database")
+
+def record_unfound_retry(barcode_data):
+    """Bump retryCount/lastRetry on an unfound barcode that is still not found and record the miss"""
+    retry_count = barcode_data.get('retryCount', 0) + 1
+    db.collection('unfound_barcodes').document(barcode_data['id']).update({
+        'retryCount': retry_count,
+        'lastRetry': datetime.now().isoformat()
+    })
+    
+    record_negative_result(barcode_data['barcode'])
+    print(f"DEBUG: ❌ Still not found: {barcode_data['barcode']} (retry #{retry_count})")
+
+# Asyncio HTTP scraping engine: many plain-HTTP lookups in flight from one thread
+class AsyncScrapeEngine:
+    """Scrape unfound barcodes over plain HTTP with one pooled aiohttp client.
+
+    Up to `concurrency` lookups are in flight at once (still paced by the
+    per-host token bucket). Each request has a timeout and each barcode a
+    total deadline; transient failures are retried with exponential
+    backoff under the host's health tracker, then requeued. Found products
+    go through save_scraped_product and misses through record_unfound_retry,
+    the same as process_single_barcode.
+    JavaScript-rendered pages are left untouched for the browser processor.
+    """
+    
+    def __init__(self, concurrency, request_timeout, deadline, max_retries,
+                 url_template="https://smartconsumer-beta.org/01/{barcode}"):
+        self.url_template = url_template
+        self.concurrency = max(1, concurrency)
+        self.request_timeout = request_timeout
+        self.deadline = deadline
+        self.max_retries = max(1, max_retries)
+        self.status = {
+            'running': False,
+            'total': 0,
+            'completed': 0,
+            'found': 0,
+            'not_found': 0,
+            'needs_browser': 0,
+            'requeued': 0,
+            'errors': 0,
+            'started_at': None,
+            'finished_at': None
+        }
+        self._thread = None
+    
+    async def _fetch(self, session, url):
+        """GET a page, retrying timeouts, connection errors and 429/5xx with backoff"""
+        health = get_host_health(url)
+        for attempt in range(self.max_retries):
+            await health.acquire_async()
+            # No await between taking the slot and the try, so a cancellation (the per-barcode
+            # deadline) always reaches the finally and releases it
+            started = time.monotonic()
+            outcome = None
+            try:
+                await get_host_limiter(url).acquire_async()
+                started = time.monotonic()
+                async with session.get(url) as response:
+                    outcome = response.status not in HOST_FAILURE_STATUSES
+                    if response.status in HOST_FAILURE_STATUSES and attempt < self.max_retries - 1:
+                        raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+                    if response.status == 404:
+                        return None
+                    response.raise_for_status()
+                    return await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if outcome is None:
+                    outcome = False
+                retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status in HOST_FAILURE_STATUSES
+                if not retryable:
+                    raise
+                if attempt == self.max_retries - 1:
+                    raise TransientFetchError(f"Giving up on {url}: {e}")
+                delay = (2 ** attempt) + random.uniform(0, 1)
+                print(f"DEBUG: Async scraper - retrying {url} in {delay:.1f}s ({e})")
+            finally:
+                health.release(outcome, time.monotonic() - started if outcome is not None else None)
+            await asyncio.sleep(delay)
+    
+    async def _process(self, session, semaphore, barcode_data):
+        loop = asyncio.get_running_loop()
+        barcode = barcode_data['barcode']
+        url = self.url_template.format(barcode=barcode)
+        
+        async with semaphore:
+            try:
+                content = await asyncio.wait_for(self._fetch(session, url), self.deadline)
+                if content is None:
+                    outcome, product_data = 'not_found', None
+                else:
+                    # Parsing and disk writes stay off the event loop
+                    await loop.run_in_executor(None, store_page, barcode, url, content, 'http')
+                    outcome, product_data = await loop.run_in_executor(None, extract_product_from_html, content, barcode, None, url)
+                
+                if outcome == 'found':
+                    record_tier_result('http', True)
+                    await loop.run_in_executor(None, save_scraped_product, barcode_data, product_data)
+                    self.status['found'] += 1
+                elif outcome == 'not_found':
+                    record_tier_result('http', False)
+                    await loop.run_in_executor(None, record_unfound_retry, barcode_data)
+                    self.status['not_found'] += 1
+                else:
+                    record_tier_result('http', False)
+                    self.status['needs_browser'] += 1
+            except (TransientFetchError, asyncio.TimeoutError) as e:
+                print(f"DEBUG: Async scraper - requeueing {barcode}: {e}")
+                await loop.run_in_executor(None, requeue_unfound_barcode, barcode_data, e)
+                self.status['requeued'] += 1
+            except Exception as e:
+                print(f"DEBUG: Async scraper - error processing {barcode}: {e}")
+                self.status['errors'] += 1
+            finally:
+                self.status['completed'] += 1
+    
+    async def run(self, barcodes):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=SCRAPE_HTTP_HEADERS) as session:
+            await asyncio.gather(*(self._process(session, semaphore, barcode_data) for barcode_data in barcodes))
+    
+    def start(self, barcodes):
+        """Run the engine over barcodes on a background thread; False if already running"""
+        if self._thread and self._thread.is_alive():
+            return False
+        
+        self.status.update({
+            'running': True,
+            'total': len(barcodes),
+            'completed': 0,
+            'found': 0,
+            'not_found': 0,
+            'needs_browser': 0,
+            'requeued': 0,
+            'errors': 0,
+            'started_at': datetime.now().isoformat(),
+            'finished_at': None
+        })
+        
+        def run_loop():
+            try:
+                asyncio.run(self.run(barcodes))
+            except Exception as e:
+                print(f"DEBUG: Async scraper error: {e}")
+            finally:
+                self.status['running'] = False
+                self.status['finished_at'] = datetime.now().isoformat()
+                print(f"DEBUG: Async scraper finished: {self.status}")
+        
+        self._thread = threading.Thread(target=run_loop, daemon=True)
+        self._thread.start()
+        return True
+
+async_scrape_engine = AsyncScrapeEngine(
+    app.config['ASYNC_SCRAPER_CONCURRENCY'],
+    app.config['ASYNC_SCRAPER_REQUEST_TIMEOUT'],
+    app.config['ASYNC_SCRAPER_DEADLINE'],
+    app.config['ASYNC_SCRAPER_MAX_RETRIES']
+)
+
+@app.route('/api/async-scraper/start', methods=['POST'])
+@login_required
+def start_async_scraper():
+    """Scrape all unfound barcodes with the asyncio HTTP engine"""
+    try:
+        if not db:
+            return jsonify({'status': 'error', 'message': 'Database not available'}), 500
+        
+        barcodes = get_unfound_barcodes_for_processing()
+        if not async_scrape_engine.start(barcodes):
+            return jsonify({'status': 'error', 'message': 'Async scraper is already running'}), 409
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'Async scraper started for {len(barcodes)} barcodes',
+            'data': async_scrape_engine.status
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Failed to start async scraper: {str(e)}'}), 500
+
+@app.route('/api/async-scraper/status', methods=['GET'])
+def get_async_scraper_status():
+    """Get progress of the asyncio HTTP scraping engine"""
+    return jsonify({'status': 'success', 'data': async_scrape_engine.status})
+
 def stop_background_processor():
     """Stop the background processor"""
     global background_processor
@@ -2483,34 +4773,14 @@ def fallback_to_requests_scraping(url, barcode):
     try:
         print("DEBUG: Using requests-based scraping fallback...")
         
-        # Enhanced headers to better mimic a real browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0',
-            'DNT': '1'
-        }
-        
-        # Add a random delay to avoid being blocked
-        import random
-        time.sleep(random.uniform(1, 3))
-        
-        # Create a session for better connection handling
-        session = requests.Session()
-        session.headers.update(headers)
+        # Use the pooled session (keep-alive, browser-like headers)
+        session = scrape_http_session
         
         # Make the request with retries
         max_retries = 3
         for attempt in range(max_retries):
             try:
+                wait_for_host_slot(url)
                 response = session.get(url, timeout=15)
                 response.raise_for_status()
                 break
@@ -2519,15 +4789,11 @@ def fallback_to_requests_scraping(url, barcode):
                     raise e
                 time.sleep(2 ** attempt)  # Exponential backoff
         
-        # Parse the HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        print(f"DEBUG: Fallback - Page title: {soup.find('title').get_text() if soup.find('title') else 'No title found'}")
         print(f"DEBUG: Fallback - Response status: {response.status_code}")
         print(f"DEBUG: Fallback - Content length: {len(response.content)}")
         
-        # Extract product information from the page
-        product_data = extract_product_data(soup, barcode)
+        # Extract product information from the page with the configured parser backend
+        product_data = html_parser_backend.classify(response.content, barcode, response.url)[1]
         
         if product_data and (product_data.get('name') != 'N/A' or product_data.get('price') != 'N/A'):
             return jsonify({
@@ -2549,7 +4815,7 @@ def fallback_to_requests_scraping(url, barcode):
             'success': False,
             'status': 'error',
             'message': f'Network error in fallback: {str(e)}',
-            'product': create_empty_product_data(barcode)
+            'product': empty_product(barcode)
         }), 500
         
     except Exception as e:
@@ -2557,13 +4823,14 @@ def fallback_to_requests_scraping(url, barcode):
             'success': False,
             'status': 'error',
             'message': f'Unexpected error in fallback: {str(e)}',
-            'product': create_empty_product_data(barcode)
+            'product': empty_product(barcode)
         }), 500
 
 # Data Getter API Endpoint
 @app.route('/api/fetch-product-data', methods=['POST'])
 def fetch_product_data():
     driver = None
+    driver_healthy = True
     try:
         data = request.get_json()
         if not data or 'barcode' not in data:
@@ -2577,140 +4844,57 @@ def fetch_product_data():
         print(f"DEBUG: Fetching product data for barcode: {barcode}")
         print(f"DEBUG: URL: {url}")
         
-        # Setup Chrome options for headless browsing
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')  # Run in headless mode
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # Initialize Chrome driver with better Windows compatibility
+        # Try plain HTTP first; only JavaScript-rendered or incomplete pages need the browser
+        product_data = fetch_product_data_http(barcode, url)
+        if product_data:
+            print("DEBUG: ✅ Required fields extracted over plain HTTP")
+            return jsonify({
+                'success': True,
+                'status': 'found',
+                'tier': 'http',
+                'product': product_data
+            }), 200
+        
+        # Check out a pooled browser (started once and reused across requests); the request
+        # path only waits briefly for a busy pool so it stays well inside the worker timeout
         try:
-            # Try multiple approaches for Chrome driver initialization
-            driver = None
-            
-            # Approach 1: Use ChromeDriverManager with specific version
-            try:
-                print("DEBUG: Attempting Chrome driver initialization with ChromeDriverManager...")
-                service = Service(ChromeDriverManager().install())
-                driver = webdriver.Chrome(service=service, options=chrome_options)
-                print("DEBUG: Chrome driver initialized successfully with ChromeDriverManager")
-            except Exception as e1:
-                print(f"DEBUG: ChromeDriverManager failed: {e1}")
-                
-                # Approach 2: Try without service (let Selenium find driver)
-                try:
-                    print("DEBUG: Attempting Chrome driver initialization without service...")
-                    driver = webdriver.Chrome(options=chrome_options)
-                    print("DEBUG: Chrome driver initialized successfully without service")
-                except Exception as e2:
-                    print(f"DEBUG: Direct Chrome initialization failed: {e2}")
-                    
-                    # Approach 3: Try Edge WebDriver as fallback
-                    try:
-                        print("DEBUG: Attempting Edge WebDriver as fallback...")
-                        from selenium.webdriver.edge.service import Service as EdgeService
-                        from selenium.webdriver.edge.options import Options as EdgeOptions
-                        from webdriver_manager.microsoft import EdgeChromiumDriverManager
-                        
-                        edge_options = EdgeOptions()
-                        edge_options.add_argument('--headless')
-                        edge_options.add_argument('--no-sandbox')
-                        edge_options.add_argument('--disable-dev-shm-usage')
-                        edge_options.add_argument('--disable-gpu')
-                        edge_options.add_argument('--window-size=1920,1080')
-                        edge_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-                        
-                        edge_service = EdgeService(EdgeChromiumDriverManager().install())
-                        driver = webdriver.Edge(service=edge_service, options=edge_options)
-                        print("DEBUG: Edge WebDriver initialized successfully")
-                    except Exception as e3:
-                        print(f"DEBUG: Edge WebDriver failed: {e3}")
-                        
-                        # Approach 4: Fallback to requests-based scraping
-                        print("DEBUG: Falling back to requests-based scraping...")
-                        return fallback_to_requests_scraping(url, barcode)
-            
-            if driver:
-                # Execute script to remove webdriver property
-                driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-                print("DEBUG: Browser driver initialized and configured successfully")
-            else:
-                raise Exception("No driver could be initialized")
-                
-        except Exception as e:
-            print(f"DEBUG: Error initializing browser driver: {e}")
+            driver = browser_pool.checkout(app.config['BROWSER_POOL_REQUEST_CHECKOUT_TIMEOUT'])
+            print("DEBUG: Browser driver checked out from pool")
+        except TimeoutError as e:
+            print(f"DEBUG: Browser pool busy: {e}")
             return jsonify({
                 'success': False,
-                'status': 'error',
-                'message': f'Failed to initialize browser: {str(e)}. Please ensure Chrome or Edge browser is installed.',
-                'product': create_empty_product_data(barcode)
-            }), 500
+                'status': 'unavailable',
+                'message': 'All browsers are busy, try again shortly',
+                'retryAfter': app.config['BROWSER_POOL_REQUEST_CHECKOUT_TIMEOUT'],
+                'product': empty_product(barcode)
+            }), 503
+        except Exception as e:
+            print(f"DEBUG: Error getting browser driver from pool: {e}")
+            print("DEBUG: Falling back to requests-based scraping...")
+            return fallback_to_requests_scraping(url, barcode)
         
         # Navigate to the URL
         try:
             print("DEBUG: Navigating to URL...")
-            driver.get(url)
-            
-            # Human-like delay after page load
-            import random
-            delay = random.uniform(2, 4)  # Random delay between 2-4 seconds
-            print(f"DEBUG: Waiting {delay:.1f} seconds (human-like delay)...")
-            time.sleep(delay)
-            
-            # Additional wait for images to load
-            print(f"DEBUG: Waiting additional 3 seconds for images to load...")
-            time.sleep(3)
             
-            # Simulate human-like behavior
-            try:
-                # Random scroll to simulate human reading
-                scroll_amount = random.randint(100, 500)
-                driver.execute_script(f"window.scrollBy(0, {scroll_amount});")
-                time.sleep(random.uniform(0.5, 1.5))
-                
-                # Scroll back up
-                driver.execute_script(f"window.scrollBy(0, -{scroll_amount//2});")
-                time.sleep(random.uniform(0.3, 0.8))
-            except Exception as e:
-                print(f"DEBUG: Error in human-like simulation: {e}")
-            
-            # Wait for the page to load and look for product data
-            wait = WebDriverWait(driver, 15)
-            
-            # Wait for either product data to load or error message
-            try:
-                # Look for product information elements
-                product_elements = wait.until(
-                    EC.any_of(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid*='product']")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, ".product-info")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, ".product-details")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "h1")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, ".error")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, ".not-found"))
-                    )
-                )
-                print("DEBUG: Page elements loaded")
-            except TimeoutException:
+            # Wait for either product data to render or an error marker
+            readiness = browser_get(driver, url)
+            if readiness['state'] == 'timeout':
                 print("DEBUG: Timeout waiting for page elements")
                 # Try to get page source anyway
-                pass
+            else:
+                print(f"DEBUG: Page ready ({readiness['state']}) after {readiness['elapsedMs']}ms")
             
-            # Get page source and parse with BeautifulSoup
+            # Keep the rendered page for offline re-extraction
             page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
+            store_page(barcode, url, page_source, 'browser')
             
-            print(f"DEBUG: Page title: {soup.find('title').get_text() if soup.find('title') else 'No title found'}")
+            print(f"DEBUG: Page title: {driver.title or 'No title found'}")
             print(f"DEBUG: Page source length: {len(page_source)}")
             
-            # Extract product data using Selenium and BeautifulSoup
-            product_data = extract_product_data_selenium(driver, soup, barcode)
+            # Extract product data in the page with one script round trip
+            product_data = extract_product_data_selenium(driver, barcode)
             
             if product_data and (product_data.get('name') != 'N/A' or product_data.get('price') != 'N/A'):
                 print("DEBUG: ✅ Required fields extracted successfully!")
@@ -2718,569 +4902,268 @@ def fetch_product_data():
                 print(f"DEBUG: 📝 Name: {product_data.get('name')}")
                 print(f"DEBUG: 💰 Price: {product_data.get('price')}")
                 print(f"DEBUG: 🖼️ Image: {product_data.get('image')}")
+                record_tier_result('browser', True)
                 return jsonify({
                     'success': True,
                     'status': 'found',
+                    'tier': 'browser',
                     'product': product_data
                 }), 200
             else:
                 print("DEBUG: No product data found or error page detected")
+                record_tier_result('browser', False)
                 return jsonify({
                     'success': False,
                     'status': 'not_found',
                     'message': 'Product information not found on Smart Consumer website',
-                    'product': create_empty_product_data(barcode)
+                    'product': empty_product(barcode)
                 }), 200
                 
         except WebDriverException as e:
             print(f"DEBUG: WebDriver error: {e}")
+            driver_healthy = False
             return jsonify({
                 'success': False,
                 'status': 'error',
                 'message': f'Browser error: {str(e)}',
-                'product': create_empty_product_data(barcode)
+                'product': empty_product(barcode)
             }), 500
             
+    except TransientFetchError as e:
+        print(f"DEBUG: Upstream unavailable: {e}")
+        return jsonify({
+            'success': False,
+            'status': 'unavailable',
+            'message': f'Smart Consumer is not responding, try again later: {str(e)}',
+            'retryAfter': e.retry_after,
+            'product': empty_product(barcode)
+        }), 503
+        
     except Exception as e:
         print(f"DEBUG: Unexpected error: {e}")
         return jsonify({
             'success': False,
             'status': 'error',
             'message': f'Unexpected error: {str(e)}',
-            'product': create_empty_product_data(data.get('barcode', 'Unknown') if 'data' in locals() else 'Unknown')
+            'product': empty_product(data.get('barcode', 'Unknown') if 'data' in locals() else 'Unknown')
         }), 500
         
     finally:
-        # Always close the driver
+        # Always return the driver to the pool
         if driver:
-            try:
-                driver.quit()
-                print("DEBUG: Chrome driver closed")
-            except Exception as e:
-                print(f"DEBUG: Error closing driver: {e}")
+            browser_pool.checkin(driver, driver_healthy)
+            print("DEBUG: Browser driver returned to pool")
 
-def create_empty_product_data(barcode):
-    """Create empty product data structure with only required fields"""
-    return {
-        'barcode': barcode,
-        'name': 'N/A',
-        'price': 'N/A',
-        'image': "https://via.placeholder.com/300x300/cccccc/666666?text=Add+Image"  # Default placeholder
+# Waits until the product name and a price, or an error marker, are on the page, then briefly for network idle
+PAGE_READY_SCRIPT = PAGE_QUIET_JS + r"""
+const config = arguments[0];
+const done = arguments[arguments.length - 1];
+const started = performance.now();
+const textOf = el => el ? (el.innerText || el.textContent || '').trim() : '';
+const query = selector => { try { return document.querySelector(selector); } catch (e) { return null; } };
+const pricePatterns = config.pricePatterns.map(pattern => new RegExp(pattern));
+const pageState = () => {
+    // Rendered text only: error strings and prices inside inline scripts are not on the page
+    const text = document.body ? document.body.innerText || '' : '';
+    const lower = text.toLowerCase();
+    if (config.errorSelectors.some(query) || config.errorMessages.some(message => lower.includes(message))) return 'error';
+    const hasName = config.nameSelectors.some(selector => textOf(query(selector)).length > 0);
+    const hasPrice = config.priceSelectors.some(query) || pricePatterns.some(pattern => pattern.test(text));
+    return hasName && hasPrice ? 'product' : null;
+};
+const report = (state, networkIdle) => done({
+    state: state,
+    networkIdle: networkIdle,
+    elapsedMs: Math.round(performance.now() - started)
+});
+const poll = () => {
+    const state = pageState();
+    if (state === 'error') return report(state, false);
+    if (state === 'product') return waitForQuiet(config.idleMs, config.idleTimeoutMs, idle => report(state, idle));
+    if (performance.now() - started >= config.timeoutMs) return report('timeout', false);
+    setTimeout(poll, config.pollMs);
+};
+poll();
+"""
+
+def wait_for_page_ready(driver, timeout=None):
+    """Wait for the product name and a price, or an error marker, then for network idle.
+
+    Returns a report dict: state is 'product', 'error' or 'timeout', with
+    networkIdle and elapsedMs.
+    """
+    timeout = timeout if timeout is not None else app.config['BROWSER_READY_TIMEOUT']
+    config = {
+        'errorMessages': [message.lower() for message in PRODUCT_ERROR_MESSAGES],
+        'errorSelectors': PRODUCT_ERROR_SELECTORS,
+        'nameSelectors': PRODUCT_NAME_SELECTORS,
+        'priceSelectors': PRODUCT_MRP_SELECTORS + PRODUCT_PRICE_SELECTORS,
+        'pricePatterns': PRICE_PATTERNS,
+        'pollMs': 50,
+        'timeoutMs': int(timeout * 1000),
+        'idleMs': app.config['BROWSER_NETWORK_IDLE_MS'],
+        'idleTimeoutMs': app.config['BROWSER_NETWORK_IDLE_TIMEOUT_MS']
     }
+    started = time.time()
+    try:
+        driver.set_script_timeout(timeout + config['idleTimeoutMs'] / 1000 + 5)
+        report = driver.execute_async_script(PAGE_READY_SCRIPT, config)
+    except TimeoutException:
+        report = None
+    return report or {'state': 'timeout', 'networkIdle': False, 'elapsedMs': int((time.time() - started) * 1000)}
 
-def extract_product_data_selenium(driver, soup, barcode):
-    """Extract product data using Selenium and BeautifulSoup"""
+def extract_product_data_selenium(driver, barcode):
+    """Extract the canonical product record from a loaded page with one injected script round trip"""
     try:
-        product_data = create_empty_product_data(barcode)
-        
-        # Check if we're on an error page first
-        current_url = driver.current_url
-        page_title = driver.title
-        
-        # Check for 404 or error pages
-        if ('404' in current_url or 
-            'error' in current_url.lower() or 
-            'not-found' in current_url.lower() or
-            'error' in page_title.lower()):
-            print(f"DEBUG: Detected error page - URL: {current_url}, Title: {page_title}")
-            return None
-        
-        # Check for specific error messages in page content (very precise)
-        # Only reject if we find clear error indicators, not just any mention of "not found"
-        error_messages = [
-            "string indices must be integers, not 'str'",
-            "404 error",
-            "page not found",
-            "invalid barcode",
-            "barcode not found",
-            "no product data available",
-            "error: product not found"  # Only reject if it's clearly an error message
-        ]
-        
-        page_text = driver.page_source.lower()
-        for error_msg in error_messages:
-            if error_msg.lower() in page_text:
-                print(f"DEBUG: Detected error message in page: '{error_msg}'")
-                return None
-        
-        # Additional check: Only reject if we find "product not found" in a clear error context
-        if "product not found" in page_text:
-            # Check if it's in a clear error context (like error messages, alerts, etc.)
-            error_contexts = [
-                "error: product not found",
-                "alert: product not found", 
-                "message: product not found",
-                "status: product not found"
-            ]
-            
-            is_clear_error = any(context in page_text for context in error_contexts)
-            if not is_clear_error:
-                print(f"DEBUG: Found 'product not found' but not in clear error context - proceeding with extraction")
-            else:
-                print(f"DEBUG: Detected clear error context with 'product not found'")
-                return None
-        
-        # Try to extract product name using multiple strategies
-        try:
-            # Strategy 1: Look for product name in various selectors
-            name_selectors = [
-                "h1",
-                "[data-testid*='product-name']",
-                ".product-name",
-                ".product-title",
-                ".product-info h1",
-                ".product-info h2",
-                ".product-details h1",
-                ".product-details h2"
-            ]
-            
-            for selector in name_selectors:
-                try:
-                    element = driver.find_element(By.CSS_SELECTOR, selector)
-                    if element and element.text.strip():
-                        name_text = element.text.strip()
-                        # Check if the extracted text is an error message
-                        if any(error_msg.lower() in name_text.lower() for error_msg in error_messages):
-                            print(f"DEBUG: Skipping error message as product name: '{name_text}'")
-                            continue
-                        product_data['name'] = name_text
-                        print(f"DEBUG: Found product name using selector '{selector}': {product_data['name']}")
-                        break
-                except NoSuchElementException:
-                    continue
-            
-            # Strategy 2: Look in page title if no name found
-            if product_data['name'] == 'N/A':
-                title_element = soup.find('title')
-                if title_element and title_element.get_text().strip():
-                    title_text = title_element.get_text().strip()
-                    # Clean up title to extract product name
-                    if 'Smart Consumer' not in title_text and len(title_text) > 5:
-                        product_data['name'] = title_text
-                        print(f"DEBUG: Found product name from title: {product_data['name']}")
-            
-        except Exception as e:
-            print(f"DEBUG: Error extracting product name: {e}")
-        
-        # Try to extract MRP/Price information
-        try:
-            # Look for MRP specifically first
-            mrp_selectors = [
-                "[data-testid*='mrp']",
-                ".mrp",
-                ".product-mrp",
-                ".max-retail-price",
-                ".retail-price",
-                "[class*='mrp']",
-                "[class*='retail']"
-            ]
-            
-            for selector in mrp_selectors:
-                try:
-                    element = driver.find_element(By.CSS_SELECTOR, selector)
-                    if element and element.text.strip():
-                        price_text = element.text.strip()
-                        if any(currency in price_text for currency in ['₹', 'Rs', '$', '€', '£']):
-                            product_data['price'] = price_text
-                            print(f"DEBUG: Found MRP using selector '{selector}': {product_data['price']}")
-                            break
-                except NoSuchElementException:
-                    continue
-            
-            # If MRP not found, look for general price
-            if product_data['price'] == 'N/A':
-                price_selectors = [
-                    "[data-testid*='price']",
-                    ".price",
-                    ".product-price",
-                    ".cost",
-                    ".amount",
-                    ".selling-price"
-                ]
-                
-                for selector in price_selectors:
-                    try:
-                        element = driver.find_element(By.CSS_SELECTOR, selector)
-                        if element and element.text.strip():
-                            price_text = element.text.strip()
-                            if any(currency in price_text for currency in ['₹', 'Rs', '$', '€', '£']):
-                                product_data['price'] = price_text
-                                print(f"DEBUG: Found price using selector '{selector}': {product_data['price']}")
-                                break
-                    except NoSuchElementException:
-                        continue
-            
-            # Fallback: Look for price patterns in text
-            if product_data['price'] == 'N/A':
-                try:
-                    # Look for price patterns in the page source
-                    import re
-                    price_patterns = [
-                        r'₹\s*[\d,]+\.?\d*',
-                        r'Rs\s*[\d,]+\.?\d*',
-                        r'\$\s*[\d,]+\.?\d*',
-                        r'€\s*[\d,]+\.?\d*',
-                        r'£\s*[\d,]+\.?\d*'
-                    ]
-                    
-                    page_text = driver.page_source
-                    for pattern in price_patterns:
-                        matches = re.findall(pattern, page_text)
-                        if matches:
-                            product_data['price'] = matches[0]
-                            print(f"DEBUG: Found price using regex pattern: {product_data['price']}")
-                            break
-                except Exception as e:
-                    print(f"DEBUG: Error in price regex search: {e}")
-            
-            # Additional fallback: Look for any element containing currency symbols
-            if product_data['price'] == 'N/A':
-                try:
-                    # Look for elements with currency symbols using XPath
-                    currency_elements = driver.find_elements(By.XPATH, "//*[contains(text(), '₹') or contains(text(), 'Rs') or contains(text(), '$')]")
-                    for elem in currency_elements:
-                        text = elem.text.strip()
-                        if any(currency in text for currency in ['₹', 'Rs', '$', '€', '£']) and len(text) < 20:  # Reasonable price length
-                            product_data['price'] = text
-                            print(f"DEBUG: Found price using XPath fallback: {product_data['price']}")
-                            break
-                except Exception as e:
-                    print(f"DEBUG: Error in XPath price search: {e}")
-                    
-        except Exception as e:
-            print(f"DEBUG: Error extracting price: {e}")
-        
-        # Brand and category extraction removed - not required
-        
-        # Try to extract product image URL with robust fallback
-        try:
-            print(f"DEBUG: Starting robust image extraction...")
-            
-            # Scroll to trigger lazy loading
-            print(f"DEBUG: Scrolling to trigger lazy loading...")
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(2)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
-            
-            # First, let's see what images are actually on the page
-            all_img_elements = driver.find_elements(By.TAG_NAME, "img")
-            print(f"DEBUG: Found {len(all_img_elements)} total img elements on the page")
-            
-            for idx, img in enumerate(all_img_elements[:10]):  # Show first 10 images
-                try:
-                    src = img.get_attribute('src')
-                    alt = img.get_attribute('alt')
-                    print(f"DEBUG: Image {idx+1}: src='{src}', alt='{alt}'")
-                except:
-                    pass
-            
-            # Enhanced image selectors for better coverage
-            img_selectors = [
-                "img",  # Most basic selector - try first
-                "[data-testid*='product-image']",
-                "[data-testid*='image']",
-                ".product-image img",
-                ".product-photo img",
-                ".product-img img",
-                ".product-picture img",
-                ".main-image img",
-                ".hero-image img",
-                ".featured-image img",
-                "img[alt*='product']",
-                "img[alt*='Product']",
-                "img[src*='product']",
-                "img[src*='Product']",
-                "img[src*='gs1datakart']",  # GS1 DataKart API images
-                "img[src*='api.gs1datakart.org']",  # GS1 DataKart API images
-                "img[class*='product']",
-                "img[class*='main']",
-                "img[class*='hero']",
-                "img[class*='featured']",
-                ".image-container img",
-                ".photo-container img",
-                ".img-container img",
-                "picture img",
-                "figure img"
-            ]
-            
-            print(f"DEBUG: Trying {len(img_selectors)} image selectors...")
-            
-            for i, selector in enumerate(img_selectors):
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    print(f"DEBUG: Selector {i+1}/{len(img_selectors)} '{selector}': found {len(elements)} elements")
-                    
-                    for j, element in enumerate(elements):
-                        try:
-                            img_src = element.get_attribute('src')
-                            img_alt = element.get_attribute('alt')
-                            img_class = element.get_attribute('class')
-                            img_width = element.get_attribute('width')
-                            img_height = element.get_attribute('height')
-                            
-                            print(f"DEBUG: Element {j+1}: src='{img_src}', alt='{img_alt}', class='{img_class}', size={img_width}x{img_height}")
-                            
-                            if img_src and img_src.strip():
-                                # Skip data URLs, placeholder images, and logos
-                                if (img_src.startswith('data:') or 
-                                    'placeholder' in img_src.lower() or
-                                    'logo' in img_src.lower() or
-                                    'icon' in img_src.lower()):
-                                    print(f"DEBUG: Skipping image (placeholder/logo): {img_src}")
-                                    continue
-                                
-                                # Skip very small images (but allow 0 dimensions as they might be CSS-sized)
-                                if (img_width and img_width != '0' and int(img_width) < 50) or \
-                                   (img_height and img_height != '0' and int(img_height) < 50):
-                                    print(f"DEBUG: Skipping image (too small): {img_src}")
-                                    continue
-                                
-                                # Handle different URL formats
-                                if img_src.startswith('http'):
-                                    product_data['image'] = img_src
-                                    print(f"DEBUG: ✅ Found image using selector '{selector}': {product_data['image']}")
-                                    break
-                                elif img_src.startswith('/'):
-                                    product_data['image'] = f"https://smartconsumer-beta.org{img_src}"
-                                    print(f"DEBUG: ✅ Found image using selector '{selector}': {product_data['image']}")
-                                    break
-                                elif img_src.startswith('//'):
-                                    product_data['image'] = f"https:{img_src}"
-                                    print(f"DEBUG: ✅ Found image using selector '{selector}': {product_data['image']}")
-                                    break
-                        except Exception as e:
-                            print(f"DEBUG: Error processing element {j+1}: {e}")
-                            continue
-                    
-                    if product_data['image']:
-                        break
-                        
-                except Exception as e:
-                    print(f"DEBUG: Error with selector '{selector}': {e}")
-                    continue
-            
-            # Fallback: Look for any img tag with reasonable dimensions
-            if product_data['image'] is None:
-                try:
-                    all_images = driver.find_elements(By.TAG_NAME, "img")
-                    for img in all_images:
-                        try:
-                            img_src = img.get_attribute('src')
-                            img_width = img.get_attribute('width')
-                            img_height = img.get_attribute('height')
-                            
-                            # Look for images that are likely product images (not icons/logos)
-                            if img_src and (
-                                (img_width and int(img_width) > 100) or 
-                                (img_height and int(img_height) > 100) or
-                                'product' in img_src.lower() or
-                                'item' in img_src.lower()
-                            ):
-                                if img_src.startswith('http'):
-                                    product_data['image'] = img_src
-                                    print(f"DEBUG: Found image using fallback method: {product_data['image']}")
-                                    break
-                                elif img_src.startswith('/'):
-                                    product_data['image'] = f"https://smartconsumer-beta.org{img_src}"
-                                    print(f"DEBUG: Found image using fallback method: {product_data['image']}")
-                                    break
-                        except (ValueError, TypeError):
-                            continue
-                except Exception as e:
-                    print(f"DEBUG: Error in fallback image search: {e}")
-            
-            # If still no image found, try to construct GS1 DataKart URL based on barcode pattern
-            if product_data['image'] is None:
-                try:
-                    barcode = product_data['barcode']
-                    if barcode and len(barcode) >= 13:
-                        # Extract first 9 digits for GS1 DataKart pattern
-                        prefix = barcode[:9]
-                        # Try to construct GS1 DataKart image URL
-                        gs1_url = f"https://api.gs1datakart.org/files/render?file_key=product_upload/{prefix}/{barcode}/{barcode}_f.png"
-                        product_data['image'] = gs1_url
-                        print(f"DEBUG: 🖼️ Constructed GS1 DataKart URL: {gs1_url}")
-                    else:
-                        product_data['image'] = "https://via.placeholder.com/300x300/cccccc/666666?text=Add+Image"
-                        print(f"DEBUG: 🖼️ No image found, using placeholder thumbnail")
-                except Exception as e:
-                    product_data['image'] = "https://via.placeholder.com/300x300/cccccc/666666?text=Add+Image"
-                    print(f"DEBUG: 🖼️ Error constructing GS1 URL, using placeholder: {e}")
-            else:
-                print(f"DEBUG: 🖼️ Final image URL: {product_data['image']}")
-                    
-        except Exception as e:
-            print(f"DEBUG: Error extracting image: {e}")
-            # Set placeholder thumbnail on any error
-            product_data['image'] = "https://via.placeholder.com/300x300/cccccc/666666?text=Add+Image"
-            print(f"DEBUG: 🖼️ Error occurred, using placeholder thumbnail")
-        
-        # Description extraction removed - not required
-        
-        # Check if we found the key required fields
-        key_fields = ['name', 'price']  # Barcode is always present, image is optional
-        found_key_data = any(product_data[field] != 'N/A' for field in key_fields)
-        
-        if found_key_data:
-            print(f"DEBUG: Successfully extracted required fields:")
-            print(f"DEBUG: - Barcode: {product_data['barcode']}")
-            print(f"DEBUG: - Name: {product_data['name']}")
-            print(f"DEBUG: - Price: {product_data['price']}")
-            print(f"DEBUG: - Image: {product_data['image']}")
-            return product_data
-        else:
-            print("DEBUG: No key product data found (name or price)")
-            return None
-            
+        config = product_candidates_config(app.config['BROWSER_NETWORK_IDLE_MS'], app.config['BROWSER_NETWORK_IDLE_TIMEOUT_MS'])
+        candidates = driver.execute_async_script(PRODUCT_CANDIDATES_SCRIPT, config)
+        print(f"DEBUG: Found {len(candidates['images'])} total img elements on the page")
+        return extract_product(candidates, barcode)
     except Exception as e:
         print(f"DEBUG: Error in extract_product_data_selenium: {e}")
         return None
 
-def extract_product_data(soup, barcode):
-    """Extract product data from Smart Consumer HTML (fallback method)"""
+def unfound_doc_id(barcode):
+    """Deterministic unfound_barcodes / negative cache document ID for a barcode.
+
+    The bulk import rejects barcodes containing '/', but the negative cache is
+    also keyed by barcodes from POST /api/unfound-barcodes and the scrapers,
+    which are not validated, and '/' would be read as a subcollection path.
+    """
+    return barcode.replace('/', '_')
+
+def find_unfound_barcode_refs(barcodes):
+    """Map barcodes to their existing unfound_barcodes document references.
+
+    Deterministic document IDs are checked with chunked get_all() calls.
+    Older entries stored under auto-generated IDs are found with 'in' queries
+    (30 values each) run in parallel.
+    """
+    unfound_ref = db.collection('unfound_barcodes')
+    
+    replica = get_ready_replica('unfound_barcodes')
+    if replica:
+        found = {}
+        for barcode in barcodes:
+            doc_ids = replica.lookup('barcode', barcode)
+            if doc_ids:
+                found[barcode] = unfound_ref.document(doc_ids[0])
+        return found
+    
+    found = {}
+    for start in range(0, len(barcodes), FIRESTORE_BATCH_SIZE):
+        chunk = barcodes[start:start + FIRESTORE_BATCH_SIZE]
+        barcode_by_doc_id = {unfound_doc_id(barcode): barcode for barcode in chunk}
+        refs = [unfound_ref.document(doc_id) for doc_id in barcode_by_doc_id]
+        for doc in db.get_all(refs, field_paths=['barcode']):
+            if doc.exists:
+                found[barcode_by_doc_id[doc.id]] = doc.reference
+    
+    def query_legacy(chunk):
+        query = unfound_ref.where('barcode', 'in', chunk).select(['barcode'])
+        return [(doc.to_dict().get('barcode'), doc.reference) for doc in query.stream()]
+    
+    remaining = [barcode for barcode in barcodes if barcode not in found]
+    chunks = [remaining[start:start + 30] for start in range(0, len(remaining), 30)]
+    if chunks:
+        with ThreadPoolExecutor(max_workers=min(8, len(chunks))) as executor:
+            for matches in executor.map(query_legacy, chunks):
+                for barcode, doc_ref in matches:
+                    found.setdefault(barcode, doc_ref)
+    
+    return found
+
+# Negative cache of barcodes the scraper could not find, stored in Firestore
+NEGATIVE_CACHE_COLLECTION = 'negative_barcode_cache'
+
+def negative_cache_ttl(attempts):
+    """Exponential TTL: base TTL after the first miss, doubling per miss up to the max"""
+    return min(app.config['NEGATIVE_CACHE_BASE_TTL'] * (2 ** max(attempts - 1, 0)), app.config['NEGATIVE_CACHE_MAX_TTL'])
+
+def record_negative_result(barcode):
+    """Record a not-found scrape; the barcode won't be scraped again until retryAfter"""
+    if not db:
+        return None
+    
+    doc_ref = db.collection(NEGATIVE_CACHE_COLLECTION).document(unfound_doc_id(barcode))
+    doc = doc_ref.get()
+    attempts = (doc.to_dict().get('attempts', 0) if doc.exists else 0) + 1
+    ttl = negative_cache_ttl(attempts)
+    now = datetime.now()
+    entry = {
+        'barcode': barcode,
+        'attempts': attempts,
+        'lastChecked': now.isoformat(),
+        'ttlSeconds': ttl,
+        'retryAfter': (now + timedelta(seconds=ttl)).isoformat()
+    }
+    doc_ref.set(entry)
+    print(f"DEBUG: Negative cache - {barcode} missing (attempt #{attempts}), next check after {entry['retryAfter']}")
+    return entry
+
+def clear_negative_result(barcode):
+    """Forget a negative result, e.g. once the barcode has been found"""
+    if db:
+        db.collection(NEGATIVE_CACHE_COLLECTION).document(unfound_doc_id(barcode)).delete()
+
+def get_negative_cache_entries(barcodes):
+    """Map barcodes to their negative cache entry if it has not expired yet"""
+    if not db or not barcodes:
+        return {}
+    
+    now = datetime.now().isoformat()
+    entries = {}
+    collection_ref = db.collection(NEGATIVE_CACHE_COLLECTION)
+    for start in range(0, len(barcodes), FIRESTORE_BATCH_SIZE):
+        chunk = barcodes[start:start + FIRESTORE_BATCH_SIZE]
+        for doc in db.get_all([collection_ref.document(unfound_doc_id(barcode)) for barcode in chunk]):
+            if doc.exists:
+                entry = doc.to_dict()
+                if entry.get('retryAfter', '') > now:
+                    entries[entry['barcode']] = entry
+    return entries
+
+def filter_negatively_cached(unfound_barcodes):
+    """Drop unfound barcode dicts whose barcode is known missing and not due for a recheck"""
+    cached = get_negative_cache_entries(list({data['barcode'] for data in unfound_barcodes}))
+    if cached:
+        print(f"DEBUG: Negative cache - skipping {len(cached)} known-missing barcodes")
+    return [data for data in unfound_barcodes if data['barcode'] not in cached]
+
+@app.route('/api/negative-cache/<barcode>', methods=['GET'])
+def get_negative_cache_entry(barcode):
+    """Get the negative cache entry for a barcode"""
     try:
-        product_data = create_empty_product_data(barcode)
-        
-        # Try to extract product name (this will need to be adjusted based on actual HTML structure)
-        title_element = soup.find('title')
-        if title_element:
-            product_data['name'] = title_element.get_text().strip()
-        
-        # Look for product information in various common patterns
-        # These selectors may need to be adjusted based on the actual Smart Consumer website structure
-        
-        # Try to find product name in h1 or h2 tags
-        name_element = soup.find(['h1', 'h2'], class_=lambda x: x and ('product' in x.lower() or 'title' in x.lower()))
-        if name_element:
-            product_data['name'] = name_element.get_text().strip()
+        if not db:
+            return jsonify({'error': 'Database not available'}), 500
         
-        # Try to find price information using string search
-        price_texts = soup.find_all(string=lambda text: text and ('₹' in text or 'Rs' in text or '$' in text))
-        if price_texts:
-            product_data['price'] = price_texts[0].strip()
+        doc = db.collection(NEGATIVE_CACHE_COLLECTION).document(unfound_doc_id(barcode)).get()
+        if not doc.exists:
+            return jsonify({'error': f'Barcode {barcode} is not in the negative cache'}), 404
         
-        # Try to find product image with robust fallback
-        try:
-            print(f"DEBUG: Fallback - Starting image extraction...")
-            
-            # Enhanced image selectors for fallback scraping
-            img_selectors = [
-                "img",  # Most basic selector
-                "img[src*='product']",
-                "img[src*='Product']",
-                "img[src*='gs1datakart']",  # GS1 DataKart API images
-                "img[src*='api.gs1datakart.org']",  # GS1 DataKart API images
-                "img[alt*='product']",
-                "img[alt*='Product']",
-                "img[class*='product']",
-                "img[class*='main']",
-                "img[class*='hero']",
-                "img[class*='featured']",
-                ".product-image img",
-                ".product-photo img",
-                ".product-img img",
-                ".main-image img",
-                ".hero-image img",
-                ".featured-image img"
-            ]
-            
-            print(f"DEBUG: Fallback - Trying {len(img_selectors)} image selectors...")
-            
-            for i, selector in enumerate(img_selectors):
-                try:
-                    elements = soup.select(selector)
-                    print(f"DEBUG: Fallback - Selector {i+1}/{len(img_selectors)} '{selector}': found {len(elements)} elements")
-                    
-                    for j, element in enumerate(elements):
-                        try:
-                            img_src = element.get('src')
-                            img_alt = element.get('alt')
-                            img_class = element.get('class')
-                            img_width = element.get('width')
-                            img_height = element.get('height')
-                            
-                            print(f"DEBUG: Fallback - Element {j+1}: src='{img_src}', alt='{img_alt}', class='{img_class}', size={img_width}x{img_height}")
-                            
-                            if img_src and img_src.strip():
-                                # Skip data URLs, placeholder images, and logos
-                                if (img_src.startswith('data:') or 
-                                    'placeholder' in img_src.lower() or
-                                    'logo' in img_src.lower() or
-                                    'icon' in img_src.lower()):
-                                    print(f"DEBUG: Fallback - Skipping image (placeholder/logo): {img_src}")
-                                    continue
-                                
-                                # Skip very small images (but allow 0 dimensions as they might be CSS-sized)
-                                if (img_width and img_width != '0' and int(img_width) < 50) or \
-                                   (img_height and img_height != '0' and int(img_height) < 50):
-                                    print(f"DEBUG: Fallback - Skipping image (too small): {img_src}")
-                                    continue
-                                
-                                # Handle different URL formats
-                                if img_src.startswith('http'):
-                                    product_data['image'] = img_src
-                                    print(f"DEBUG: Fallback - ✅ Found image using selector '{selector}': {product_data['image']}")
-                                    break
-                                elif img_src.startswith('/'):
-                                    product_data['image'] = f"https://smartconsumer-beta.org{img_src}"
-                                    print(f"DEBUG: Fallback - ✅ Found image using selector '{selector}': {product_data['image']}")
-                                    break
-                                elif img_src.startswith('//'):
-                                    product_data['image'] = f"https:{img_src}"
-                                    print(f"DEBUG: Fallback - ✅ Found image using selector '{selector}': {product_data['image']}")
-                                    break
-                        except Exception as e:
-                            print(f"DEBUG: Fallback - Error processing element {j+1}: {e}")
-                            continue
-                    
-                    if product_data['image']:
-                        break
-                        
-                except Exception as e:
-                    print(f"DEBUG: Fallback - Error with selector '{selector}': {e}")
-                    continue
-            
-            # If still no image found, try to construct GS1 DataKart URL based on barcode pattern
-            if product_data['image'] is None:
-                try:
-                    barcode = product_data['barcode']
-                    if barcode and len(barcode) >= 13:
-                        # Extract first 9 digits for GS1 DataKart pattern
-                        prefix = barcode[:9]
-                        # Try to construct GS1 DataKart image URL
-                        gs1_url = f"https://api.gs1datakart.org/files/render?file_key=product_upload/{prefix}/{barcode}/{barcode}_f.png"
-                        product_data['image'] = gs1_url
-                        print(f"DEBUG: Fallback - 🖼️ Constructed GS1 DataKart URL: {gs1_url}")
-                    else:
-                        product_data['image'] = "https://via.placeholder.com/300x300/cccccc/666666?text=Add+Image"
-                        print(f"DEBUG: Fallback - 🖼️ No image found, using placeholder thumbnail")
-                except Exception as e:
-                    product_data['image'] = "https://via.placeholder.com/300x300/cccccc/666666?text=Add+Image"
-                    print(f"DEBUG: Fallback - 🖼️ Error constructing GS1 URL, using placeholder: {e}")
-            else:
-                print(f"DEBUG: Fallback - 🖼️ Final image URL: {product_data['image']}")
-                    
-        except Exception as e:
-            print(f"DEBUG: Fallback - Error extracting image: {e}")
-            # Set placeholder thumbnail on any error
-            product_data['image'] = "https://via.placeholder.com/300x300/cccccc/666666?text=Add+Image"
-            print(f"DEBUG: Fallback - 🖼️ Error occurred, using placeholder thumbnail")
+        entry = doc.to_dict()
+        entry['active'] = entry.get('retryAfter', '') > datetime.now().isoformat()
+        return jsonify({'status': 'success', 'data': entry})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/negative-cache/<barcode>', methods=['DELETE'])
+@login_required
+def delete_negative_cache_entry(barcode):
+    """Forget a negative result so the barcode is scraped again on its next import or scan"""
+    try:
+        if not db:
+            return jsonify({'error': 'Database not available'}), 500
         
-        # If we found at least a name or price, return it
-        if product_data['name'] != 'N/A' or product_data['price'] != 'N/A':
-            return product_data
-        else:
-            return None
-            
+        clear_negative_result(barcode)
+        return jsonify({'status': 'success', 'message': f'Negative cache entry for {barcode} removed'})
     except Exception as e:
-        print(f"Error extracting product data: {e}")
-        return None
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/import-barcodes', methods=['POST'])
 @login_required
 def import_barcodes_with_scraping():
-    """Import barcodes from Excel and add them to unfound barcodes for background processing"""
+    """Import barcodes from Excel or CSV and add them to unfound barcodes for background processing"""
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
@@ -3289,50 +5172,37 @@ def import_barcodes_with_scraping():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            return jsonify({'error': 'File must be an Excel file (.xlsx or .xls)'}), 400
-        
-        # Read Excel file
-        from openpyxl import load_workbook
-        wb = load_workbook(file)
-        ws = wb.active
+        if not file.filename.lower().endswith(IMPORT_EXTENSIONS):
+            return jsonify({'error': 'File must be an Excel (.xlsx or .xls) or CSV (.csv) file'}), 400
         
-        # Get headers from first row
-        headers = [str(cell.value).strip().lower() if cell.value else '' for cell in ws[1]]
-        
-        # Check if barcode column exists (case insensitive)
-        barcode_col_index = None
-        for i, header in enumerate(headers):
-            if 'barcode' in header.lower():
-                barcode_col_index = i + 1  # Excel columns are 1-indexed
-                break
-        
-        if barcode_col_index is None:
-            return jsonify({'error': 'Excel file must contain a "barcode" column'}), 400
-        
-        print(f"Found barcode column at index {barcode_col_index}")
-        
-        # Process barcodes
-        processed_count = 0
-        added_to_unfound_count = 0
-        skipped_count = 0
-        skipped_already_scraped = 0
-        skipped_already_unfound = 0
-        errors = []
-        
-        print(f"Starting barcode import to unfound list...")
-        print(f"Total rows to process: {ws.max_row - 1}")
-        print(f"Headers found: {headers}")
+        if not db:
+            return jsonify({'error': 'Database not available'}), 500
         
-        for row_num in range(2, ws.max_row + 1):
-            try:
-                # Get barcode value directly from the barcode column
-                barcode_cell = ws.cell(row=row_num, column=barcode_col_index)
-                barcode_value = barcode_cell.value
+        # Stream rows from the CSV or read-only Excel file
+        with open_import_rows(file, lambda header: str(header).strip().lower() if header else '') as (headers, rows):
+            
+            # Check if barcode column exists (case insensitive)
+            barcode_column = next((header for header in headers if 'barcode' in header), None)
+            
+            if barcode_column is None:
+                return jsonify({'error': 'File must contain a "barcode" column'}), 400
+            
+            print(f"Found barcode column '{barcode_column}'")
+            
+            errors = []
+            
+            print(f"Starting barcode import to unfound list...")
+            print(f"Headers found: {headers}")
+            
+            # Collect and dedupe barcodes in memory before touching Firestore
+            barcodes = []
+            seen_barcodes = set()
+            duplicate_count = 0
+            for row_num, row_data in rows:
+                barcode_value = row_data.get(barcode_column)
                 
                 # Handle different data types (string, int, float)
                 if barcode_value is None:
-                    print(f"Row {row_num}: Empty barcode cell, skipping")
                     continue
                 
                 # Convert to string and clean up
@@ -3340,207 +5210,345 @@ def import_barcodes_with_scraping():
                 if not barcode or barcode.lower() in ['none', 'null', '']:
                     continue
                 
-                # Remove any non-numeric characters if needed (optional)
-                # barcode = ''.join(filter(str.isdigit, barcode))
-                
-                print(f"Processing barcode: {barcode} (row {row_num})")
-                
-                # Check if barcode already exists in barcode_cache (successfully scraped)
-                existing_doc = db.collection('barcode_cache').document(barcode).get()
-                if existing_doc.exists:
-                    print(f"Barcode {barcode} already exists in barcode_cache (successfully scraped), skipping")
-                    skipped_count += 1
-                    skipped_already_scraped += 1
+                if '/' in barcode:
+                    errors.append(f"Row {row_num}: Invalid barcode '{barcode}'")
                     continue
                 
-                # Check if barcode already exists in unfound_barcodes and update it instead of skipping
-                unfound_query = db.collection('unfound_barcodes').where('barcode', '==', barcode).limit(1).get()
-                if unfound_query:
-                    # Update existing unfound barcode to reset retry count and timestamp
-                    unfound_doc = unfound_query[0]
-                    unfound_doc.reference.update({
-                        'source': 'excel',
-                        'createdAt': datetime.now().isoformat(),
-                        'lastRetry': None,
-                        'retryCount': 0,
-                        'status': 'pending'
-                    })
-                    print(f"🔄 Updated existing unfound barcode {barcode} (reset retry count)")
-                    added_to_unfound_count += 1
-                    processed_count += 1
+                if barcode in seen_barcodes:
+                    duplicate_count += 1
                     continue
                 
-                # Add to unfound_barcodes with source label
-                unfound_data = {
-                    'barcode': barcode,
-                    'source': 'excel',
-                    'createdAt': datetime.now().isoformat(),
-                    'lastRetry': None,
-                    'retryCount': 0,
-                    'status': 'pending'
-                }
-                db.collection('unfound_barcodes').add(unfound_data)
-                added_to_unfound_count += 1
-                print(f"✅ Added barcode {barcode} to unfound list (source: excel)")
-                
-                processed_count += 1
-                
-            except Exception as e:
-                error_msg = f"Row {row_num}: {str(e)}"
-                errors.append(error_msg)
-                print(f"Error processing row {row_num}: {e}")
+                seen_barcodes.add(barcode)
+                barcodes.append(barcode)
+        
+        print(f"Found {len(barcodes)} unique barcodes ({duplicate_count} duplicates)")
+        
+        # Skip barcodes already in barcode_cache (successfully scraped)
+        existing_products = get_barcode_cache_docs(barcodes)
+        new_barcodes = [barcode for barcode in barcodes if existing_products.get(barcode) is None]
+        skipped_already_scraped = len(barcodes) - len(new_barcodes)
+        
+        # Skip barcodes recently confirmed missing until their negative cache TTL expires
+        known_missing = get_negative_cache_entries(new_barcodes)
+        new_barcodes = [barcode for barcode in new_barcodes if barcode not in known_missing]
+        skipped_known_missing = len(known_missing)
+        
+        # Existing unfound barcodes are reset instead of duplicated
+        existing_unfound = find_unfound_barcode_refs(new_barcodes)
+        
+        now = datetime.now().isoformat()
+        writes = []
+        for barcode in new_barcodes:
+            unfound_data = {
+                'barcode': barcode,
+                'source': 'excel',
+                'createdAt': now,
+                'lastRetry': None,
+                'retryCount': 0,
+                'status': 'pending'
+            }
+            if barcode in existing_unfound:
+                del unfound_data['barcode']
+                writes.append((barcode, 'update', existing_unfound[barcode], unfound_data))
+            else:
+                writes.append((barcode, 'set', db.collection('unfound_barcodes').document(unfound_doc_id(barcode)), unfound_data))
+        
+        written_barcodes, failed = batch_write_documents(writes)
+        errors.extend(f"Barcode {failure['id']}: {failure['error']}" for failure in failed)
+        
+        # Every written barcode lands in exactly one bucket: newly added or already unfound (reset)
+        processed_count = len(written_barcodes)
+        updated_existing_count = len([barcode for barcode in written_barcodes if barcode in existing_unfound])
+        added_to_unfound_count = processed_count - updated_existing_count
+        skipped_count = skipped_already_scraped + skipped_known_missing
         
         response = {
             'status': 'success',
             'message': f'Import completed successfully!',
             'processed_count': processed_count,
             'added_to_unfound_count': added_to_unfound_count,
+            'updated_existing_count': updated_existing_count,
             'skipped_count': skipped_count,
             'skipped_already_scraped': skipped_already_scraped,
-            'skipped_already_unfound': skipped_already_unfound,
+            'skipped_already_unfound': updated_existing_count,  # Already queued; reset rather than duplicated
+            'skipped_known_missing': skipped_known_missing,
+            'duplicate_count': duplicate_count,
             'errors': errors[:10] if errors else []
         }
         
-        print(f"Import completed: {processed_count} processed, {added_to_unfound_count} added to unfound, {skipped_count} skipped")
+        print(f"Import completed: {processed_count} processed, {added_to_unfound_count} added to unfound, {updated_existing_count} already unfound (reset), {skipped_count} skipped")
         return jsonify(response)
         
     except Exception as e:
         print(f"Import error: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Background purge jobs for /api/clear-barcode-cache
+PURGE_PARALLEL_COMMITS = 4  # Batch commits in flight at once
+PURGE_JOB_LEASE_SECONDS = 120  # A purge whose owner has not heartbeated for this long is considered dead
+PURGE_WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+purge_jobs = {}
+purge_jobs_lock = threading.Lock()
+
+class PurgeJobConflict(Exception):
+    """Another worker holds the purge lease for the collection"""
+    
+    def __init__(self, job_id):
+        super().__init__(f"Purge job {job_id} is running in another worker")
+        self.job_id = job_id
+
+def purge_lease_is_live(lease):
+    heartbeat = datetime.fromisoformat(lease['heartbeatAt'])
+    return datetime.now() - heartbeat < timedelta(seconds=PURGE_JOB_LEASE_SECONDS)
+
+def claim_purge_job(job):
+    """Take the collection's purge lease for job in a transaction and mark the job running.
+
+    The lease lives in purge_locks/<collection> with the owning worker and a
+    heartbeat, so only one worker purges a collection at a time and a job that
+    looks 'running' in Firestore is only resumed once its owner has gone quiet.
+    Raises PurgeJobConflict if a live lease is held by anyone else.
+    """
+    lease_ref = db.collection('purge_locks').document(job['collection'])
+    job_ref = db.collection('purge_jobs').document(job['jobId'])
+    
+    @firestore.transactional
+    def claim(transaction):
+        lease = lease_ref.get(transaction=transaction)
+        if lease.exists and purge_lease_is_live(lease.to_dict()):
+            raise PurgeJobConflict(lease.to_dict()['jobId'])
+        now = datetime.now().isoformat()
+        job.update({'status': 'running', 'owner': PURGE_WORKER_ID, 'heartbeatAt': now, 'updatedAt': now})
+        transaction.set(lease_ref, {'jobId': job['jobId'], 'owner': PURGE_WORKER_ID, 'heartbeatAt': now})
+        transaction.set(job_ref, job)
+    
+    claim(db.transaction())
+
+def renew_purge_lease(job):
+    """Heartbeat the purge lease; raises PurgeJobConflict if another worker has taken it over"""
+    lease_ref = db.collection('purge_locks').document(job['collection'])
+    
+    @firestore.transactional
+    def renew(transaction):
+        lease = lease_ref.get(transaction=transaction)
+        if not lease.exists or lease.to_dict()['owner'] != PURGE_WORKER_ID or lease.to_dict()['jobId'] != job['jobId']:
+            raise PurgeJobConflict(lease.to_dict()['jobId'] if lease.exists else job['jobId'])
+        job['heartbeatAt'] = datetime.now().isoformat()
+        transaction.update(lease_ref, {'heartbeatAt': job['heartbeatAt']})
+    
+    renew(db.transaction())
+
+def release_purge_lease(job):
+    """Drop the purge lease if this worker still holds it"""
+    lease_ref = db.collection('purge_locks').document(job['collection'])
+    
+    @firestore.transactional
+    def release(transaction):
+        lease = lease_ref.get(transaction=transaction)
+        if lease.exists and lease.to_dict()['owner'] == PURGE_WORKER_ID and lease.to_dict()['jobId'] == job['jobId']:
+            transaction.delete(lease_ref)
+    
+    try:
+        release(db.transaction())
+    except Exception as e:
+        print(f"Error releasing purge lease for {job['jobId']}: {e}")
+
+def save_purge_job(job):
+    """Persist purge job progress so an interrupted job can be resumed"""
+    job['updatedAt'] = datetime.now().isoformat()
+    try:
+        db.collection('purge_jobs').document(job['jobId']).set(job)
+    except Exception as e:
+        print(f"Error saving purge job {job['jobId']}: {e}")
+
+def load_purge_job(job_id, persisted_first=False):
+    """Get a purge job from memory, falling back to its persisted progress.
+
+    With persisted_first, the Firestore copy wins: another worker may have
+    advanced the job since this worker last ran it.
+    """
+    job = None if persisted_first else purge_jobs.get(job_id)
+    if job is None and db:
+        doc = db.collection('purge_jobs').document(job_id).get()
+        if doc.exists:
+            job = doc.to_dict()
+    return job if job is not None else purge_jobs.get(job_id)
+
+def commit_delete_batch(doc_refs):
+    batch = db.batch()
+    for doc_ref in doc_refs:
+        batch.delete(doc_ref)
+    batch.commit()
+
+def run_purge_job(job):
+    """Delete every document in job['collection'] after job['lastKey'].
+
+    Pages of keys are read with key-only queries ordered by document ID and
+    deleted with parallel batch commits. lastKey only advances past pages whose
+    commit (and every earlier one) succeeded, so a resumed job never skips keys.
+    The caller must have claimed the job (claim_purge_job). The lease is renewed
+    after every window, and the job stops if another worker has taken it over.
+    """
+    collection_ref = db.collection(job['collection'])
+    taken_over = False
+    print(f"Purge job {job['jobId']} started on {job['collection']} (resuming after: {job['lastKey']})")
+    
+    try:
+        with ThreadPoolExecutor(max_workers=PURGE_PARALLEL_COMMITS) as executor:
+            while True:
+                # Read the next window of key-only pages
+                pages = []
+                last_key = job['lastKey']
+                for _ in range(PURGE_PARALLEL_COMMITS):
+                    # An empty select() returns every field; projecting __name__ reads keys only
+                    query = collection_ref.select(['__name__']).order_by('__name__')
+                    if last_key:
+                        query = query.where('__name__', '>', collection_ref.document(last_key))
+                    doc_refs = [doc.reference for doc in query.limit(FIRESTORE_BATCH_SIZE).stream()]
+                    if not doc_refs:
+                        break
+                    pages.append(doc_refs)
+                    last_key = doc_refs[-1].id
+                    if len(doc_refs) < FIRESTORE_BATCH_SIZE:
+                        break
+                
+                if not pages:
+                    break
+                
+                futures = [executor.submit(commit_delete_batch, doc_refs) for doc_refs in pages]
+                try:
+                    for doc_refs, future in zip(pages, futures):
+                        future.result()
+                        job['deletedCount'] += len(doc_refs)
+                        job['lastKey'] = doc_refs[-1].id
+                finally:
+                    # Only the lease holder may write progress
+                    renew_purge_lease(job)
+                    save_purge_job(job)
+                    invalidate_barcode_cache()
+        
+        job['status'] = 'completed'
+        print(f"Purge job {job['jobId']} completed: {job['deletedCount']} documents deleted")
+    except PurgeJobConflict as e:
+        # Another worker resumed the job from its persisted lastKey; leave the job document to it
+        taken_over = True
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        print(f"Purge job {job['jobId']} stopped: {e}")
+    except Exception as e:
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        print(f"Purge job {job['jobId']} failed after {job['deletedCount']} documents: {e}")
+    finally:
+        if not taken_over:
+            job['finishedAt'] = datetime.now().isoformat()
+            save_purge_job(job)
+            release_purge_lease(job)
+        invalidate_barcode_cache()
+
 @app.route('/api/clear-barcode-cache', methods=['POST'])
 @login_required
 def clear_barcode_cache():
-    """Clear all barcodes from barcode_cache collection"""
+    """Start a background job that clears all barcodes from barcode_cache.
+
+    Pass {"resume_job_id": "..."} to resume an interrupted or failed job.
+    The job is claimed through a Firestore lease first, so only one worker
+    purges at a time (409 otherwise).
+    """
     try:
         if not db:
             return jsonify({'error': 'Database not available'}), 500
         
-        # Get all documents from barcode_cache collection
-        barcode_cache_ref = db.collection('barcode_cache')
-        docs = barcode_cache_ref.stream()
+        data = request.get_json(silent=True) or {}
+        resume_job_id = data.get('resume_job_id')
         
-        cleared_count = 0
-        for doc in docs:
-            doc.reference.delete()
-            cleared_count += 1
+        with purge_jobs_lock:
+            running = [job for job in purge_jobs.values() if job['status'] in ('queued', 'running')]
+            if running:
+                return jsonify({
+                    'error': 'A purge job is already running',
+                    'job': running[0]
+                }), 409
+            
+            if resume_job_id:
+                job = load_purge_job(resume_job_id, persisted_first=True)
+                if job is None:
+                    return jsonify({'error': f'Purge job {resume_job_id} not found'}), 404
+                if job['status'] == 'completed':
+                    return jsonify({'error': f'Purge job {resume_job_id} already completed'}), 400
+                job.update({'status': 'queued', 'error': None, 'finishedAt': None})
+            else:
+                job = {
+                    'jobId': uuid.uuid4().hex,
+                    'collection': 'barcode_cache',
+                    'status': 'queued',
+                    'totalCount': None,
+                    'deletedCount': 0,
+                    'lastKey': None,
+                    'error': None,
+                    'createdAt': datetime.now().isoformat(),
+                    'finishedAt': None
+                }
+                try:
+                    job['totalCount'] = StatsService.count(db.collection('barcode_cache'))
+                except Exception as e:
+                    print(f"Could not count barcode_cache documents: {e}")
+            
+            try:
+                claim_purge_job(job)
+            except PurgeJobConflict as e:
+                return jsonify({
+                    'error': 'A purge job is already running',
+                    'job': load_purge_job(e.job_id, persisted_first=True) or {'jobId': e.job_id}
+                }), 409
+            purge_jobs[job['jobId']] = job
         
-        print(f"Cleared {cleared_count} barcodes from cache")
+        threading.Thread(target=run_purge_job, args=(job,), daemon=True).start()
         
         return jsonify({
-            'status': 'success',
-            'message': f'Successfully cleared {cleared_count} barcodes from cache',
-            'cleared_count': cleared_count
-        })
+            'status': 'accepted',
+            'message': 'Barcode cache purge started',
+            'job': job
+        }), 202
         
     except Exception as e:
         print(f"Error clearing barcode cache: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/clear-barcode-cache/<job_id>', methods=['GET'])
+@login_required
+def get_clear_barcode_cache_job(job_id):
+    """Get progress of a barcode_cache purge job"""
+    try:
+        job = load_purge_job(job_id)
+        if job is None:
+            return jsonify({'error': f'Purge job {job_id} not found'}), 404
+        return jsonify({'status': 'success', 'job': job})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 def scrape_product_data_for_import(barcode, url):
-    """Scrape product data from Smart Consumer website for import"""
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException
-    from bs4 import BeautifulSoup
-    
+    """Scrape product data from Smart Consumer website for import, in the catalog (products) shape"""
     driver = None
+    driver_healthy = True
     try:
-        # Setup Chrome options for headless browsing
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        # Initialize Chrome driver
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.get(url)
-        
-        # Wait for page to load
-        wait = WebDriverWait(driver, 10)
-        try:
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1")))
-        except TimeoutException:
-            pass
-        
-        # Extract product data
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
+        # Check out a pooled browser
+        driver = browser_pool.checkout()
         
-        # Extract product information
-        product_data = {
-            'name': 'N/A',
-            'brand': '',
-            'category': '',
-            'mrp': 0.0,
-            'salePrice': 0.0,
-            'imageUrl': '',
-            'description': '',
-            'size': '',
-            'unit': '',
-            'isActive': True,
-            'useInFirstStart': False
-        }
-        
-        # Try to extract product name
-        try:
-            name_element = soup.find('h1')
-            if name_element:
-                product_data['name'] = name_element.get_text().strip()
-        except:
-            pass
-        
-        # Try to extract price
-        try:
-            price_elements = soup.find_all(['span', 'div'], class_=lambda x: x and 'price' in x.lower())
-            for element in price_elements:
-                text = element.get_text().strip()
-                if '₹' in text or 'Rs' in text:
-                    # Extract numeric value
-                    import re
-                    price_match = re.search(r'[\d,]+\.?\d*', text.replace(',', ''))
-                    if price_match:
-                        price = float(price_match.group())
-                        product_data['mrp'] = price
-                        product_data['salePrice'] = price
-                        break
-        except:
-            pass
-        
-        # Try to extract image
-        try:
-            img_element = soup.find('img')
-            if img_element and img_element.get('src'):
-                product_data['imageUrl'] = img_element['src']
-                product_data['photoPath'] = img_element['src']
-        except:
-            pass
-        
-        # Try to extract brand
-        try:
-            brand_elements = soup.find_all(['span', 'div'], class_=lambda x: x and 'brand' in x.lower())
-            for element in brand_elements:
-                text = element.get_text().strip()
-                if text and len(text) < 50:  # Reasonable brand name length
-                    product_data['brand'] = text
-                    break
-        except:
-            pass
+        # Load the page and wait for it to render
+        browser_get(driver, url)
+        store_page(barcode, url, driver.page_source, 'browser')
         
-        return product_data
+        product_data = extract_product_data_selenium(driver, barcode) or empty_product(barcode)
+        return catalog_product_fields(product_data)
         
     except Exception as e:
         print(f"Error scraping {barcode}: {e}")
+        driver_healthy = not isinstance(e, WebDriverException)
         return None
     finally:
         if driver:
-            driver.quit()
+            browser_pool.checkin(driver, driver_healthy)
 
 if __name__ == '__main__':
     import os
@@ -13,6 +13,7 @@ from firebase_admin import credentials, firestore
 import os
 from dotenv import load_dotenv
 from openpyxl import load_workbook
+from product_extraction import PRODUCT_CANDIDATES_SCRIPT, product_candidates_config, empty_product, extract_product, catalog_product_fields
 
 # Load environment variables
 load_dotenv()
@@ -559,7 +560,6 @@ def scrape_product_data(barcode, url):
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.common.exceptions import TimeoutException
-    from bs4 import BeautifulSoup
     
     driver = None
     try:
@@ -585,82 +585,12 @@ def scrape_product_data(barcode, url):
         except TimeoutException:
             print(f"⚠️ Timeout waiting for page load for barcode: {barcode}")
         
-        # Extract product data
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        
-        # Extract product information
-        product_data = {
-            'name': 'N/A',
-            'brand': '',
-            'category': '',
-            'mrp': 0.0,
-            'salePrice': 0.0,
-            'imageUrl': '',
-            'description': '',
-            'size': '',
-            'unit': '',
-            'isActive': True,
-            'useInFirstStart': False
-        }
-        
-        # Try to extract product name
-        try:
-            name_element = soup.find('h1')
-            if name_element:
-                product_name = name_element.get_text().strip()
-                if product_name and product_name != '' and product_name != 'string indices must be integers, not \'str\'':
-                    product_data['name'] = product_name
-                    print(f"📦 Found product name: {product_name}")
-                else:
-                    print(f"⚠️ Empty or invalid product name for barcode: {barcode}")
-            else:
-                print(f"⚠️ No h1 element found for barcode: {barcode}")
-        except Exception as e:
-            print(f"❌ Error extracting name for {barcode}: {e}")
+        # Gather candidates in the page and run the shared extraction pipeline
+        candidates = driver.execute_async_script(PRODUCT_CANDIDATES_SCRIPT, product_candidates_config())
+        product = extract_product(candidates, barcode) or empty_product(barcode)
         
-        # Try to extract price
-        try:
-            price_elements = soup.find_all(['span', 'div'], class_=lambda x: x and 'price' in x.lower())
-            for element in price_elements:
-                text = element.get_text().strip()
-                if '₹' in text or 'Rs' in text:
-                    # Extract numeric value
-                    import re
-                    price_match = re.search(r'[\d,]+\.?\d*', text.replace(',', ''))
-                    if price_match:
-                        price = float(price_match.group())
-                        product_data['mrp'] = price
-                        product_data['salePrice'] = price
-                        print(f"💰 Found price: ₹{price}")
-                        break
-        except Exception as e:
-            print(f"❌ Error extracting price for {barcode}: {e}")
-        
-        # Try to extract image
-        try:
-            img_element = soup.find('img')
-            if img_element and img_element.get('src'):
-                product_data['imageUrl'] = img_element['src']
-                product_data['photoPath'] = img_element['src']
-                print(f"🖼️ Found image: {img_element['src']}")
-        except Exception as e:
-            print(f"❌ Error extracting image for {barcode}: {e}")
-        
-        # Try to extract brand
-        try:
-            brand_elements = soup.find_all(['span', 'div'], class_=lambda x: x and 'brand' in x.lower())
-            for element in brand_elements:
-                text = element.get_text().strip()
-                if text and len(text) < 50:  # Reasonable brand name length
-                    product_data['brand'] = text
-                    print(f"🏷️ Found brand: {text}")
-                    break
-        except Exception as e:
-            print(f"❌ Error extracting brand for {barcode}: {e}")
-        
-        print(f"✅ Scraping completed for {barcode}: {product_data['name']}")
-        return product_data
+        print(f"✅ Scraping completed for {barcode}: {product['name']}")
+        return catalog_product_fields(product)
         
     except Exception as e:
         print(f"❌ Error scraping {barcode}: {e}")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark Product Extractors
+
+Runs the extraction pipeline over the saved-page corpus in benchmark_pages/
+without touching the network: every static parser backend classifies the raw
+HTML, and the Selenium extractor loads the same pages from a local static file
+server. Reports pages/s, p50/p99 latency and field-level accuracy against
+benchmark_pages/expected.json, and exits non-zero on any accuracy miss.
+
+Usage:
+    python benchmark_extractors.py                  # 20 iterations per backend
+    python benchmark_extractors.py --iterations 100
+    python benchmark_extractors.py --no-browser     # static backends only
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from app import app, create_browser_driver, wait_for_page_ready, extract_product_data_selenium
+from benchmark_parsers import FIELDS, percentile, run_backends
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_pages')
+
+def load_corpus():
+    """Return (expected, pages) where pages is a list of (file_name, content) pairs"""
+    with open(os.path.join(CORPUS_DIR, 'expected.json'), encoding='utf-8') as expected_file:
+        expected = json.load(expected_file)
+    pages = []
+    for name in sorted(expected):
+        with open(os.path.join(CORPUS_DIR, name), 'rb') as page_file:
+            pages.append((name, page_file.read()))
+    return expected, pages
+
+def barcode_for(name):
+    return os.path.splitext(name)[0]
+
+def score(results, expected):
+    """Compare (outcome, product) results with the expected records.
+
+    Returns (found_correct, field_hits, mismatches) where field_hits counts
+    matching fields across pages that are expected to hold a product.
+    """
+    found_correct = 0
+    field_hits = {field: 0 for field in FIELDS}
+    mismatches = []
+    for name, (outcome, product) in results.items():
+        want = expected[name]
+        if outcome == want['outcome'] and bool(product) == bool(want['product']):
+            found_correct += 1
+        else:
+            mismatches.append(f"{name}: expected {want['outcome']}/{'product' if want['product'] else 'none'}, "
+                              f"got {outcome}/{'product' if product else 'none'}")
+            continue
+        if not want['product']:
+            continue
+        for field in FIELDS:
+            if product.get(field) == want['product'][field]:
+                field_hits[field] += 1
+            else:
+                mismatches.append(f"{name}: {field} expected {want['product'][field]!r}, got {product.get(field)!r}")
+    return found_correct, field_hits, mismatches
+
+def report(label, timings, results, expected):
+    """Print latency and accuracy for one extractor, returning its mismatches"""
+    total_seconds = sum(timings) / 1000
+    product_pages = sum(1 for name in results if expected[name]['product'])
+    found_correct, field_hits, mismatches = score(results, expected)
+
+    print(f"\n🔧 {label}")
+    print(f"   {len(timings)} runs | {len(timings) / total_seconds if total_seconds else 0:.0f} pages/s | "
+          f"p50 {percentile(timings, 0.5):.2f} ms | p99 {percentile(timings, 0.99):.2f} ms | "
+          f"mean {statistics.mean(timings):.2f} ms")
+    print(f"   found/not-found: {found_correct}/{len(results)}")
+    for field in FIELDS:
+        print(f"   {field}: {field_hits[field]}/{product_pages}")
+    for mismatch in mismatches:
+        print(f"   ❌ {mismatch}")
+    return mismatches
+
+@contextlib.contextmanager
+def corpus_server():
+    """Serve the corpus over HTTP on an ephemeral localhost port"""
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=CORPUS_DIR)
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def benchmark_selenium(pages, expected, iterations):
+    """Load every page in a headless browser and extract it, returning (timings_ms, results) or None"""
+    # Nothing renders the SPA shell offline, so the browser run covers server-rendered pages only
+    pages = [(name, content) for name, content in pages if expected[name]['outcome'] != 'needs_browser']
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            driver = create_browser_driver()
+    except Exception as e:
+        print(f"\n⚠️ Skipping Selenium benchmark: no browser available ({str(e).splitlines()[0] if str(e) else type(e).__name__})")
+        return None
+
+    timings = []
+    results = {}
+    try:
+        with corpus_server() as base_url:
+            for _ in range(iterations):
+                for name, _content in pages:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        started = time.perf_counter()
+                        driver.get(f"{base_url}/{name}")
+                        wait_for_page_ready(driver, timeout=2)
+                        product = extract_product_data_selenium(driver, barcode_for(name))
+                        timings.append((time.perf_counter() - started) * 1000)
+                    results[name] = ('extracted', product)
+    finally:
+        driver.quit()
+    return timings, results
+
+def benchmark_extractors(iterations=20, browser=True):
+    """Benchmark every extractor against the corpus; returns True when all pages match"""
+    expected, pages = load_corpus()
+    total_kb = sum(len(content) for _, content in pages) / 1024
+    print(f"📄 {len(pages)} corpus pages ({total_kb:.0f} KB), {iterations} iterations")
+
+    mismatches = []
+    with app.app_context():
+        names = [name for name, _content in pages]
+        barcode_pages = [(barcode_for(name), content) for name, content in pages]
+        for backend_name, timings, results in run_backends(barcode_pages, iterations, lambda barcode: f"file://{barcode}.html"):
+            mismatches += report(backend_name, timings, dict(zip(names, results)), expected)
+
+        if browser:
+            # Page loads dominate the browser run; a few passes are enough for stable percentiles
+            outcome = benchmark_selenium(pages, expected, max(1, iterations // 10))
+            if outcome:
+                timings, results = outcome
+                mismatches += report('selenium', timings, results, expected)
+
+    if mismatches:
+        print(f"\n❌ {len(mismatches)} accuracy mismatches")
+        return False
+    print("\n✅ All extractors match the expected corpus results")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark product extractors over the saved-page corpus')
+    parser.add_argument('--iterations', type=int, default=20, help='passes over the corpus per static backend')
+    parser.add_argument('--no-browser', action='store_true', help='skip the Selenium extractor')
+    args = parser.parse_args()
+    sys.exit(0 if benchmark_extractors(args.iterations, not args.no_browser) else 1)
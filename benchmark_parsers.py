@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML Parser Backends
+
+Replays saved product pages through every registered parser backend and
+reports per-page latency, throughput and field agreement with html.parser.
+
+Usage:
+    python benchmark_parsers.py              # all pages in PAGE_STORE_DIR
+    python benchmark_parsers.py pages_dir/   # every *.html file in a directory
+"""
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+from app import app, HTML_PARSER_BACKENDS, iter_stored_pages, load_stored_page
+
+FIELDS = ('name', 'brand', 'price', 'image')
+
+def load_pages(source=None):
+    """Return a list of (barcode, content) pairs from a directory or the page store"""
+    if source:
+        pages = []
+        for name in sorted(os.listdir(source)):
+            if name.endswith('.html'):
+                with open(os.path.join(source, name), 'rb') as page_file:
+                    pages.append((os.path.splitext(name)[0], page_file.read()))
+        return pages
+
+    with app.app_context():
+        return [(entry['barcode'], load_stored_page(entry)) for entry in iter_stored_pages()
+                if entry.get('source') != 'browser']
+
+def run_backend(backend, pages, iterations=1, url_for=None):
+    """Classify every page `iterations` times, returning (timings_ms, results of the last pass)"""
+    timings = []
+    for _ in range(iterations):
+        results = []
+        for barcode, content in pages:
+            url = url_for(barcode) if url_for else ''
+            # The extractors log every page; keep that noise out of the timings
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                results.append(backend.classify(content, barcode, url))
+                timings.append((time.perf_counter() - started) * 1000)
+    return timings, results
+
+def run_backends(pages, iterations=1, url_for=None):
+    """Run every registered backend over the pages, yielding (name, timings_ms, results)"""
+    for name, backend_class in HTML_PARSER_BACKENDS.items():
+        timings, results = run_backend(backend_class(), pages, iterations, url_for)
+        yield name, timings, results
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def benchmark_parsers(source=None):
+    """Benchmark each backend against the same page set"""
+    pages = load_pages(source)
+    if not pages:
+        print("❌ No saved pages found")
+        return
+
+    total_kb = sum(len(content) for _, content in pages) / 1024
+    print(f"📄 {len(pages)} pages ({total_kb:.0f} KB)")
+
+    baseline = None
+    for name, timings, results in run_backends(pages):
+        total_seconds = sum(timings) / 1000
+        print(f"\n🔧 {name}")
+        print(f"   mean {statistics.mean(timings):.2f} ms | p50 {percentile(timings, 0.5):.2f} ms | "
+              f"p95 {percentile(timings, 0.95):.2f} ms | {len(pages) / total_seconds if total_seconds else 0:.0f} pages/s")
+        print(f"   needs browser: {sum(1 for outcome, _ in results if outcome == 'needs_browser')}, "
+              f"extracted: {sum(1 for outcome, product in results if product)}")
+
+        if baseline is None:
+            baseline = results
+            continue
+
+        for field in FIELDS:
+            matching = sum(1 for (_, ours), (_, theirs) in zip(results, baseline)
+                           if (ours or {}).get(field) == (theirs or {}).get(field))
+            print(f"   {field} agrees with {next(iter(HTML_PARSER_BACKENDS))}: {matching}/{len(pages)}")
+
+if __name__ == "__main__":
+    benchmark_parsers(sys.argv[1] if len(sys.argv) > 1 else None)
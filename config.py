@@ -28,6 +28,9 @@ class Config:
     USER1_USERNAME = os.environ.get('USER1_USERNAME', 'user1')
     USER1_PASSWORD_HASH = os.environ.get('USER1_PASSWORD_HASH')
     
+    # Shared state across workers (cache invalidation, host rate limits)
+    REDIS_URL = os.environ.get('REDIS_URL')
+    
     # Rate limiting
     RATELIMIT_STORAGE_URL = os.environ.get('REDIS_URL', 'memory://')
     RATELIMIT_DEFAULT = os.environ.get('RATELIMIT_DEFAULT', "1000 per hour")
@@ -40,6 +43,77 @@ class Config:
     BACKGROUND_PROCESSOR_ENABLED = os.environ.get('BACKGROUND_PROCESSOR_ENABLED', 'true').lower() == 'true'
     BACKGROUND_PROCESSOR_INTERVAL = int(os.environ.get('BACKGROUND_PROCESSOR_INTERVAL', '3600'))  # 1 hour
     
+    # Per-worker barcode_cache read-through cache, invalidated across workers through REDIS_URL
+    BARCODE_CACHE_TTL = int(os.environ.get('BARCODE_CACHE_TTL', '300'))  # 5 minutes
+    BARCODE_CACHE_UNSHARED_TTL = int(os.environ.get('BARCODE_CACHE_UNSHARED_TTL', '5'))  # TTL cap without Redis
+    BARCODE_CACHE_MAX_SIZE = int(os.environ.get('BARCODE_CACHE_MAX_SIZE', '20000'))
+    PRODUCT_LIST_CACHE_MAX_SIZE = int(os.environ.get('PRODUCT_LIST_CACHE_MAX_SIZE', '200'))
+    
+    # Live in-memory replica of the main collections (one set of listeners per worker process)
+    REPLICA_ENABLED = os.environ.get('REPLICA_ENABLED', 'false').lower() == 'true'
+    
+    # Shared headless browser pool used by every Selenium scraping path
+    BROWSER_POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', '2'))
+    BROWSER_POOL_MAX_PAGES = int(os.environ.get('BROWSER_POOL_MAX_PAGES', '50'))  # recycle a driver after N pages
+    BROWSER_POOL_MAX_RSS_MB = int(os.environ.get('BROWSER_POOL_MAX_RSS_MB', '1024'))  # or once its process tree exceeds this
+    BROWSER_POOL_CHECKOUT_TIMEOUT = int(os.environ.get('BROWSER_POOL_CHECKOUT_TIMEOUT', '120'))
+    BROWSER_POOL_REQUEST_CHECKOUT_TIMEOUT = int(os.environ.get('BROWSER_POOL_REQUEST_CHECKOUT_TIMEOUT', '10'))  # /api/fetch-product-data
+    BROWSER_POOL_PREWARM = os.environ.get('BROWSER_POOL_PREWARM', 'false').lower() == 'true'
+    # Lean page loads: 'eager' load strategy, no extensions, and these URL patterns blocked over CDP
+    # (images, media, fonts, stylesheets and third-party trackers; only DOM text and image URLs are used)
+    BROWSER_LEAN_PROFILE = os.environ.get('BROWSER_LEAN_PROFILE', 'true').lower() == 'true'
+    BROWSER_BLOCKED_URL_PATTERNS = os.environ.get(
+        'BROWSER_BLOCKED_URL_PATTERNS',
+        '*.png*,*.jpg*,*.jpeg*,*.gif*,*.webp*,*.avif*,*.svg*,*.ico*,'
+        '*.mp4*,*.webm*,*.mp3*,*.woff*,*.ttf*,*.otf*,*.eot*,*.css*,'
+        '*google-analytics.com*,*googletagmanager.com*,*doubleclick.net*,*facebook.net*,*hotjar.com*,*clarity.ms*'
+    ).split(',')
+    
+    # Page readiness: wait for the product name and price (or an error marker), then briefly for network idle
+    BROWSER_READY_TIMEOUT = float(os.environ.get('BROWSER_READY_TIMEOUT', '10'))  # seconds
+    BROWSER_NETWORK_IDLE_MS = int(os.environ.get('BROWSER_NETWORK_IDLE_MS', '300'))  # quiet period counted as idle
+    BROWSER_NETWORK_IDLE_TIMEOUT_MS = int(os.environ.get('BROWSER_NETWORK_IDLE_TIMEOUT_MS', '1500'))
+    
+    # Background scraping concurrency and per-host politeness
+    SCRAPER_WORKERS = int(os.environ.get('SCRAPER_WORKERS', '2'))
+    SCRAPER_HOST_RATE = float(os.environ.get('SCRAPER_HOST_RATE', '0.5'))  # requests per second per host, 0 disables
+    SCRAPER_HOST_BURST = int(os.environ.get('SCRAPER_HOST_BURST', '1'))
+    # Worker processes splitting SCRAPER_HOST_RATE when REDIS_URL is not available (4 gunicorn workers by default)
+    SCRAPER_HOST_RATE_PROCESSES = int(os.environ.get('SCRAPER_HOST_RATE_PROCESSES', os.environ.get('WEB_CONCURRENCY', '4')))
+    
+    # Per-host health: latency/error EWMAs, circuit breaker and AIMD concurrency for upstream scraping
+    HOST_HEALTH_MAX_CONCURRENCY = int(os.environ.get('HOST_HEALTH_MAX_CONCURRENCY', '16'))
+    HOST_HEALTH_ACQUIRE_TIMEOUT = int(os.environ.get('HOST_HEALTH_ACQUIRE_TIMEOUT', '30'))  # max wait for a slot or rate token
+    HOST_HEALTH_INITIAL_CONCURRENCY = int(os.environ.get('HOST_HEALTH_INITIAL_CONCURRENCY', '4'))
+    HOST_HEALTH_FAILURE_THRESHOLD = int(os.environ.get('HOST_HEALTH_FAILURE_THRESHOLD', '5'))  # consecutive failures
+    HOST_HEALTH_ERROR_RATE = float(os.environ.get('HOST_HEALTH_ERROR_RATE', '0.5'))  # error EWMA that opens the circuit
+    HOST_HEALTH_SLOW_SECONDS = float(os.environ.get('HOST_HEALTH_SLOW_SECONDS', '10'))  # latency EWMA treated as congestion
+    HOST_HEALTH_COOLDOWN = int(os.environ.get('HOST_HEALTH_COOLDOWN', '30'))  # seconds open before a probe
+    HOST_HEALTH_MAX_COOLDOWN = int(os.environ.get('HOST_HEALTH_MAX_COOLDOWN', '600'))
+    SCRAPER_REQUEUE_BASE_DELAY = int(os.environ.get('SCRAPER_REQUEUE_BASE_DELAY', '60'))  # backoff after a transient failure
+    SCRAPER_REQUEUE_MAX_DELAY = int(os.environ.get('SCRAPER_REQUEUE_MAX_DELAY', '3600'))
+    
+    # Asyncio plain-HTTP scraping engine
+    ASYNC_SCRAPER_CONCURRENCY = int(os.environ.get('ASYNC_SCRAPER_CONCURRENCY', '50'))
+    ASYNC_SCRAPER_REQUEST_TIMEOUT = int(os.environ.get('ASYNC_SCRAPER_REQUEST_TIMEOUT', '15'))  # seconds per request
+    ASYNC_SCRAPER_DEADLINE = int(os.environ.get('ASYNC_SCRAPER_DEADLINE', '120'))  # seconds per barcode, including retries
+    ASYNC_SCRAPER_MAX_RETRIES = int(os.environ.get('ASYNC_SCRAPER_MAX_RETRIES', '3'))
+    
+    # Negative cache for barcodes the scraper could not find (TTL doubles with each miss)
+    NEGATIVE_CACHE_BASE_TTL = int(os.environ.get('NEGATIVE_CACHE_BASE_TTL', '86400'))  # 1 day
+    NEGATIVE_CACHE_MAX_TTL = int(os.environ.get('NEGATIVE_CACHE_MAX_TTL', '2592000'))  # 30 days
+    
+    # Content-addressed store of fetched product pages (gzip), used to re-run extractors offline.
+    # Off by default: the store has no eviction, so enable it only for a capture window with disk to spare
+    PAGE_STORE_ENABLED = os.environ.get('PAGE_STORE_ENABLED', 'false').lower() == 'true'
+    PAGE_STORE_DIR = os.environ.get('PAGE_STORE_DIR', 'page_store')
+    
+    # Parser backend for plain-HTTP product pages: 'lxml' (region-only, precompiled selectors) or 'html.parser'
+    HTML_PARSER_BACKEND = os.environ.get('HTML_PARSER_BACKEND', 'lxml')
+    
+    # Dashboard stats
+    LOW_STOCK_THRESHOLD = int(os.environ.get('LOW_STOCK_THRESHOLD', '5'))
+    
     # CORS settings
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
     
@@ -0,0 +1,342 @@
+"""
+Product extraction pipeline shared by every scraping path
+
+Every page source is first reduced to a *candidates* dict: raw name, price
+and brand texts per selector, currency texts, images, title and error
+markers. The in-browser PRODUCT_CANDIDATES_SCRIPT builds it for Selenium,
+and the HTML parser backends build it for static pages. extract_product()
+then runs the ordered strategies in FIELD_STRATEGIES over the candidates.
+For each field the first strategy that returns a value wins. The result is
+one canonical product record. barcode_cache_fields() and
+catalog_product_fields() map that record onto the two stored document
+shapes.
+"""
+import re
+
+SITE_ORIGIN = "https://smartconsumer-beta.org"
+PLACEHOLDER_IMAGE = "https://via.placeholder.com/300x300/cccccc/666666?text=Add+Image"
+
+# Selectors and patterns the candidate gatherers look for
+PRODUCT_ERROR_MESSAGES = [
+    "string indices must be integers, not 'str'",
+    "404 error",
+    "page not found",
+    "invalid barcode",
+    "barcode not found",
+    "no product data available",
+    "error: product not found"  # Only reject if it's clearly an error message
+]
+PRODUCT_ERROR_CONTEXTS = [
+    "error: product not found",
+    "alert: product not found",
+    "message: product not found",
+    "status: product not found"
+]
+PRODUCT_NAME_SELECTORS = [
+    "h1",
+    "[data-testid*='product-name']",
+    ".product-name",
+    ".product-title",
+    ".product-info h1",
+    ".product-info h2",
+    ".product-details h1",
+    ".product-details h2"
+]
+PRODUCT_MRP_SELECTORS = [
+    "[data-testid*='mrp']",
+    ".mrp",
+    ".product-mrp",
+    ".max-retail-price",
+    ".retail-price",
+    "[class*='mrp']",
+    "[class*='retail']"
+]
+PRODUCT_PRICE_SELECTORS = [
+    "[data-testid*='price']",
+    ".price",
+    ".product-price",
+    ".cost",
+    ".amount",
+    ".selling-price"
+]
+PRICE_PATTERNS = [
+    r'₹\s*[\d,]+\.?\d*',
+    r'Rs\s*[\d,]+\.?\d*',
+    r'\$\s*[\d,]+\.?\d*',
+    r'€\s*[\d,]+\.?\d*',
+    r'£\s*[\d,]+\.?\d*'
+]
+CURRENCY_SYMBOLS = ['₹', 'Rs', '$', '€', '£']
+
+PRODUCT_BRAND_SELECTORS = [
+    "[data-testid*='brand']",
+    ".brand",
+    ".product-brand",
+    "[class*='brand']"
+]
+PRODUCT_ERROR_SELECTORS = [".error", ".not-found"]
+
+# Calls back once no request is in flight and nothing changed for quietMs, or after timeoutMs regardless
+PAGE_QUIET_JS = r"""
+const waitForQuiet = (quietMs, timeoutMs, callback) => {
+    const started = performance.now();
+    const check = () => {
+        const now = performance.now();
+        const activity = window.__pageActivity || {pending: 0, last: started};
+        const idle = activity.pending === 0 && now - Math.max(activity.last, started) >= quietMs;
+        if (idle || now - started >= timeoutMs) return callback(idle);
+        setTimeout(check, config.pollMs);
+    };
+    check();
+};
+"""
+
+# Scrolls to trigger lazy-loaded images, then returns every candidate the extractor needs in one round trip
+PRODUCT_CANDIDATES_SCRIPT = PAGE_QUIET_JS + r"""
+const config = arguments[0];
+const done = arguments[arguments.length - 1];
+const textOf = el => el ? (el.innerText || el.textContent || '').trim() : '';
+const firstTexts = selectors => selectors.map(selector => {
+    try { return [selector, textOf(document.querySelector(selector))]; } catch (e) { return [selector, '']; }
+});
+const collect = () => {
+    // Only rendered text counts: error strings and prices inside scripts are not on the page
+    const text = document.body ? document.body.innerText || '' : '';
+    const lower = (document.title + ' ' + text).toLowerCase();
+    let priceMatch = null;
+    for (const pattern of config.pricePatterns) {
+        const match = text.match(new RegExp(pattern));
+        if (match) { priceMatch = match[0]; break; }
+    }
+    const currencyTexts = [];
+    const seen = new Set();
+    const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode() && currencyTexts.length < 50) {
+        const node = walker.currentNode;
+        const parent = node.parentElement;
+        if (!parent || seen.has(parent) || /^(SCRIPT|STYLE|NOSCRIPT|TEMPLATE)$/.test(parent.tagName) ||
+            !/₹|Rs|\$/.test(node.nodeValue)) continue;
+        seen.add(parent);
+        currencyTexts.push(textOf(parent));
+    }
+    return {
+        url: location.href,
+        title: document.title,
+        errorMessages: config.errorMessages.filter(message => lower.includes(message)),
+        errorContexts: config.errorContexts.filter(context => lower.includes(context)),
+        productNotFound: lower.includes('product not found'),
+        names: firstTexts(config.nameSelectors),
+        mrps: firstTexts(config.mrpSelectors),
+        prices: firstTexts(config.priceSelectors),
+        brands: firstTexts(config.brandSelectors),
+        priceMatch: priceMatch,
+        currencyTexts: currencyTexts,
+        images: Array.from(document.images).map(img => ({
+            src: img.src || img.getAttribute('src') || '',
+            alt: img.alt,
+            className: img.className,
+            // Blocked images never load, so fall back to their declared size like the HTML extractors do
+            width: img.naturalWidth ? img.width : Number(img.getAttribute('width')) || 0,
+            height: img.naturalWidth ? img.height : Number(img.getAttribute('height')) || 0,
+            naturalWidth: img.naturalWidth,
+            naturalHeight: img.naturalHeight
+        }))
+    };
+};
+window.scrollTo(0, document.body.scrollHeight / 2);
+waitForQuiet(config.idleMs, config.settleTimeoutMs, () => {
+    window.scrollTo(0, 0);
+    done(collect());
+});
+"""
+
+
+def product_candidates_config(idle_ms=300, settle_timeout_ms=1500):
+    """Arguments for PRODUCT_CANDIDATES_SCRIPT"""
+    return {
+        'errorMessages': [message.lower() for message in PRODUCT_ERROR_MESSAGES],
+        'errorContexts': PRODUCT_ERROR_CONTEXTS,
+        'nameSelectors': PRODUCT_NAME_SELECTORS,
+        'mrpSelectors': PRODUCT_MRP_SELECTORS,
+        'priceSelectors': PRODUCT_PRICE_SELECTORS,
+        'brandSelectors': PRODUCT_BRAND_SELECTORS,
+        'pricePatterns': PRICE_PATTERNS,
+        'pollMs': 50,
+        'idleMs': idle_ms,
+        'settleTimeoutMs': settle_timeout_ms
+    }
+
+def empty_product(barcode):
+    """Canonical product record with every field at its not-found value"""
+    return {
+        'barcode': barcode,
+        'name': 'N/A',
+        'brand': '',
+        'category': '',
+        'description': '',
+        'price': 'N/A',  # Price text as shown on the page, e.g. "MRP ₹ 120.00"
+        'priceValue': None,  # The same price as a number
+        'image': PLACEHOLDER_IMAGE
+    }
+
+def parse_price_value(price_text):
+    """First number in a price text as a float, or None"""
+    match = re.search(r'\d+(?:\.\d+)?', (price_text or '').replace(',', ''))
+    return float(match.group()) if match else None
+
+def absolute_image_url(src):
+    """Resolve an <img> src against the site, or None for relative paths we can't place"""
+    if src.startswith('http'):
+        return src
+    if src.startswith('//'):
+        return f"https:{src}"
+    if src.startswith('/'):
+        return f"{SITE_ORIGIN}{src}"
+    return None
+
+def pick_candidate_image(images):
+    """First image that isn't a data URL, placeholder, logo, icon or tiny, as an absolute URL"""
+    for img in images:
+        img_src = (img.get('src') or '').strip()
+        if not img_src:
+            continue
+        
+        # Skip data URLs, placeholder images, and logos
+        if (img_src.startswith('data:') or
+            'placeholder' in img_src.lower() or
+            'logo' in img_src.lower() or
+            'icon' in img_src.lower()):
+            continue
+        
+        # Skip very small images (but allow 0 dimensions as they might be CSS-sized)
+        if (img.get('width') and img['width'] < 50) or (img.get('height') and img['height'] < 50):
+            continue
+        
+        image_url = absolute_image_url(img_src)
+        if image_url:
+            return image_url
+    return None
+
+def error_page_reason(candidates):
+    """Why the page is an error page, or None if it looks like a product page"""
+    url_segments = (candidates.get('url') or '').lower().split('?')[0].split('/')
+    page_title = candidates.get('title') or ''
+    if any(segment in ('404', 'error', 'not-found') for segment in url_segments) or 'error' in page_title.lower():
+        return f"error URL or title ({candidates.get('url')}, {page_title})"
+    
+    # Specific error messages in the page content (very precise)
+    if candidates.get('errorMessages'):
+        return f"error message '{candidates['errorMessages'][0]}'"
+    
+    # Only reject "product not found" when it appears in a clear error context
+    if candidates.get('productNotFound') and candidates.get('errorContexts'):
+        return "'product not found' in an error context"
+    return None
+
+# Field strategies: each takes the candidates and returns a value, or None to fall through to the next
+def name_from_selectors(candidates):
+    for selector, name_text in candidates.get('names', []):
+        if name_text and not any(message.lower() in name_text.lower() for message in PRODUCT_ERROR_MESSAGES):
+            return name_text
+    return None
+
+def name_from_title(candidates):
+    title_text = (candidates.get('title') or '').strip()
+    if title_text and 'Smart Consumer' not in title_text and len(title_text) > 5:
+        return title_text
+    return None
+
+def price_from_selectors(candidates):
+    for selector, price_text in candidates.get('mrps', []) + candidates.get('prices', []):
+        if price_text and any(currency in price_text for currency in CURRENCY_SYMBOLS):
+            return price_text
+    return None
+
+def price_from_pattern(candidates):
+    return candidates.get('priceMatch')
+
+def price_from_currency_text(candidates):
+    for text in candidates.get('currencyTexts', []):
+        if any(currency in text for currency in CURRENCY_SYMBOLS) and len(text) < 20:  # Reasonable price length
+            return text
+    return None
+
+def brand_from_selectors(candidates):
+    for selector, brand_text in candidates.get('brands', []):
+        if brand_text and len(brand_text) < 50:  # Reasonable brand name length
+            return brand_text
+    return None
+
+def image_from_candidates(candidates):
+    return pick_candidate_image(candidates.get('images', []))
+
+FIELD_STRATEGIES = {
+    'name': [name_from_selectors, name_from_title],
+    'price': [price_from_selectors, price_from_pattern, price_from_currency_text],
+    'brand': [brand_from_selectors],
+    'image': [image_from_candidates]
+}
+
+def extract_product(candidates, barcode):
+    """Build the canonical product record from page candidates.
+
+    Returns None for error pages and for pages where neither a name nor a
+    price was found.
+    """
+    reason = error_page_reason(candidates)
+    if reason:
+        print(f"DEBUG: Detected error page for {barcode}: {reason}")
+        return None
+    
+    product = empty_product(barcode)
+    for field, strategies in FIELD_STRATEGIES.items():
+        for strategy in strategies:
+            value = strategy(candidates)
+            if value:
+                product[field] = value
+                break
+    
+    if product['name'] == 'N/A' and product['price'] == 'N/A':
+        print(f"DEBUG: No key product data found (name or price) for {barcode}")
+        return None
+    
+    product['priceValue'] = parse_price_value(product['price'])
+    print(f"DEBUG: Extracted {barcode}: name={product['name']!r}, price={product['price']!r}, image={product['image']}")
+    return product
+
+def barcode_cache_fields(product):
+    """Product fields of a barcode_cache document.
+
+    Only fields the page actually yielded are included, so the result can be
+    merged over an existing document without blanking curated values. mrp is
+    numeric, taken from priceValue; the price text stays in price.
+    """
+    fields = {'barcode': product['barcode']}
+    for field in ('name', 'price', 'brand', 'category', 'description'):
+        value = (product.get(field) or '').strip()
+        if value and value not in ('N/A', 'Unknown'):
+            fields[field] = value
+    if product.get('priceValue') is not None:
+        fields['mrp'] = product['priceValue']
+    if product.get('image') and product['image'] != PLACEHOLDER_IMAGE:
+        fields['image'] = product['image']
+    return fields
+
+def catalog_product_fields(product):
+    """Product fields in the catalog (products collection) shape: numeric mrp/salePrice and imageUrl/photoPath"""
+    image = product.get('image') if product.get('image') != PLACEHOLDER_IMAGE else ''
+    price_value = product.get('priceValue') or 0.0
+    return {
+        'name': product.get('name', 'N/A'),
+        'brand': product.get('brand', ''),
+        'category': product.get('category', ''),
+        'mrp': price_value,
+        'salePrice': price_value,
+        'imageUrl': image,
+        'photoPath': image,
+        'description': product.get('description', ''),
+        'size': '',
+        'unit': '',
+        'isActive': True,
+        'useInFirstStart': False
+    }